@@ -1,125 +1,155 @@
+from types import MappingProxyType
+import numpy as np
+
+# Masses in amu, single-bond covalent radii in angstrom (Cordero et al., 2008) and Jmol CPK colors.
+_ELEMENT_DATA = {
+    1: {"symbol": "H", "name": "Hydrogen", "mass": 1.008, "covalent_radius": 0.31, "color": "#FFFFFF"},
+    2: {"symbol": "He", "name": "Helium", "mass": 4.0026, "covalent_radius": 0.28, "color": "#D9FFFF"},
+    3: {"symbol": "Li", "name": "Lithium", "mass": 6.94, "covalent_radius": 1.28, "color": "#CC80FF"},
+    4: {"symbol": "Be", "name": "Beryllium", "mass": 9.0122, "covalent_radius": 0.96, "color": "#C2FF00"},
+    5: {"symbol": "B", "name": "Boron", "mass": 10.81, "covalent_radius": 0.84, "color": "#FFB5B5"},
+    6: {"symbol": "C", "name": "Carbon", "mass": 12.011, "covalent_radius": 0.76, "color": "#909090"},
+    7: {"symbol": "N", "name": "Nitrogen", "mass": 14.007, "covalent_radius": 0.71, "color": "#3050F8"},
+    8: {"symbol": "O", "name": "Oxygen", "mass": 15.999, "covalent_radius": 0.66, "color": "#FF0D0D"},
+    9: {"symbol": "F", "name": "Fluorine", "mass": 18.998, "covalent_radius": 0.57, "color": "#90E050"},
+    10: {"symbol": "Ne", "name": "Neon", "mass": 20.180, "covalent_radius": 0.58, "color": "#B3E3F5"},
+    11: {"symbol": "Na", "name": "Sodium", "mass": 22.990, "covalent_radius": 1.66, "color": "#AB5CF2"},
+    12: {"symbol": "Mg", "name": "Magnesium", "mass": 24.305, "covalent_radius": 1.41, "color": "#8AFF00"},
+    13: {"symbol": "Al", "name": "Aluminum", "mass": 26.982, "covalent_radius": 1.21, "color": "#BFA6A6"},
+    14: {"symbol": "Si", "name": "Silicon", "mass": 28.085, "covalent_radius": 1.11, "color": "#F0C8A0"},
+    15: {"symbol": "P", "name": "Phosphorus", "mass": 30.974, "covalent_radius": 1.07, "color": "#FF8000"},
+    16: {"symbol": "S", "name": "Sulfur", "mass": 32.06, "covalent_radius": 1.05, "color": "#FFFF30"},
+    17: {"symbol": "Cl", "name": "Chlorine", "mass": 35.45, "covalent_radius": 1.02, "color": "#1FF01F"},
+    18: {"symbol": "Ar", "name": "Argon", "mass": 39.948, "covalent_radius": 1.06, "color": "#80D1E3"},
+    19: {"symbol": "K", "name": "Potassium", "mass": 39.098, "covalent_radius": 2.03, "color": "#8F40D4"},
+    20: {"symbol": "Ca", "name": "Calcium", "mass": 40.078, "covalent_radius": 1.76, "color": "#3DFF00"},
+    21: {"symbol": "Sc", "name": "Scandium", "mass": 44.956, "covalent_radius": 1.70, "color": "#E6E6E6"},
+    22: {"symbol": "Ti", "name": "Titanium", "mass": 47.867, "covalent_radius": 1.60, "color": "#BFC2C7"},
+    23: {"symbol": "V", "name": "Vanadium", "mass": 50.942, "covalent_radius": 1.53, "color": "#A6A6AB"},
+    24: {"symbol": "Cr", "name": "Chromium", "mass": 51.996, "covalent_radius": 1.39, "color": "#8A99C7"},
+    25: {"symbol": "Mn", "name": "Manganese", "mass": 54.938, "covalent_radius": 1.39, "color": "#9C7AC7"},
+    26: {"symbol": "Fe", "name": "Iron", "mass": 55.845, "covalent_radius": 1.32, "color": "#E06633"},
+    27: {"symbol": "Co", "name": "Cobalt", "mass": 58.933, "covalent_radius": 1.26, "color": "#F090A0"},
+    28: {"symbol": "Ni", "name": "Nickel", "mass": 58.693, "covalent_radius": 1.24, "color": "#50D050"},
+    29: {"symbol": "Cu", "name": "Copper", "mass": 63.546, "covalent_radius": 1.32, "color": "#C88033"},
+    30: {"symbol": "Zn", "name": "Zinc", "mass": 65.38, "covalent_radius": 1.22, "color": "#7D80B0"},
+    31: {"symbol": "Ga", "name": "Gallium", "mass": 69.723, "covalent_radius": 1.22, "color": "#C28F8F"},
+    32: {"symbol": "Ge", "name": "Germanium", "mass": 72.630, "covalent_radius": 1.20, "color": "#668F8F"},
+    33: {"symbol": "As", "name": "Arsenic", "mass": 74.922, "covalent_radius": 1.19, "color": "#BD80E3"},
+    34: {"symbol": "Se", "name": "Selenium", "mass": 78.971, "covalent_radius": 1.20, "color": "#FFA100"},
+    35: {"symbol": "Br", "name": "Bromine", "mass": 79.904, "covalent_radius": 1.20, "color": "#A62929"},
+    36: {"symbol": "Kr", "name": "Krypton", "mass": 83.798, "covalent_radius": 1.16, "color": "#5CB8D1"},
+    37: {"symbol": "Rb", "name": "Rubidium", "mass": 85.468, "covalent_radius": 2.20, "color": "#702EB0"},
+    38: {"symbol": "Sr", "name": "Strontium", "mass": 87.62, "covalent_radius": 1.95, "color": "#00FF00"},
+    39: {"symbol": "Y", "name": "Yttrium", "mass": 88.906, "covalent_radius": 1.90, "color": "#94FFFF"},
+    40: {"symbol": "Zr", "name": "Zirconium", "mass": 91.224, "covalent_radius": 1.75, "color": "#94E0E0"},
+    41: {"symbol": "Nb", "name": "Niobium", "mass": 92.906, "covalent_radius": 1.64, "color": "#73C2C9"},
+    42: {"symbol": "Mo", "name": "Molybdenum", "mass": 95.95, "covalent_radius": 1.54, "color": "#54B5B5"},
+    43: {"symbol": "Tc", "name": "Technetium", "mass": 98.0, "covalent_radius": 1.47, "color": "#3B9E9E"},
+    44: {"symbol": "Ru", "name": "Ruthenium", "mass": 101.07, "covalent_radius": 1.46, "color": "#248F8F"},
+    45: {"symbol": "Rh", "name": "Rhodium", "mass": 102.91, "covalent_radius": 1.42, "color": "#0A7D8C"},
+    46: {"symbol": "Pd", "name": "Palladium", "mass": 106.42, "covalent_radius": 1.39, "color": "#006985"},
+    47: {"symbol": "Ag", "name": "Silver", "mass": 107.87, "covalent_radius": 1.45, "color": "#C0C0C0"},
+    48: {"symbol": "Cd", "name": "Cadmium", "mass": 112.41, "covalent_radius": 1.44, "color": "#FFD98F"},
+    49: {"symbol": "In", "name": "Indium", "mass": 114.82, "covalent_radius": 1.42, "color": "#A67573"},
+    50: {"symbol": "Sn", "name": "Tin", "mass": 118.71, "covalent_radius": 1.39, "color": "#668080"},
+    51: {"symbol": "Sb", "name": "Antimony", "mass": 121.76, "covalent_radius": 1.39, "color": "#9E63B5"},
+    52: {"symbol": "Te", "name": "Tellurium", "mass": 127.60, "covalent_radius": 1.38, "color": "#D47A00"},
+    53: {"symbol": "I", "name": "Iodine", "mass": 126.90, "covalent_radius": 1.39, "color": "#940094"},
+    54: {"symbol": "Xe", "name": "Xenon", "mass": 131.29, "covalent_radius": 1.40, "color": "#429EB0"},
+    55: {"symbol": "Cs", "name": "Cesium", "mass": 132.91, "covalent_radius": 2.44, "color": "#57178F"},
+    56: {"symbol": "Ba", "name": "Barium", "mass": 137.33, "covalent_radius": 2.15, "color": "#00C900"},
+    57: {"symbol": "La", "name": "Lanthanum", "mass": 138.91, "covalent_radius": 2.07, "color": "#70D4FF"},
+    58: {"symbol": "Ce", "name": "Cerium", "mass": 140.12, "covalent_radius": 2.04, "color": "#FFFFC7"},
+    59: {"symbol": "Pr", "name": "Praseodymium", "mass": 140.91, "covalent_radius": 2.03, "color": "#D9FFC7"},
+    60: {"symbol": "Nd", "name": "Neodymium", "mass": 144.24, "covalent_radius": 2.01, "color": "#C7FFC7"},
+    61: {"symbol": "Pm", "name": "Promethium", "mass": 145.0, "covalent_radius": 1.99, "color": "#A3FFC7"},
+    62: {"symbol": "Sm", "name": "Samarium", "mass": 150.36, "covalent_radius": 1.98, "color": "#8FFFC7"},
+    63: {"symbol": "Eu", "name": "Europium", "mass": 151.96, "covalent_radius": 1.98, "color": "#61FFC7"},
+    64: {"symbol": "Gd", "name": "Gadolinium", "mass": 157.25, "covalent_radius": 1.96, "color": "#45FFC7"},
+    65: {"symbol": "Tb", "name": "Terbium", "mass": 158.93, "covalent_radius": 1.94, "color": "#30FFC7"},
+    66: {"symbol": "Dy", "name": "Dysprosium", "mass": 162.50, "covalent_radius": 1.92, "color": "#1FFFC7"},
+    67: {"symbol": "Ho", "name": "Holmium", "mass": 164.93, "covalent_radius": 1.92, "color": "#00FF9C"},
+    68: {"symbol": "Er", "name": "Erbium", "mass": 167.26, "covalent_radius": 1.89, "color": "#00E675"},
+    69: {"symbol": "Tm", "name": "Thulium", "mass": 168.93, "covalent_radius": 1.90, "color": "#00D452"},
+    70: {"symbol": "Yb", "name": "Ytterbium", "mass": 173.05, "covalent_radius": 1.87, "color": "#00BF38"},
+    71: {"symbol": "Lu", "name": "Lutetium", "mass": 174.97, "covalent_radius": 1.87, "color": "#00AB24"},
+    72: {"symbol": "Hf", "name": "Hafnium", "mass": 178.49, "covalent_radius": 1.75, "color": "#4DC2FF"},
+    73: {"symbol": "Ta", "name": "Tantalum", "mass": 180.95, "covalent_radius": 1.70, "color": "#4DA6FF"},
+    74: {"symbol": "W", "name": "Tungsten", "mass": 183.84, "covalent_radius": 1.62, "color": "#2194D6"},
+    75: {"symbol": "Re", "name": "Rhenium", "mass": 186.21, "covalent_radius": 1.51, "color": "#267DAB"},
+    76: {"symbol": "Os", "name": "Osmium", "mass": 190.23, "covalent_radius": 1.44, "color": "#266696"},
+    77: {"symbol": "Ir", "name": "Iridium", "mass": 192.22, "covalent_radius": 1.41, "color": "#175487"},
+    78: {"symbol": "Pt", "name": "Platinum", "mass": 195.08, "covalent_radius": 1.36, "color": "#D0D0E0"},
+    79: {"symbol": "Au", "name": "Gold", "mass": 196.97, "covalent_radius": 1.36, "color": "#FFD123"},
+    80: {"symbol": "Hg", "name": "Mercury", "mass": 200.59, "covalent_radius": 1.32, "color": "#B8B8D0"},
+    81: {"symbol": "Tl", "name": "Thallium", "mass": 204.38, "covalent_radius": 1.45, "color": "#A6544D"},
+    82: {"symbol": "Pb", "name": "Lead", "mass": 207.2, "covalent_radius": 1.46, "color": "#575961"},
+    83: {"symbol": "Bi", "name": "Bismuth", "mass": 208.98, "covalent_radius": 1.48, "color": "#9E4FB5"},
+    84: {"symbol": "Po", "name": "Polonium", "mass": 209.0, "covalent_radius": 1.40, "color": "#AB5C00"},
+    85: {"symbol": "At", "name": "Astatine", "mass": 210.0, "covalent_radius": 1.50, "color": "#754F45"},
+    86: {"symbol": "Rn", "name": "Radon", "mass": 222.0, "covalent_radius": 1.50, "color": "#428296"},
+    87: {"symbol": "Fr", "name": "Francium", "mass": 223.0, "covalent_radius": 2.60, "color": "#420066"},
+    88: {"symbol": "Ra", "name": "Radium", "mass": 226.0, "covalent_radius": 2.21, "color": "#007D00"},
+    89: {"symbol": "Ac", "name": "Actinium", "mass": 227.0, "covalent_radius": 2.15, "color": "#70ABFA"},
+    90: {"symbol": "Th", "name": "Thorium", "mass": 232.04, "covalent_radius": 2.06, "color": "#00BAFF"},
+    91: {"symbol": "Pa", "name": "Protactinium", "mass": 231.04, "covalent_radius": 2.00, "color": "#00A1FF"},
+    92: {"symbol": "U", "name": "Uranium", "mass": 238.03, "covalent_radius": 1.96, "color": "#008FFF"},
+    93: {"symbol": "Np", "name": "Neptunium", "mass": 237.0, "covalent_radius": 1.90, "color": "#0080FF"},
+    94: {"symbol": "Pu", "name": "Plutonium", "mass": 244.0, "covalent_radius": 1.87, "color": "#006BFF"},
+    95: {"symbol": "Am", "name": "Americium", "mass": 243.0, "covalent_radius": 1.80, "color": "#545CF2"},
+    96: {"symbol": "Cm", "name": "Curium", "mass": 247.0, "covalent_radius": 1.69, "color": "#785CE3"},
+    97: {"symbol": "Bk", "name": "Berkelium", "mass": 247.0, "covalent_radius": 1.50, "color": "#8A4FE3"},
+    98: {"symbol": "Cf", "name": "Californium", "mass": 251.0, "covalent_radius": 1.50, "color": "#A136D4"},
+    99: {"symbol": "Es", "name": "Einsteinium", "mass": 252.0, "covalent_radius": 1.50, "color": "#B31FD4"},
+    100: {"symbol": "Fm", "name": "Fermium", "mass": 257.0, "covalent_radius": 1.50, "color": "#B31FBA"},
+    101: {"symbol": "Md", "name": "Mendelevium", "mass": 258.0, "covalent_radius": 1.50, "color": "#B30DA6"},
+    102: {"symbol": "No", "name": "Nobelium", "mass": 259.0, "covalent_radius": 1.50, "color": "#BD0D87"},
+    103: {"symbol": "Lr", "name": "Lawrencium", "mass": 266.0, "covalent_radius": 1.50, "color": "#C70066"},
+    104: {"symbol": "Rf", "name": "Rutherfordium", "mass": 267.0, "covalent_radius": 1.50, "color": "#CC0059"},
+    105: {"symbol": "Db", "name": "Dubnium", "mass": 268.0, "covalent_radius": 1.50, "color": "#D1004F"},
+    106: {"symbol": "Sg", "name": "Seaborgium", "mass": 269.0, "covalent_radius": 1.50, "color": "#D90045"},
+    107: {"symbol": "Bh", "name": "Bohrium", "mass": 270.0, "covalent_radius": 1.50, "color": "#E00038"},
+    108: {"symbol": "Hs", "name": "Hassium", "mass": 277.0, "covalent_radius": 1.50, "color": "#E6002E"},
+    109: {"symbol": "Mt", "name": "Meitnerium", "mass": 278.0, "covalent_radius": 1.50, "color": "#EB0026"},
+    110: {"symbol": "Ds", "name": "Darmstadtium", "mass": 281.0, "covalent_radius": 1.50, "color": "#FF1493"},
+    111: {"symbol": "Rg", "name": "Roentgenium", "mass": 282.0, "covalent_radius": 1.50, "color": "#FF1493"},
+    112: {"symbol": "Cn", "name": "Copernicium", "mass": 285.0, "covalent_radius": 1.50, "color": "#FF1493"},
+    113: {"symbol": "Nh", "name": "Nihonium", "mass": 286.0, "covalent_radius": 1.50, "color": "#FF1493"},
+    114: {"symbol": "Fl", "name": "Flerovium", "mass": 289.0, "covalent_radius": 1.50, "color": "#FF1493"},
+    115: {"symbol": "Mc", "name": "Moscovium", "mass": 290.0, "covalent_radius": 1.50, "color": "#FF1493"},
+    116: {"symbol": "Lv", "name": "Livermorium", "mass": 293.0, "covalent_radius": 1.50, "color": "#FF1493"},
+    117: {"symbol": "Ts", "name": "Tennessine", "mass": 294.0, "covalent_radius": 1.50, "color": "#FF1493"},
+    118: {"symbol": "Og", "name": "Oganesson", "mass": 294.0, "covalent_radius": 1.50, "color": "#FF1493"}
+}
+
+ATOMIC_NUMBER_DTYPE = np.int16
+
+UNKNOWN_ELEMENT = MappingProxyType({"symbol": "X", "name": "Unknown", "mass": 0.0, "covalent_radius": 0.0, "color": "#FF1493"})
+
+ELEMENTS = MappingProxyType({number: MappingProxyType(info) for number, info in _ELEMENT_DATA.items()})
+
+SYMBOL_TO_NUMBER = MappingProxyType({info["symbol"].lower(): number for number, info in ELEMENTS.items()})
+NAME_TO_NUMBER = MappingProxyType({info["name"].lower(): number for number, info in ELEMENTS.items()})
+
+
+def _property_array(key, dtype):
+    values = [UNKNOWN_ELEMENT[key]] + [ELEMENTS[number][key] for number in range(1, len(ELEMENTS) + 1)]
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+# Per-element properties indexed by atomic number; index 0 holds the unknown element.
+ELEMENT_SYMBOLS = _property_array("symbol", object)
+ATOMIC_MASSES = _property_array("mass", np.float64)
+COVALENT_RADII = _property_array("covalent_radius", np.float64)
+CPK_COLORS = _property_array("color", object)
+
+
 class ElementInfo:
     def __init__(self):
-        self.elements = {
-            1: {"symbol": "H", "name": "Hydrogen"},
-            2: {"symbol": "He", "name": "Helium"},
-            3: {"symbol": "Li", "name": "Lithium"},
-            4: {"symbol": "Be", "name": "Beryllium"},
-            5: {"symbol": "B", "name": "Boron"},
-            6: {"symbol": "C", "name": "Carbon"},
-            7: {"symbol": "N", "name": "Nitrogen"},
-            8: {"symbol": "O", "name": "Oxygen"},
-            9: {"symbol": "F", "name": "Fluorine"},
-            10: {"symbol": "Ne", "name": "Neon"},
-            11: {"symbol": "Na", "name": "Sodium"},
-            12: {"symbol": "Mg", "name": "Magnesium"},
-            13: {"symbol": "Al", "name": "Aluminum"},
-            14: {"symbol": "Si", "name": "Silicon"},
-            15: {"symbol": "P", "name": "Phosphorus"},
-            16: {"symbol": "S", "name": "Sulfur"},
-            17: {"symbol": "Cl", "name": "Chlorine"},
-            18: {"symbol": "Ar", "name": "Argon"},
-            19: {"symbol": "K", "name": "Potassium"},
-            20: {"symbol": "Ca", "name": "Calcium"},
-            21: {"symbol": "Sc", "name": "Scandium"},
-            22: {"symbol": "Ti", "name": "Titanium"},
-            23: {"symbol": "V", "name": "Vanadium"},
-            24: {"symbol": "Cr", "name": "Chromium"},
-            25: {"symbol": "Mn", "name": "Manganese"},
-            26: {"symbol": "Fe", "name": "Iron"},
-            27: {"symbol": "Co", "name": "Cobalt"},
-            28: {"symbol": "Ni", "name": "Nickel"},
-            29: {"symbol": "Cu", "name": "Copper"},
-            30: {"symbol": "Zn", "name": "Zinc"},
-            31: {"symbol": "Ga", "name": "Gallium"},
-            32: {"symbol": "Ge", "name": "Germanium"},
-            33: {"symbol": "As", "name": "Arsenic"},
-            34: {"symbol": "Se", "name": "Selenium"},
-            35: {"symbol": "Br", "name": "Bromine"},
-            36: {"symbol": "Kr", "name": "Krypton"},
-            37: {"symbol": "Rb", "name": "Rubidium"},
-            38: {"symbol": "Sr", "name": "Strontium"},
-            39: {"symbol": "Y", "name": "Yttrium"},
-            40: {"symbol": "Zr", "name": "Zirconium"},
-            41: {"symbol": "Nb", "name": "Niobium"},
-            42: {"symbol": "Mo", "name": "Molybdenum"},
-            43: {"symbol": "Tc", "name": "Technetium"},
-            44: {"symbol": "Ru", "name": "Ruthenium"},
-            45: {"symbol": "Rh", "name": "Rhodium"},
-            46: {"symbol": "Pd", "name": "Palladium"},
-            47: {"symbol": "Ag", "name": "Silver"},
-            48: {"symbol": "Cd", "name": "Cadmium"},
-            49: {"symbol": "In", "name": "Indium"},
-            50: {"symbol": "Sn", "name": "Tin"},
-            51: {"symbol": "Sb", "name": "Antimony"},
-            52: {"symbol": "Te", "name": "Tellurium"},
-            53: {"symbol": "I", "name": "Iodine"},
-            54: {"symbol": "Xe", "name": "Xenon"},
-            55: {"symbol": "Cs", "name": "Cesium"},
-            56: {"symbol": "Ba", "name": "Barium"},
-            57: {"symbol": "La", "name": "Lanthanum"},
-            58: {"symbol": "Ce", "name": "Cerium"},
-            59: {"symbol": "Pr", "name": "Praseodymium"},
-            60: {"symbol": "Nd", "name": "Neodymium"},
-            61: {"symbol": "Pm", "name": "Promethium"},
-            62: {"symbol": "Sm", "name": "Samarium"},
-            63: {"symbol": "Eu", "name": "Europium"},
-            64: {"symbol": "Gd", "name": "Gadolinium"},
-            65: {"symbol": "Tb", "name": "Terbium"},
-            66: {"symbol": "Dy", "name": "Dysprosium"},
-            67: {"symbol": "Ho", "name": "Holmium"},
-            68: {"symbol": "Er", "name": "Erbium"},
-            69: {"symbol": "Tm", "name": "Thulium"},
-            70: {"symbol": "Yb", "name": "Ytterbium"},
-            71: {"symbol": "Lu", "name": "Lutetium"},
-            72: {"symbol": "Hf", "name": "Hafnium"},
-            73: {"symbol": "Ta", "name": "Tantalum"},
-            74: {"symbol": "W", "name": "Tungsten"},
-            75: {"symbol": "Re", "name": "Rhenium"},
-            76: {"symbol": "Os", "name": "Osmium"},
-            77: {"symbol": "Ir", "name": "Iridium"},
-            78: {"symbol": "Pt", "name": "Platinum"},
-            79: {"symbol": "Au", "name": "Gold"},
-            80: {"symbol": "Hg", "name": "Mercury"},
-            81: {"symbol": "Tl", "name": "Thallium"},
-            82: {"symbol": "Pb", "name": "Lead"},
-            83: {"symbol": "Bi", "name": "Bismuth"},
-            84: {"symbol": "Po", "name": "Polonium"},
-            85: {"symbol": "At", "name": "Astatine"},
-            86: {"symbol": "Rn", "name": "Radon"},
-            87: {"symbol": "Fr", "name": "Francium"},
-            88: {"symbol": "Ra", "name": "Radium"},
-            89: {"symbol": "Ac", "name": "Actinium"},
-            90: {"symbol": "Th", "name": "Thorium"},
-            91: {"symbol": "Pa", "name": "Protactinium"},
-            92: {"symbol": "U", "name": "Uranium"},
-            93: {"symbol": "Np", "name": "Neptunium"},
-            94: {"symbol": "Pu", "name": "Plutonium"},
-            95: {"symbol": "Am", "name": "Americium"},
-            96: {"symbol": "Cm", "name": "Curium"},
-            97: {"symbol": "Bk", "name": "Berkelium"},
-            98: {"symbol": "Cf", "name": "Californium"},
-            99: {"symbol": "Es", "name": "Einsteinium"},
-            100: {"symbol": "Fm", "name": "Fermium"},
-            101: {"symbol": "Md", "name": "Mendelevium"},
-            102: {"symbol": "No", "name": "Nobelium"},
-            103: {"symbol": "Lr", "name": "Lawrencium"},
-            104: {"symbol": "Rf", "name": "Rutherfordium"},
-            105: {"symbol": "Db", "name": "Dubnium"},
-            106: {"symbol": "Sg", "name": "Seaborgium"},
-            107: {"symbol": "Bh", "name": "Bohrium"},
-            108: {"symbol": "Hs", "name": "Hassium"},
-            109: {"symbol": "Mt", "name": "Meitnerium"},
-            110: {"symbol": "Ds", "name": "Darmstadtium"},
-            111: {"symbol": "Rg", "name": "Roentgenium"},
-            112: {"symbol": "Cn", "name": "Copernicium"},
-            113: {"symbol": "Nh", "name": "Nihonium"},
-            114: {"symbol": "Fl", "name": "Flerovium"},
-            115: {"symbol": "Mc", "name": "Moscovium"},
-            116: {"symbol": "Lv", "name": "Livermorium"},
-            117: {"symbol": "Ts", "name": "Tennessine"},
-            118: {"symbol": "Og", "name": "Oganesson"}
-        }
+        self.elements = ELEMENTS
 
     def get_element_info(self, atomic_number):
         """Return element information based on atomic number."""
@@ -127,15 +157,40 @@ class ElementInfo:
 
     def get_symbol_from_name(self, name):
         """Return element symbol based on the full name."""
-        for number, info in self.elements.items():
-            if info["name"].lower() == name.lower():
-                return info["symbol"]
-        return None
+        number = NAME_TO_NUMBER.get(name.lower())
+        return ELEMENTS[number]["symbol"] if number else None
 
     def get_atomic_number_from_symbol(self, symbol):
         """Return atomic number based on element symbol."""
-        for number, info in self.elements.items():
-            if info["symbol"].lower() == symbol.lower():
-                return number
-        return None
+        return SYMBOL_TO_NUMBER.get(symbol.lower())
+
+    def get_atomic_numbers_from_symbols(self, symbols):
+        """Return an array of atomic numbers for a sequence of symbols, 0 for unknown symbols."""
+        if len(symbols) == 0:
+            return np.zeros(0, dtype=ATOMIC_NUMBER_DTYPE)
+        unique_symbols, inverse = np.unique(np.asarray(symbols), return_inverse=True)
+        lookup = np.array([SYMBOL_TO_NUMBER.get(symbol.lower(), 0) for symbol in unique_symbols], dtype=ATOMIC_NUMBER_DTYPE)
+        return lookup[inverse.reshape(-1)]
+
+    def get_symbols(self, atomic_numbers):
+        """Return the element symbols for an array of atomic numbers."""
+        return ELEMENT_SYMBOLS[self._valid_numbers(atomic_numbers)]
+
+    def get_masses(self, atomic_numbers):
+        """Return the atomic masses for an array of atomic numbers."""
+        return ATOMIC_MASSES[self._valid_numbers(atomic_numbers)]
+
+    def get_covalent_radii(self, atomic_numbers):
+        """Return the covalent radii in angstrom for an array of atomic numbers."""
+        return COVALENT_RADII[self._valid_numbers(atomic_numbers)]
+
+    def get_colors(self, atomic_numbers):
+        """Return the CPK colors for an array of atomic numbers."""
+        return CPK_COLORS[self._valid_numbers(atomic_numbers)]
+
+    def _valid_numbers(self, atomic_numbers):
+        atomic_numbers = np.asarray(atomic_numbers, dtype=np.intp)
+        return np.where((atomic_numbers > 0) & (atomic_numbers <= len(ELEMENTS)), atomic_numbers, 0)
+
 
+element_info = ElementInfo()
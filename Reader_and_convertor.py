@@ -1,85 +1,255 @@
+import io
+import itertools
+import mmap
 import os
-from Element_infos import ElementInfo
+import numpy as np
+from Element_infos import element_info
+from geometry import Geometry, as_geometry, unit_conversion_factor
+from instrumentation import count, timed
+from binary_format import is_binary_geometry, load_binary, write_binary
+from periodic import format_lattice, parse_lattice
+
+GAMESS_ELEMENT_NAMES = ('CARBON', 'NITROGEN', 'HYDROGEN')
+# $DATA coordinates are in angstrom unless $CONTRL sets UNITS=BOHR, as in GAMESS itself.
+GAMESS_BOHR_UNITS = 'UNITS=BOHR'
+BINARY_FORMAT = 'binary'
+XYZ_COMMENT = "Converted to XYZ format"
+# Rows formatted per string operation and file buffer size used by the writers.
+WRITE_CHUNK_ATOMS = 65536
+WRITE_BUFFER_BYTES = 1 << 20
 
 class GeometryReaderAndConverter:
     def __init__(self):
-        self.element_info = ElementInfo()
+        self.element_info = element_info
 
+    @timed('read_geometry')
     def read_geometry(self, file_path, input_unit='bohr'):
+        """Read the first geometry of a file; binary files carry their own unit and ignore `input_unit`."""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File {file_path} does not exist.")
-        
+        if is_binary_geometry(file_path):
+            return load_binary(file_path).geometry(0)
+
         with open(file_path, 'r') as f:
-            lines = f.readlines()
+            return self.parse_geometry(f, input_unit)
 
-        if lines[0].strip().isdigit():
-            return self._read_xyz_format(lines, input_unit)
-        elif any('CARBON' in line or 'NITROGEN' in line or 'HYDROGEN' in line for line in lines):
-            return self._read_gamess_format(lines, input_unit)
-        else:
+    @timed('parse_geometry')
+    def parse_geometry(self, source, input_unit='bohr'):
+        """Parse the first geometry from text, bytes, an open file object or an mmap buffer."""
+        if isinstance(source, (bytes, bytearray, memoryview)) and is_binary_geometry(source):
+            return load_binary(source).geometry(0)
+        lines = _text_lines(source)
+        first_line = lines.readline()
+        if first_line.strip().isdigit():
+            return self._read_xyz_frame(first_line, lines, input_unit)
+        geometry, element_names = self._parse_gamess_lines(itertools.chain([first_line], lines))
+
+        if not any(element in name for name in element_names for element in GAMESS_ELEMENT_NAMES):
             raise ValueError("Unsupported geometry format.")
+        return self._finish_gamess_geometry(geometry, input_unit)
+
+    def read_frames(self, file_path, input_unit='bohr'):
+        """Yield every frame of a (multi-frame) XYZ or binary file as a Geometry, one at a time."""
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File {file_path} does not exist.")
+        if is_binary_geometry(file_path):
+            yield from load_binary(file_path)
+            return
+
+        with open(file_path, 'r') as f:
+            yield from self.parse_frames(f, input_unit)
+
+    def parse_frames(self, source, input_unit='bohr'):
+        """Yield every frame from text, bytes, an open file object or an mmap buffer."""
+        lines = _text_lines(source)
+        first_line = lines.readline()
+        if not first_line.strip().isdigit():
+            yield self._read_gamess_format(itertools.chain([first_line], lines), input_unit)
+            return
+        count_line = first_line
+        while count_line:
+            if count_line.strip():
+                yield self._read_xyz_frame(count_line, lines, input_unit)
+            count_line = lines.readline()
 
     def _read_xyz_format(self, lines, input_unit):
-        geometry = []
-        for line in lines[2:]:
-            parts = line.split()
-            element_symbol = parts[0]
-            x, y, z = map(float, parts[1:4])
-            atomic_number = self.element_info.get_atomic_number_from_symbol(element_symbol)
-            if input_unit == 'bohr':  # Convert from angstrom to bohr
-                x, y, z = self._convert_units(x, y, z, 'angstrom', 'bohr')
-            geometry.append({"atomic_number": atomic_number, "symbol": element_symbol, "x": x, "y": y, "z": z})
+        return self._read_xyz_frame(lines[0], iter(lines[1:]), input_unit)
+
+    def _read_xyz_frame(self, count_line, lines, input_unit):
+        atom_count = int(count_line)
+        comment = next(lines, None) or ""  # Extended XYZ comment lines may carry the periodic cell
+        atom_lines = list(itertools.islice(lines, atom_count))
+        if len(atom_lines) < atom_count:
+            raise ValueError(f"Truncated XYZ frame: expected {atom_count} atoms, found {len(atom_lines)}.")
+
+        tokens = " ".join(atom_lines).split()
+        if len(tokens) == 4 * atom_count:
+            symbols = tokens[0::4]
+            coordinates = np.array([tokens[1::4], tokens[2::4], tokens[3::4]], dtype=np.float64).T
+        else:  # Extra columns (charges, forces, ...) after the coordinates
+            rows = [line.split()[:4] for line in atom_lines]
+            symbols = [row[0] for row in rows]
+            coordinates = np.array([row[1:4] for row in rows], dtype=np.float64)
+
+        geometry = Geometry(self.element_info.get_atomic_numbers_from_symbols(symbols), coordinates, 'angstrom',
+                            parse_lattice(comment))
+        if input_unit == 'bohr':  # Convert from angstrom to bohr
+            geometry.convert_units('bohr')
+        count('atoms_parsed', atom_count)
         return geometry
 
     def _read_gamess_format(self, lines, input_unit):
-        geometry = []
+        geometry, _ = self._parse_gamess_lines(lines)
+        return self._finish_gamess_geometry(geometry, input_unit)
+
+    def _parse_gamess_lines(self, lines):
+        element_names = []
+        coordinates = []
+        unit = 'angstrom'
         for line in lines:
+            if GAMESS_BOHR_UNITS in line.upper():
+                unit = 'bohr'
             parts = line.split()
-            if len(parts) >= 5:
-                element_name = parts[0]
-                atomic_number = self.element_info.get_atomic_number_from_symbol(element_name[:1])
-                x, y, z = map(float, parts[2:5])
-                if input_unit == 'angstrom':  # Convert from bohr to angstrom
-                    x, y, z = self._convert_units(x, y, z, 'bohr', 'angstrom')
-                geometry.append({"atomic_number": atomic_number, "symbol": element_name[:1], "x": x, "y": y, "z": z})
+            if len(parts) >= 5 and '$' not in line and '=' not in line:  # Skip $CONTRL-style group lines
+                element_names.append(parts[0])
+                coordinates.append(parts[2:5])
+        coordinates = np.array(coordinates, dtype=np.float64).reshape(-1, 3)
+        atomic_numbers = self.element_info.get_atomic_numbers_from_symbols([name[:1] for name in element_names])
+        return Geometry(atomic_numbers, coordinates, unit), element_names
+
+    def _finish_gamess_geometry(self, geometry, input_unit):
+        geometry.convert_units(input_unit)
+        count('atoms_parsed', len(geometry))
         return geometry
 
+    @timed('convert_to_format')
     def convert_to_format(self, geometry, target_format, output_unit='angstrom'):
+        """Return the geometry as text in `target_format`, or as bytes for the binary format."""
+        if target_format.lower() == BINARY_FORMAT:
+            buffer = io.BytesIO()
+            self.write_geometry(geometry, target_format, buffer, output_unit)
+            return buffer.getvalue()
+        buffer = io.StringIO()
+        self.write_geometry(geometry, target_format, buffer, output_unit)
+        return buffer.getvalue()[:-1]  # Without the final newline, as returned before streaming
+
+    def write_geometry(self, geometry, target_format, f, output_unit='angstrom', bonds=None, comment=None):
+        """Write the geometry in `target_format` to `f`, streaming it in chunks of rows.
+
+        `f` is a text handle, or a seekable binary handle for the binary format, which also stores `bonds`.
+        `comment` replaces the default XYZ comment line.
+        """
         if target_format.lower() == 'xyz':
-            return self._convert_to_xyz(geometry, output_unit)
+            self._write_xyz(geometry, f, output_unit, comment or XYZ_COMMENT)
         elif target_format.lower() == 'gamess':
-            return self._convert_to_gamess(geometry, output_unit)
+            self._write_gamess(geometry, f, output_unit)
+        elif target_format.lower() == BINARY_FORMAT:
+            self._write_binary(geometry, f, output_unit, bonds)
         else:
             raise ValueError(f"Unsupported target format: {target_format}")
 
-    def _convert_to_xyz(self, geometry, output_unit):
-        lines = [f"{len(geometry)}", "Converted to XYZ format"]
-        for atom in geometry:
-            x, y, z = self._convert_units(atom['x'], atom['y'], atom['z'], 'bohr', output_unit)
-            lines.append(f"{atom['symbol']} {x:.6f} {y:.6f} {z:.6f}")
-        return "\n".join(lines)
-
-    def _convert_to_gamess(self, geometry, output_unit):
-        lines = ["Converted to GAMESS format"]
-        for atom in geometry:
-            x, y, z = self._convert_units(atom['x'], atom['y'], atom['z'], 'angstrom', output_unit)
-            element_name = self.element_info.get_element_info(atom['atomic_number'])["name"].upper()
-            lines.append(f"{element_name} {atom['atomic_number']}.0 {x:.6f} {y:.6f} {z:.6f}")
-        return "\n".join(lines)
+    def write_frames(self, geometries, file_path, output_unit='angstrom', append=False):
+        """Write geometries as consecutive XYZ frames, appending to an existing file with `append`; returns the count."""
+        frames = 0
+        with open(file_path, 'a' if append else 'w', buffering=WRITE_BUFFER_BYTES) as f:
+            for geometry in geometries:
+                self._write_xyz(geometry, f, output_unit)
+                frames += 1
+        return frames
+
+    def _write_xyz(self, geometry, f, output_unit, comment=XYZ_COMMENT):
+        geometry = as_geometry(geometry, 'bohr')
+        factor = unit_conversion_factor(geometry.unit, output_unit)
+        coordinates = geometry.coordinates * factor
+        if geometry.lattice is not None:
+            comment = f"{format_lattice(geometry.lattice * factor)} {comment}"
+        f.write(f"{len(geometry)}\n{comment}\n")
+        _write_rows(f, self.element_info.get_symbols(geometry.atomic_numbers), coordinates)
+
+    def _write_binary(self, geometry, f, output_unit, bonds):
+        geometry = as_geometry(geometry, 'angstrom')
+        factor = unit_conversion_factor(geometry.unit, output_unit)
+        if bonds is not None and factor != 1.0:
+            bonds = bonds.scaled(factor)
+        lattice = None if geometry.lattice is None else geometry.lattice * factor
+        write_binary(f, geometry.atomic_numbers, [geometry.coordinates * factor], output_unit, bonds, np.float64,
+                     lattice)
+
+    def _write_gamess(self, geometry, f, output_unit):
+        geometry = as_geometry(geometry, 'angstrom')
+        coordinates = geometry.coordinates * unit_conversion_factor(geometry.unit, output_unit)
+        f.write("Converted to GAMESS format\n")
+        if output_unit == 'bohr':
+            f.write(f" $CONTRL {GAMESS_BOHR_UNITS} $END\n")
+        _write_rows(f, self._gamess_labels(geometry.atomic_numbers), coordinates)
+
+    def _gamess_labels(self, atomic_numbers):
+        """Per-atom 'NAME Z.0' labels, looking each element up once."""
+        unique_numbers, inverse = np.unique(atomic_numbers, return_inverse=True)
+        labels = np.array([f"{self.element_info.get_element_info(int(number))['name'].upper()} {number}.0"
+                           for number in unique_numbers])
+        return labels[inverse.reshape(-1)]
 
     def _convert_units(self, x, y, z, from_unit, to_unit):
-        conversion_factor = 1.8897259886
-        if from_unit == to_unit:
-            return x, y, z
-        elif from_unit == 'angstrom' and to_unit == 'bohr':
-            return x * conversion_factor, y * conversion_factor, z * conversion_factor
-        elif from_unit == 'bohr' and to_unit == 'angstrom':
-            return x / conversion_factor, y / conversion_factor, z / conversion_factor
-        else:
-            raise ValueError(f"Unsupported unit conversion: {from_unit} to {to_unit}")
+        conversion_factor = unit_conversion_factor(from_unit, to_unit)
+        return x * conversion_factor, y * conversion_factor, z * conversion_factor
+
+    @timed('save_converted_geometry')
+    def save_converted_geometry(self, geometry, target_format, file_path, output_unit='angstrom', bonds=None):
+        """Write the geometry in `target_format` and return it as written, in `output_unit`."""
+        legacy_unit = 'bohr' if target_format.lower() == 'xyz' else 'angstrom'
+        geometry = as_geometry(geometry, legacy_unit)
+        written_geometry = geometry.converted(output_unit)
+        if bonds is not None:
+            bonds = bonds.scaled(unit_conversion_factor(geometry.unit, output_unit))
+        mode = 'wb' if target_format.lower() == BINARY_FORMAT else 'w'
+        with open(file_path, mode, buffering=WRITE_BUFFER_BYTES) as f:
+            self.write_geometry(written_geometry, target_format, f, output_unit, bonds)
+        return written_geometry
+
+
+class _DecodedLines:
+    """Line iterator over a binary source with readline(), such as a binary file or an mmap."""
+
+    def __init__(self, source, encoding='utf-8'):
+        self.source = source
+        self.encoding = encoding
+
+    def readline(self):
+        return self.source.readline().decode(self.encoding)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+
+def _write_rows(f, labels, coordinates):
+    """Write 'label x y z' rows with six decimals, formatting a whole chunk of rows in one operation."""
+    row_format = "%s %.6f %.6f %.6f\n"
+    for start in range(0, len(coordinates), WRITE_CHUNK_ATOMS):
+        chunk = coordinates[start:start + WRITE_CHUNK_ATOMS]
+        values = [None] * (4 * len(chunk))
+        values[0::4] = labels[start:start + WRITE_CHUNK_ATOMS].tolist()
+        values[1::4] = chunk[:, 0].tolist()
+        values[2::4] = chunk[:, 1].tolist()
+        values[3::4] = chunk[:, 2].tolist()
+        f.write(row_format * len(chunk) % tuple(values))
+
 
-    def save_converted_geometry(self, geometry, target_format, file_path, output_unit='angstrom'):
-        converted_geometry = self.convert_to_format(geometry, target_format, output_unit)
-        with open(file_path, 'w') as f:
-            f.write(converted_geometry)
-        print(f"Geometry saved to {file_path}")
+def _text_lines(source):
+    if isinstance(source, str):
+        return io.StringIO(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return _DecodedLines(io.BytesIO(source))
+    if isinstance(source, mmap.mmap):
+        return _DecodedLines(source)
+    if hasattr(source, 'readline'):
+        if isinstance(source.read(0), bytes):
+            return _DecodedLines(source)
+        return source
+    raise TypeError(f"Cannot read geometry from {type(source).__name__}.")
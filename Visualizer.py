@@ -1,63 +1,162 @@
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-from Element_infos import ElementInfo
+import numpy as np
+from Element_infos import element_info
+from geometry import as_geometry
+from instrumentation import timed
+from periodic import cell_edges, image_shifts, minimum_image
+
+# Marker area per angstrom of covalent radius, and the smallest marker drawn.
+ATOM_SIZE_SCALE = 130
+MIN_ATOM_SIZE = 30
+# Atom labels are skipped above this many atoms; thousands of text artists dominate draw time.
+LABEL_LIMIT = 200
+# Periodic images are drawn as faded atoms, and skipped when they would exceed this many markers.
+IMAGE_ALPHA = 0.25
+IMAGE_ATOM_LIMIT = 50000
+CELL_COLOR = '0.4'
+BOND_STYLES = {
+    3: ('r', 4),
+    2: ('g', 3),
+    1: ('b', 2),
+}
+
+def bond_segments(atoms, bonds, selected=None, lattice=None):
+    """Return the (B, 2, 3) segments of the selected bonds.
+
+    With a lattice every bond is drawn as two half-bonds along its minimum-image vector, so bonds that
+    cross a cell face end on the face instead of spanning the whole cell.
+    """
+    i, j = (bonds.i, bonds.j) if selected is None else (bonds.i[selected], bonds.j[selected])
+    if lattice is None:
+        return np.stack((atoms[i], atoms[j]), axis=1)
+    half = minimum_image(atoms[j] - atoms[i], lattice) / 2
+    return np.concatenate((np.stack((atoms[i], atoms[i] + half), axis=1),
+                           np.stack((atoms[j], atoms[j] - half), axis=1)))
+
+
+def image_coordinates(atoms, lattice, repeats=1):
+    """Positions of the atoms in every neighboring cell within `repeats` cells, as one (S * N, 3) array."""
+    shifts = image_shifts(repeats) @ lattice
+    return (atoms[None, :, :] + shifts[:, None, :]).reshape(-1, 3)
+
 
 class GeometryVisualizer:
     def __init__(self):
-        self.element_info = ElementInfo()
+        self.element_info = element_info
+
+    def visualize_geometry(self, geometry, title="Molecular Geometry", bonds=None):
+        # matplotlib is imported inside the methods that draw, so reading and converting never load it.
+        import matplotlib.pyplot as plt
+        from mpl_toolkits.mplot3d import Axes3D  # Registers the '3d' projection on older matplotlib
 
-    def visualize_geometry(self, geometry, title="Molecular Geometry"):
         fig = plt.figure()
         ax = fig.add_subplot(111, projection='3d')
-
-        x_vals = []
-        y_vals = []
-        z_vals = []
-        labels = []
-
-        for atom in geometry:
-            x_vals.append(atom['x'])
-            y_vals.append(atom['y'])
-            z_vals.append(atom['z'])
-            labels.append(atom['symbol'])
-
-            ax.scatter(atom['x'], atom['y'], atom['z'], s=100, alpha=0.6)
-
-        for i in range(len(x_vals)):
-            ax.text(x_vals[i], y_vals[i], z_vals[i], labels[i], size=12, zorder=1, color='k')
-
-        ax.set_xlabel('X Coordinate')
-        ax.set_ylabel('Y Coordinate')
-        ax.set_zlabel('Z Coordinate')
+        self.draw_geometry(ax, geometry, bonds)
         ax.set_title(title)
 
         plt.show()
 
-    def save_visualization(self, geometry, file_name="geometry_visualization.png", title="Molecular Geometry"):
-        fig = plt.figure()
-        ax = fig.add_subplot(111, projection='3d')
-
-        x_vals = []
-        y_vals = []
-        z_vals = []
-        labels = []
-
-        for atom in geometry:
-            x_vals.append(atom['x'])
-            y_vals.append(atom['y'])
-            z_vals.append(atom['z'])
-            labels.append(atom['symbol'])
+    def save_visualization(self, geometry, file_name="geometry_visualization.png", title="Molecular Geometry", bonds=None):
+        """Draw the geometry off-screen, save it to `file_name` and return the path."""
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from mpl_toolkits.mplot3d import Axes3D  # Registers the '3d' projection on older matplotlib
 
-            ax.scatter(atom['x'], atom['y'], atom['z'], s=100, alpha=0.6)
+        # An Agg figure outside pyplot's registry is freed once saved instead of accumulating.
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111, projection='3d')
+        self.draw_geometry(ax, geometry, bonds)
+        ax.set_title(title)
 
-        for i in range(len(x_vals)):
-            ax.text(x_vals[i], y_vals[i], z_vals[i], labels[i], size=12, zorder=1, color='k')
+        fig.savefig(file_name)
+        return file_name
+
+    @timed('draw_geometry')
+    def draw_geometry(self, ax, geometry, bonds=None, show_labels=True, label_limit=LABEL_LIMIT, show_images=False):
+        """Draw atoms, optional bonds and labels on a 3D axis with one artist per kind.
+
+        Periodic geometries also get their cell box and, with `show_images`, the atoms of the neighboring cells.
+        """
+        geometry = as_geometry(geometry)
+        self.draw_atoms(ax, geometry, alpha=0.6)
+        if bonds is not None:
+            self.draw_bonds(ax, geometry.coordinates, bonds, geometry.lattice)
+        if show_labels:
+            self.draw_labels(ax, geometry, label_limit)
+        if geometry.lattice is not None:
+            self.draw_cell(ax, geometry.lattice)
+            if show_images:
+                self.draw_images(ax, geometry)
 
         ax.set_xlabel('X Coordinate')
         ax.set_ylabel('Y Coordinate')
         ax.set_zlabel('Z Coordinate')
-        ax.set_title(title)
-
-        plt.savefig(file_name)
-        print(f"Visualization saved to {file_name}")
 
+    def set_equal_limits(self, ax, atoms, lattice=None, image_repeats=0):
+        """Center a cube of equal extent on all axes around the (N, 3) `atoms` and the cell, if any."""
+        if lattice is not None:
+            corners = np.array(np.meshgrid(*[(-image_repeats, 1 + image_repeats)] * 3)).reshape(3, -1).T
+            atoms = np.concatenate((atoms, corners @ lattice))
+        max_range = np.ptp(atoms, axis=0).max()
+        mid_x, mid_y, mid_z = np.mean(atoms, axis=0)
+        ax.set_xlim(mid_x - max_range / 2, mid_x + max_range / 2)
+        ax.set_ylim(mid_y - max_range / 2, mid_y + max_range / 2)
+        ax.set_zlim(mid_z - max_range / 2, mid_z + max_range / 2)
+
+    def atom_colors(self, geometry):
+        return self.element_info.get_colors(geometry.atomic_numbers)
+
+    def atom_sizes(self, geometry):
+        radii = self.element_info.get_covalent_radii(geometry.atomic_numbers)
+        return np.maximum(ATOM_SIZE_SCALE * radii, MIN_ATOM_SIZE)
+
+    @timed('draw_atoms')
+    def draw_atoms(self, ax, geometry, colors=None, alpha=1.0):
+        """Draw all atoms as a single scatter collection colored and sized by element."""
+        atoms = geometry.coordinates
+        if colors is None:
+            colors = self.atom_colors(geometry)
+        return ax.scatter(atoms[:, 0], atoms[:, 1], atoms[:, 2], s=self.atom_sizes(geometry),
+                          c=list(colors), alpha=alpha, edgecolors='k', linewidths=0.3)
+
+    @timed('draw_images')
+    def draw_images(self, ax, geometry, repeats=1):
+        """Draw faded copies of the atoms in the neighboring cells; returns None above IMAGE_ATOM_LIMIT markers."""
+        images = image_coordinates(geometry.coordinates, geometry.lattice, repeats)
+        if len(images) > IMAGE_ATOM_LIMIT:
+            return None
+        copies = len(images) // max(len(geometry), 1)
+        return ax.scatter(images[:, 0], images[:, 1], images[:, 2], s=np.tile(self.atom_sizes(geometry), copies),
+                          c=list(self.atom_colors(geometry)) * copies, alpha=IMAGE_ALPHA, edgecolors='k', linewidths=0.2)
+
+    def draw_cell(self, ax, lattice):
+        """Outline the unit cell with dashed lines."""
+        from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+        collection = Line3DCollection(cell_edges(lattice), colors=CELL_COLOR, linewidths=1, linestyles='--')
+        ax.add_collection3d(collection)
+        return collection
+
+    @timed('draw_bonds')
+    def draw_bonds(self, ax, atoms, bonds, lattice=None):
+        """Draw bonds between (N, 3) `atoms` as one line collection per bond order; returns them by order."""
+        from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+        collections = {}
+        for order, (color, width) in BOND_STYLES.items():
+            selected = bonds.order == order
+            if not selected.any():
+                continue
+            segments = bond_segments(atoms, bonds, selected, lattice)
+            collection = Line3DCollection(segments, colors=color, linewidths=width)
+            ax.add_collection3d(collection)
+            collections[order] = collection
+        return collections
+
+    @timed('draw_labels')
+    def draw_labels(self, ax, geometry, label_limit=LABEL_LIMIT):
+        if len(geometry) > label_limit:
+            return []
+        atoms = geometry.coordinates
+        return [ax.text(x, y, z, symbol, size=12, zorder=1, color='k')
+                for (x, y, z), symbol in zip(atoms, geometry.symbols)]
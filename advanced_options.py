@@ -1,7 +1,23 @@
 import tkinter as tk
 from tkinter import ttk
-import numpy as np
-from optimization import GeometryOptimizer
+import queue
+from optimization import OptimizationWorker
+from geometry import as_geometry
+from bonds import perceive_bonds
+from headless_renderer import HeadlessRenderer
+from analysis import distances
+from periodic import minimum_image
+from analysis_panel import AnalysisPanel
+
+OPTIMIZATION_METHODS = {
+    'L-BFGS': 'lbfgs',
+    'FIRE': 'fire',
+    'Simple MM Optimization': 'gradient_descent',
+}
+
+OPTIMIZATION_POLL_MS = 50
+# Perspective, top, front and side views written by "Export Views".
+EXPORT_VIEWS = ((30, -60), (90, -90), (0, -90), (0, 0))
 
 class AdvancedOptions:
     def __init__(self, root, visualizer_app):
@@ -29,7 +45,7 @@ class AdvancedOptions:
             self.visualizer_app.ax.view_init(elev=self.visualizer_app.ax.elev, azim=self.visualizer_app.ax.azim + 10)
         elif axis == 'z':
             self.visualizer_app.ax.view_init(elev=self.visualizer_app.ax.elev - 10, azim=self.visualizer_app.ax.azim)
-        self.visualizer_app.canvas.draw()
+        self.visualizer_app.canvas.draw_idle()
 
     def create_color_customization(self):
         color_label = ttk.Label(self.frame, text="Atom Color Customization")
@@ -42,64 +58,167 @@ class AdvancedOptions:
 
     def apply_color_customization(self):
         color_option = self.color_var.get()
+        scene = self.visualizer_app.scene
         if color_option == "By Element":
-            colors = {
-                'H': 'white', 'C': 'black', 'O': 'red', 'N': 'blue'
-            }
-            for atom in self.visualizer_app.geometry:
-                color = colors.get(atom['symbol'], 'gray')
-                self.visualizer_app.ax.scatter(atom['x'], atom['y'], atom['z'], color=color, s=100)
+            geometry = as_geometry(self.visualizer_app.geometry)
+            scene.set_atom_colors(list(self.visualizer_app.visualizer.atom_colors(geometry)))
         elif color_option == "Custom":
             custom_color = 'yellow'
-            for atom in self.visualizer_app.geometry:
-                self.visualizer_app.ax.scatter(atom['x'], atom['y'], atom['z'], color=custom_color, s=100)
-        self.visualizer_app.canvas.draw()
+            scene.set_atom_colors(custom_color)
+        self.visualizer_app.canvas.draw_idle()
 
     def create_bond_length_display(self):
         ttk.Button(self.frame, text="Display Bond Lengths", command=self.display_bond_lengths).grid(row=6, column=0, columnspan=2)
+        ttk.Button(self.frame, text="Analysis", command=self.show_analysis).grid(row=6, column=2)
 
     def display_bond_lengths(self):
-        bond_thresholds = {
-            "single": 1.6, "double": 1.3, "triple": 1.2
-        }
-        atoms = np.array([[atom['x'], atom['y'], atom['z']] for atom in self.visualizer_app.geometry])
-        for i in range(len(atoms)):
-            for j in range(i + 1, len(atoms)):
-                distance = np.linalg.norm(atoms[i] - atoms[j])
-                if distance <= bond_thresholds["single"]:
-                    x, y, z = (atoms[i] + atoms[j]) / 2
-                    self.visualizer_app.ax.text(x, y, z, f"{distance:.2f}", color='black', fontsize=10)
-        self.visualizer_app.canvas.draw()
+        geometry = as_geometry(self.visualizer_app.geometry)
+        bonds = self.visualizer_app.bonds
+        if bonds is None:
+            bonds = perceive_bonds(geometry)
+        atoms = geometry.coordinates
+        midpoints = atoms[bonds.i] + minimum_image(atoms[bonds.j] - atoms[bonds.i], geometry.lattice) / 2
+        scene = self.visualizer_app.scene
+        scene.remove_annotations()
+        for midpoint, distance in zip(midpoints, distances(atoms, bonds.pairs, geometry.lattice)):
+            scene.add_annotation(midpoint, f"{distance:.2f}", color='black', fontsize=10)
+        self.visualizer_app.canvas.draw_idle()
+
+    def show_analysis(self):
+        if self.visualizer_app.geometry is None:
+            return
+        trajectory = self.visualizer_app.trajectory_controls.trajectory
+        if trajectory is not None and not trajectory.matches(self.visualizer_app.geometry):
+            trajectory = None  # Left over from a different molecule
+        AnalysisPanel(self.root, self.visualizer_app.geometry, self.visualizer_app.bonds, trajectory)
 
     def create_export_options(self):
         export_label = ttk.Label(self.frame, text="Export Options")
-        export_label.grid(row=7, column=0, columnspan=2)
+        export_label.grid(row=7, column=0, columnspan=3)
         ttk.Button(self.frame, text="Export Image", command=self.export_image).grid(row=8, column=0)
-        ttk.Button(self.frame, text="Save Geometry", command=self.save_geometry).grid(row=8, column=1)
+        ttk.Button(self.frame, text="Export Views", command=self.export_views).grid(row=8, column=1)
+        ttk.Button(self.frame, text="Save Geometry", command=self.save_geometry).grid(row=8, column=2)
+        self.export_status = ttk.Label(self.frame, text="")
+        self.export_status.grid(row=9, column=0, columnspan=3)
 
     def export_image(self):
         image_filename = f'{self.visualizer_app.output_filename_entry.get()}_visualization.png'
         self.visualizer_app.fig.savefig(image_filename)
+        self.export_status.config(text=f"Saved {image_filename}")
+
+    def export_views(self):
+        """Render the current geometry from several camera angles off-screen, leaving the display untouched.
+
+        Returns the image paths, which are also shown under the export buttons.
+        """
+        if self.visualizer_app.geometry is None:
+            return []
+        output_stem = f'{self.visualizer_app.output_filename_entry.get()}_visualization'
+        renderer = HeadlessRenderer(width=800, height=800, views=EXPORT_VIEWS)
+        paths = renderer.render(self.visualizer_app.geometry, output_stem, self.visualizer_app.bonds)
+        renderer.close()
+        self.export_status.config(text=f"Saved {len(paths)} views as {output_stem}_view*")
+        return paths
 
     def save_geometry(self):
         output_file = self.visualizer_app.output_filename_entry.get()
         output_format = self.visualizer_app.output_format_var.get()
         output_unit = self.visualizer_app.output_unit_var.get()
         self.visualizer_app.reader_converter.save_converted_geometry(self.visualizer_app.geometry, output_format, output_file, output_unit)
+        self.export_status.config(text=f"Geometry saved to {output_file}")
 
     def create_optimization_controls(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
         optimization_label = ttk.Label(self.frame, text="Geometry Optimization")
-        optimization_label.grid(row=9, column=0, columnspan=2)
+        optimization_label.grid(row=10, column=0, columnspan=2)
         self.method_var = tk.StringVar()
-        methods = ['Simple MM Optimization']
+        methods = list(OPTIMIZATION_METHODS)
         self.method_dropdown = ttk.OptionMenu(self.frame, self.method_var, methods[0], *methods)
-        self.method_dropdown.grid(row=10, column=0, columnspan=2)
-        ttk.Button(self.frame, text="Optimize Geometry", command=self.optimize_geometry).grid(row=11, column=0, columnspan=2)
+        self.method_dropdown.grid(row=11, column=0, columnspan=2)
+        self.optimize_button = ttk.Button(self.frame, text="Optimize Geometry", command=self.optimize_geometry)
+        self.optimize_button.grid(row=12, column=0)
+        self.cancel_button = ttk.Button(self.frame, text="Cancel", command=self.cancel_optimization, state=tk.DISABLED)
+        self.cancel_button.grid(row=12, column=1)
+        self.optimization_status = ttk.Label(self.frame, text="")
+        self.optimization_status.grid(row=13, column=0, columnspan=2)
+
+        self.energy_fig = Figure(figsize=(3, 2))
+        self.energy_ax = self.energy_fig.add_subplot(111)
+        self.energy_line, = self.energy_ax.plot([], [], 'b-')
+        self.energy_ax.set_xlabel('Step')
+        self.energy_ax.set_ylabel('Energy')
+        self.energy_fig.tight_layout()
+        self.energy_canvas = FigureCanvasTkAgg(self.energy_fig, master=self.frame)
+        self.energy_canvas.get_tk_widget().grid(row=14, column=0, columnspan=2, pady=5)
+        self.optimization_worker = None
 
     def optimize_geometry(self):
-        optimizer = GeometryOptimizer(self.visualizer_app.geometry)
-        optimized_geometry = optimizer.optimize()
+        if self.optimization_worker is not None and self.optimization_worker.is_alive():
+            return
+        self.optimized_geometry = self.visualizer_app.geometry
+        self.energy_steps, self.energies = [], []
+        self.optimization_worker = OptimizationWorker(self.optimized_geometry, self.visualizer_app.bonds,
+                                                      method=OPTIMIZATION_METHODS[self.method_var.get()],
+                                                      record_trajectory=True).start()
+        self.optimize_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.optimization_status.config(text="Optimizing...")
+        self.root.after(OPTIMIZATION_POLL_MS, self.poll_optimization)
+
+    def cancel_optimization(self):
+        if self.optimization_worker is not None:
+            self.optimization_worker.cancel()
+            self.optimization_status.config(text="Cancelling...")
+
+    def poll_optimization(self):
+        worker = self.optimization_worker
+        finished = False
+        coordinates = None
+        while True:
+            try:
+                message = worker.messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == 'progress':
+                _, energies, coordinates = message
+                for step, energy in energies:
+                    self.energy_steps.append(step)
+                    self.energies.append(energy)
+            elif message[0] == 'done':
+                finished = True
+                self.finish_optimization(message[1], message[2])
+            else:
+                finished = True
+                self.optimization_status.config(text=f"Optimization failed: {message[1]}")
+
+        still_shown = self.visualizer_app.geometry is self.optimized_geometry
+        if coordinates is not None and still_shown and not finished:
+            self.visualizer_app.scene.update_coordinates(coordinates)
+            self.visualizer_app.canvas.draw_idle()
+        if self.energies:
+            self.energy_line.set_data(self.energy_steps, self.energies)
+            self.energy_ax.relim()
+            self.energy_ax.autoscale_view()
+            self.energy_canvas.draw_idle()
+            if not finished:
+                self.optimization_status.config(text=f"Step {self.energy_steps[-1]}, Energy: {self.energies[-1]:.6g}")
+
+        if finished:
+            self.optimize_button.config(state=tk.NORMAL)
+            self.cancel_button.config(state=tk.DISABLED)
+        else:
+            self.root.after(OPTIMIZATION_POLL_MS, self.poll_optimization)
+
+    def finish_optimization(self, result, optimized_geometry):
+        state = ("Converged" if result.converged else "Stalled" if result.stalled
+                 else "Cancelled" if self.optimization_worker.cancelled else "Stopped")
+        self.optimization_status.config(text=f"{state} after {result.steps} steps, Energy: {result.energy:.6g}")
+        if self.visualizer_app.geometry is not self.optimized_geometry:
+            return
         self.visualizer_app.geometry = optimized_geometry
-        self.visualizer_app.ax.clear()
-        self.visualizer_app.visualize_with_bonds(self.visualizer_app.geometry)
-        self.visualizer_app.canvas.draw()
+        self.visualizer_app.visualize_with_bonds(self.visualizer_app.geometry, self.visualizer_app.bonds)
+        self.visualizer_app.canvas.draw_idle()
+        if self.optimization_worker.trajectory is not None:
+            self.visualizer_app.trajectory_controls.set_trajectory(self.optimization_worker.trajectory, -1)
@@ -0,0 +1,316 @@
+import csv
+import json
+import queue
+import threading
+import numpy as np
+from Element_infos import element_info
+from bonds import angle_triplets, dihedral_quadruplets, perceive_bonds
+from geometry import Geometry, as_geometry
+from instrumentation import timed
+from periodic import minimum_image
+
+# Every function takes coordinates shaped (N, 3) or (frames, N, 3) and returns one value per frame. With a
+# lattice, internal coordinates use minimum-image vectors.
+
+# Trajectory frames converted to float64 and analysed per batched step, so memory-mapped trajectories are
+# never read into memory as a whole.
+ANALYSIS_CHUNK_FRAMES = 256
+
+
+def distances(coordinates, pairs, lattice=None):
+    """Distances between the (P, 2) atom index pairs; shape (..., P)."""
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    vectors = minimum_image(coordinates[..., pairs[:, 1], :] - coordinates[..., pairs[:, 0], :], lattice)
+    return np.linalg.norm(vectors, axis=-1)
+
+
+def angles(coordinates, triplets, lattice=None):
+    """Angles in degrees at the middle atom of each (A, 3) triplet; shape (..., A)."""
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    triplets = np.asarray(triplets, dtype=np.int64).reshape(-1, 3)
+    first = minimum_image(coordinates[..., triplets[:, 0], :] - coordinates[..., triplets[:, 1], :], lattice)
+    second = minimum_image(coordinates[..., triplets[:, 2], :] - coordinates[..., triplets[:, 1], :], lattice)
+    cosines = np.sum(first * second, axis=-1) / (np.linalg.norm(first, axis=-1) * np.linalg.norm(second, axis=-1))
+    return np.degrees(np.arccos(np.clip(cosines, -1.0, 1.0)))
+
+
+def dihedrals(coordinates, quadruplets, lattice=None):
+    """Signed torsion angles in degrees (-180, 180] of each (D, 4) chain i-j-k-l; shape (..., D)."""
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    quadruplets = np.asarray(quadruplets, dtype=np.int64).reshape(-1, 4)
+    points = [coordinates[..., quadruplets[:, n], :] for n in range(4)]
+    b1, b2, b3 = (minimum_image(points[n + 1] - points[n], lattice) for n in range(3))
+    n1, n2 = np.cross(b1, b2), np.cross(b2, b3)
+    y = np.linalg.norm(b2, axis=-1) * np.sum(b1 * n2, axis=-1)
+    x = np.sum(n1 * n2, axis=-1)
+    return np.degrees(np.arctan2(y, x))
+
+
+def centroid(coordinates):
+    return np.asarray(coordinates, dtype=np.float64).mean(axis=-2)
+
+
+def center_of_mass(coordinates, masses):
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    masses = np.asarray(masses, dtype=np.float64)
+    return np.einsum('n,...ni->...i', masses, coordinates) / masses.sum()
+
+
+def inertia_tensor(coordinates, masses):
+    """Moment of inertia tensor about the center of mass, in mass * length**2; shape (..., 3, 3)."""
+    masses = np.asarray(masses, dtype=np.float64)
+    relative = np.asarray(coordinates, dtype=np.float64) - center_of_mass(coordinates, masses)[..., None, :]
+    second_moments = np.einsum('n,...ni,...nj->...ij', masses, relative, relative)
+    trace = np.trace(second_moments, axis1=-2, axis2=-1)
+    return trace[..., None, None] * np.eye(3) - second_moments
+
+
+def principal_moments(coordinates, masses):
+    """Eigenvalues of the inertia tensor in ascending order; shape (..., 3)."""
+    return np.linalg.eigvalsh(inertia_tensor(coordinates, masses))
+
+
+def kabsch_rotation(coordinates, reference, weights=None):
+    """Rotation matrices R minimizing the (weighted) distance of centered `coordinates @ R.T` to centered `reference`."""
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+    weights = np.ones(coordinates.shape[-2]) if weights is None else np.asarray(weights, dtype=np.float64)
+    mobile = coordinates - center_of_mass(coordinates, weights)[..., None, :]
+    target = reference - center_of_mass(reference, weights)[..., None, :]
+    covariance = np.einsum('n,...ni,...nj->...ij', weights, mobile, target)
+    u, _, vt = np.linalg.svd(covariance)
+    v = np.swapaxes(vt, -2, -1)
+    # Flip the last axis where needed so R is a proper rotation, not a reflection.
+    sign = np.sign(np.linalg.det(v @ np.swapaxes(u, -2, -1)))
+    sign = np.where(sign == 0, 1.0, sign)
+    v[..., :, 2] *= sign[..., None]
+    return v @ np.swapaxes(u, -2, -1)
+
+
+def align(coordinates, reference, weights=None):
+    """Rotate and translate `coordinates` onto `reference` (Kabsch); broadcasts over frames."""
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+    weights = np.ones(coordinates.shape[-2]) if weights is None else np.asarray(weights, dtype=np.float64)
+    rotation = kabsch_rotation(coordinates, reference, weights)
+    mobile = coordinates - center_of_mass(coordinates, weights)[..., None, :]
+    return mobile @ np.swapaxes(rotation, -2, -1) + center_of_mass(reference, weights)[..., None, :]
+
+
+def rmsd(coordinates, reference, weights=None, superpose=True):
+    """Root-mean-square deviation from `reference`, after optimal superposition unless `superpose` is False."""
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+    weights = np.ones(coordinates.shape[-2]) if weights is None else np.asarray(weights, dtype=np.float64)
+    if superpose:
+        coordinates = align(coordinates, reference, weights)
+    squared = np.sum((coordinates - reference) ** 2, axis=-1)
+    return np.sqrt(np.einsum('n,...n->...', weights, squared) / weights.sum())
+
+
+def atom_labels(geometry):
+    """Labels like 'C1', 'H2' with one-based atom numbers."""
+    return [f"{symbol}{index + 1}" for index, symbol in enumerate(geometry.symbols)]
+
+
+class GeometryReport:
+    """Every bond length, bond angle and dihedral of a geometry plus its mass properties.
+
+    Lengths are in the geometry's unit, angles in degrees and masses in atomic mass units.
+    """
+
+    @timed('analysis.geometry_report')
+    def __init__(self, geometry, bonds=None):
+        self.geometry = as_geometry(geometry)
+        self.bonds = bonds if bonds is not None else perceive_bonds(self.geometry)
+        atom_count = len(self.geometry)
+        coordinates = self.geometry.coordinates
+        masses = element_info.get_masses(self.geometry.atomic_numbers)
+
+        self.bond_atoms = self.bonds.pairs
+        self.angle_atoms = angle_triplets(atom_count, self.bonds)
+        self.dihedral_atoms = dihedral_quadruplets(atom_count, self.bonds)
+        lattice = self.geometry.lattice
+        self.bond_lengths = distances(coordinates, self.bond_atoms, lattice)
+        self.bond_angles = angles(coordinates, self.angle_atoms, lattice)
+        self.dihedral_angles = dihedrals(coordinates, self.dihedral_atoms, lattice)
+        self.centroid = centroid(coordinates)
+        self.center_of_mass = center_of_mass(coordinates, masses)
+        self.inertia_tensor = inertia_tensor(coordinates, masses)
+        self.principal_moments = np.linalg.eigvalsh(self.inertia_tensor)
+
+    def rows(self):
+        """Yield (kind, atoms, indices, value, unit) for every internal coordinate."""
+        labels = atom_labels(self.geometry)
+        for kind, atoms, values, unit in (('bond', self.bond_atoms, self.bond_lengths, self.geometry.unit),
+                                          ('angle', self.angle_atoms, self.bond_angles, 'degree'),
+                                          ('dihedral', self.dihedral_atoms, self.dihedral_angles, 'degree')):
+            for indices, value in zip(atoms.tolist(), values.tolist()):
+                yield kind, "-".join(labels[index] for index in indices), indices, value, unit
+
+    def to_dict(self):
+        return {
+            'unit': self.geometry.unit,
+            'atoms': len(self.geometry),
+            'lattice': None if self.geometry.lattice is None else self.geometry.lattice.tolist(),
+            'centroid': self.centroid.tolist(),
+            'center_of_mass': self.center_of_mass.tolist(),
+            'inertia_tensor': self.inertia_tensor.tolist(),
+            'principal_moments': self.principal_moments.tolist(),
+            'bonds': {'atoms': self.bond_atoms.tolist(), 'lengths': self.bond_lengths.tolist(),
+                      'orders': self.bonds.order.tolist()},
+            'angles': {'atoms': self.angle_atoms.tolist(), 'degrees': self.bond_angles.tolist()},
+            'dihedrals': {'atoms': self.dihedral_atoms.tolist(), 'degrees': self.dihedral_angles.tolist()},
+        }
+
+    def save_json(self, file_path):
+        with open(file_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    def save_csv(self, file_path):
+        """Write one row per bond, angle and dihedral."""
+        with open(file_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('kind', 'atoms', 'indices', 'value', 'unit'))
+            for kind, atoms, indices, value, unit in self.rows():
+                writer.writerow((kind, atoms, " ".join(map(str, indices)), f"{value:.6f}", unit))
+
+    def format_summary(self, limit=50):
+        """Readable summary listing at most `limit` entries of each kind."""
+        unit = self.geometry.unit
+        lines = [f"{len(self.geometry)} atoms, {len(self.bond_atoms)} bonds, {len(self.angle_atoms)} angles, "
+                 f"{len(self.dihedral_atoms)} dihedrals",
+                 f"Centroid:          {_format_vector(self.centroid)} {unit}",
+                 f"Center of mass:    {_format_vector(self.center_of_mass)} {unit}",
+                 f"Principal moments: {_format_vector(self.principal_moments)} amu {unit}^2"]
+        shown = {}
+        for kind, atoms, _, value, row_unit in self.rows():
+            shown[kind] = shown.get(kind, 0) + 1
+            if shown[kind] == 1:
+                lines.append("")
+            if shown[kind] <= limit:
+                lines.append(f"{kind:<9} {atoms:<24} {value:>12.4f} {row_unit}")
+        for kind, total in shown.items():
+            if total > limit:
+                lines.append(f"... {total - limit} more {kind}s in the exported tables")
+        return "\n".join(lines)
+
+
+class AnalysisCancelled(Exception):
+    pass
+
+
+class TrajectoryReport:
+    """Internal coordinates, centers and RMSD for every frame of a (frames, N, 3) array.
+
+    Frames are processed `chunk_frames` at a time in batched calls, so `frames` may be a memory map. `progress` is
+    called with (frames done, total frames) after each chunk; returning True stops with AnalysisCancelled.
+    """
+
+    @timed('analysis.trajectory_report')
+    def __init__(self, frames, atomic_numbers, unit='angstrom', bonds=None, reference_frame=0, lattice=None,
+                 chunk_frames=ANALYSIS_CHUNK_FRAMES, progress=None):
+        reference_coordinates = np.array(frames[reference_frame], dtype=np.float64)
+        reference = Geometry(atomic_numbers, reference_coordinates, unit, lattice)
+        self.geometry = reference
+        self.bonds = bonds if bonds is not None else perceive_bonds(reference)
+        masses = element_info.get_masses(reference.atomic_numbers)
+
+        self.bond_atoms = self.bonds.pairs
+        self.angle_atoms = angle_triplets(len(reference), self.bonds)
+        self.dihedral_atoms = dihedral_quadruplets(len(reference), self.bonds)
+        frame_count = len(frames)
+        self.bond_lengths = np.empty((frame_count, len(self.bond_atoms)))
+        self.bond_angles = np.empty((frame_count, len(self.angle_atoms)))
+        self.dihedral_angles = np.empty((frame_count, len(self.dihedral_atoms)))
+        self.centroids = np.empty((frame_count, 3))
+        self.centers_of_mass = np.empty((frame_count, 3))
+        self.rmsd = np.empty(frame_count)
+        for start in range(0, frame_count, chunk_frames):
+            stop = min(start + chunk_frames, frame_count)
+            chunk = np.asarray(frames[start:stop], dtype=np.float64)
+            self.bond_lengths[start:stop] = distances(chunk, self.bond_atoms, lattice)
+            self.bond_angles[start:stop] = angles(chunk, self.angle_atoms, lattice)
+            self.dihedral_angles[start:stop] = dihedrals(chunk, self.dihedral_atoms, lattice)
+            self.centroids[start:stop] = centroid(chunk)
+            self.centers_of_mass[start:stop] = center_of_mass(chunk, masses)
+            self.rmsd[start:stop] = rmsd(chunk, reference_coordinates)
+            if progress is not None and progress(stop, frame_count):
+                raise AnalysisCancelled()
+
+    def __len__(self):
+        return len(self.rmsd)
+
+    def to_dict(self):
+        return {
+            'unit': self.geometry.unit,
+            'frames': len(self),
+            'rmsd': self.rmsd.tolist(),
+            'centroids': self.centroids.tolist(),
+            'centers_of_mass': self.centers_of_mass.tolist(),
+            'bonds': {'atoms': self.bond_atoms.tolist(), 'lengths': self.bond_lengths.tolist()},
+            'angles': {'atoms': self.angle_atoms.tolist(), 'degrees': self.bond_angles.tolist()},
+            'dihedrals': {'atoms': self.dihedral_atoms.tolist(), 'degrees': self.dihedral_angles.tolist()},
+        }
+
+    def save_json(self, file_path):
+        with open(file_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    def save_csv(self, file_path):
+        """Write one row per frame: RMSD, center of mass and one column per bond, angle and dihedral."""
+        labels = atom_labels(self.geometry)
+        columns = ['frame', 'rmsd', 'com_x', 'com_y', 'com_z']
+        for atoms in (self.bond_atoms, self.angle_atoms, self.dihedral_atoms):
+            columns.extend("-".join(labels[index] for index in indices) for indices in atoms.tolist())
+        table = np.column_stack((np.arange(len(self)), self.rmsd, self.centers_of_mass,
+                                 self.bond_lengths, self.bond_angles, self.dihedral_angles))
+        with open(file_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for frame, row in enumerate(table.tolist()):
+                writer.writerow([frame] + [f"{value:.6f}" for value in row[1:]])
+
+
+class TrajectoryAnalysisWorker:
+    """Builds a TrajectoryReport in a background thread and streams progress through a queue.
+
+    Messages are ('progress', fraction), then one of ('done', report), ('cancelled',) or ('error', exception).
+    """
+
+    def __init__(self, trajectory, bonds=None):
+        self.trajectory = trajectory
+        self.bonds = bonds
+        self.messages = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        trajectory = self.trajectory
+        try:
+            report = TrajectoryReport(trajectory.frames, trajectory.atomic_numbers, trajectory.unit, self.bonds,
+                                      lattice=trajectory.lattice, progress=self._report)
+            self.messages.put(('done', report))
+        except AnalysisCancelled:
+            self.messages.put(('cancelled',))
+        except Exception as e:
+            self.messages.put(('error', e))
+
+    def _report(self, done, total):
+        self.messages.put(('progress', done / total))
+        return self._cancel_event.is_set()
+
+
+def _format_vector(vector):
+    return " ".join(f"{value:10.4f}" for value in vector)
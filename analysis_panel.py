@@ -0,0 +1,93 @@
+import queue
+import tkinter as tk
+from tkinter import ttk, filedialog
+from analysis import GeometryReport, TrajectoryAnalysisWorker
+from geometry import as_geometry
+
+ANALYSIS_POLL_MS = 50
+
+class AnalysisPanel:
+    """A window with the bond, angle and dihedral tables of the displayed geometry and CSV/JSON export.
+
+    The per-frame report of a trajectory is built in a background thread and added to the window when it is done.
+    """
+
+    def __init__(self, root, geometry, bonds=None, trajectory=None):
+        self.report = GeometryReport(as_geometry(geometry), bonds)
+        self.trajectory_report = None
+        self.trajectory_worker = None
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Geometry Analysis")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.text = tk.Text(self.window, height=30, width=72, font=("Courier", 10))
+        self.text.grid(row=0, column=0, columnspan=3, padx=5, pady=5)
+        self.status = ttk.Label(self.window, text="")
+        self.status.grid(row=1, column=0, columnspan=3)
+        ttk.Button(self.window, text="Export CSV", command=lambda: self.export('csv')).grid(row=2, column=0, pady=5)
+        ttk.Button(self.window, text="Export JSON", command=lambda: self.export('json')).grid(row=2, column=1, pady=5)
+        ttk.Button(self.window, text="Close", command=self.close).grid(row=2, column=2, pady=5)
+        self.show_summary()
+
+        if trajectory is not None and len(trajectory) > 1:
+            self.trajectory_worker = TrajectoryAnalysisWorker(trajectory, self.report.bonds).start()
+            self.status.config(text="Analyzing trajectory...")
+            self.window.after(ANALYSIS_POLL_MS, self.poll_trajectory_analysis)
+
+    def show_summary(self):
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, self.format_summary())
+
+    def poll_trajectory_analysis(self):
+        worker = self.trajectory_worker
+        if worker is None:  # The window was closed
+            return
+        while True:
+            try:
+                message = worker.messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == 'progress':
+                self.status.config(text=f"Analyzing trajectory... {message[1]:.0%}")
+            elif message[0] == 'done':
+                self.trajectory_report = message[1]
+                self.status.config(text="")
+                self.show_summary()
+                return
+            elif message[0] == 'cancelled':
+                return
+            else:
+                self.status.config(text=f"Trajectory analysis failed: {message[1]}")
+                return
+        self.window.after(ANALYSIS_POLL_MS, self.poll_trajectory_analysis)
+
+    def close(self):
+        if self.trajectory_worker is not None:
+            self.trajectory_worker.cancel()
+            self.trajectory_worker = None
+        self.window.destroy()
+
+    def format_summary(self):
+        summary = self.report.format_summary()
+        if self.trajectory_report is not None:
+            rmsd = self.trajectory_report.rmsd
+            summary = (f"Trajectory: {len(rmsd)} frames, RMSD to frame 0: max {rmsd.max():.4f}, "
+                       f"final {rmsd[-1]:.4f} {self.trajectory_report.geometry.unit}\n\n{summary}")
+        return summary
+
+    def export(self, fmt):
+        """Save the geometry tables, plus a per-frame table next to them once the trajectory report is ready."""
+        file_path = filedialog.asksaveasfilename(defaultextension=f".{fmt}",
+                                                 filetypes=[(fmt.upper(), f"*.{fmt}"), ("All Files", "*.*")])
+        if not file_path:
+            return
+        reports = [(self.report, file_path)]
+        if self.trajectory_report is not None:
+            stem, _, extension = file_path.rpartition('.')
+            reports.append((self.trajectory_report, f"{stem}_trajectory.{extension}"))
+        for report, path in reports:
+            if fmt == 'csv':
+                report.save_csv(path)
+            else:
+                report.save_json(path)
+            print(f"Analysis saved to {path}")
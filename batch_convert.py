@@ -0,0 +1,128 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from Reader_and_convertor import BINARY_FORMAT, GeometryReaderAndConverter, WRITE_BUFFER_BYTES
+from binary_format import BINARY_EXTENSION
+from instrumentation import configure_from_environment
+
+OUTPUT_EXTENSIONS = {'xyz': '.xyz', 'gamess': '.inp', BINARY_FORMAT: BINARY_EXTENSION}
+DEFAULT_INPUT_EXTENSIONS = ('.xyz', '.inp', '.gamess', '.txt', BINARY_EXTENSION)
+
+_reader_converter = None
+
+
+def collect_input_files(patterns, extensions=DEFAULT_INPUT_EXTENSIONS):
+    """Expand directories and glob patterns into (input path, output relative path) pairs."""
+    jobs = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for directory, _, file_names in os.walk(pattern):
+                for file_name in sorted(file_names):
+                    if os.path.splitext(file_name)[1].lower() in extensions:
+                        path = os.path.join(directory, file_name)
+                        jobs.append((path, os.path.relpath(path, pattern)))
+        else:
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if os.path.isfile(path):
+                    jobs.append((path, os.path.basename(path)))
+    return jobs
+
+
+def _convert_file(job):
+    global _reader_converter
+    if _reader_converter is None:
+        _reader_converter = GeometryReaderAndConverter()
+    input_path, output_path, input_unit, output_format, output_unit = job
+    try:
+        geometry = _reader_converter.read_geometry(input_path, input_unit)
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        mode = 'wb' if output_format == BINARY_FORMAT else 'w'
+        with open(output_path, mode, buffering=WRITE_BUFFER_BYTES) as f:
+            _reader_converter.write_geometry(geometry, output_format, f, output_unit)
+        return input_path, len(geometry), None
+    except Exception as e:
+        return input_path, 0, f"{type(e).__name__}: {e}"
+
+
+def convert_files(input_files, output_dir, output_format, input_unit='bohr', output_unit='angstrom',
+                  workers=None, chunk_size=16):
+    """Convert (input path, output relative path) pairs in a process pool and return a summary dict."""
+    if output_format.lower() not in OUTPUT_EXTENSIONS:
+        raise ValueError(f"Unsupported target format: {output_format}")
+    extension = OUTPUT_EXTENSIONS[output_format.lower()]
+    jobs = [(input_path, os.path.join(output_dir, os.path.splitext(relative_path)[0] + extension),
+             input_unit, output_format, output_unit)
+            for input_path, relative_path in input_files]
+
+    start = time.perf_counter()
+    errors = []
+    converted = 0
+    atoms = 0
+    executor = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    try:
+        if executor is None:
+            results = map(_convert_file, jobs)
+        else:
+            results = executor.map(_convert_file, jobs, chunksize=chunk_size)
+        for input_path, atom_count, error in results:
+            converted, atoms = _record(errors, converted, atoms, input_path, atom_count, error)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "files": len(jobs),
+        "converted": converted,
+        "failed": len(errors),
+        "errors": errors,
+        "atoms": atoms,
+        "seconds": elapsed,
+        "files_per_second": converted / elapsed if elapsed > 0 else 0.0,
+        "atoms_per_second": atoms / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _record(errors, converted, atoms, input_path, atom_count, error):
+    if error is not None:
+        errors.append((input_path, error))
+        print(f"Failed to convert {input_path}: {error}", file=sys.stderr)
+        return converted, atoms
+    return converted + 1, atoms + atom_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert many XYZ/GAMESS geometry files in parallel.")
+    parser.add_argument("inputs", nargs="+", help="Input files, glob patterns or directories")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for the converted files")
+    parser.add_argument("-f", "--format", default="xyz", choices=sorted(OUTPUT_EXTENSIONS), help="Output format")
+    parser.add_argument("--input-unit", default="bohr", choices=["angstrom", "bohr"])
+    parser.add_argument("--output-unit", default="angstrom", choices=["angstrom", "bohr"])
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Files handed to a worker at a time")
+    parser.add_argument("--summary", help="Also write the summary and per-file errors to this JSON file")
+    args = parser.parse_args(argv)
+
+    input_files = collect_input_files(args.inputs)
+    if not input_files:
+        print("No input files found.", file=sys.stderr)
+        return 1
+
+    summary = convert_files(input_files, args.output_dir, args.format, args.input_unit, args.output_unit,
+                            args.workers, args.chunk_size)
+    print(f"Converted {summary['converted']}/{summary['files']} files ({summary['atoms']} atoms) "
+          f"in {summary['seconds']:.2f} s: {summary['files_per_second']:.1f} files/s, "
+          f"{summary['atoms_per_second']:.0f} atoms/s, {summary['failed']} failed.")
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    configure_from_environment()
+    sys.exit(main())
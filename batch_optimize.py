@@ -0,0 +1,166 @@
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from Reader_and_convertor import GeometryReaderAndConverter, WRITE_BUFFER_BYTES
+from batch_convert import DEFAULT_INPUT_EXTENSIONS, collect_input_files
+from geometry import Geometry
+from instrumentation import configure_from_environment
+from minimizers import MINIMIZERS
+from optimization import GeometryOptimizer
+
+SUMMARY_FIELDS = ('index', 'name', 'atoms', 'initial_energy', 'energy', 'steps', 'converged', 'status', 'seconds',
+                  'error')
+# Jobs submitted to the pool per worker process at any time, so structures are read only as workers free up.
+JOBS_IN_FLIGHT_PER_WORKER = 2
+
+
+class _TimeLimit:
+    """Optimizer callback that stops the run once `seconds` of wall time have passed."""
+
+    def __init__(self, seconds):
+        self.deadline = time.perf_counter() + seconds if seconds else None
+        self.reached = False
+
+    def __call__(self, step, coordinates, energy, gradient):
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            self.reached = True
+        return self.reached
+
+
+def load_structures(patterns, input_unit='bohr', extensions=DEFAULT_INPUT_EXTENSIONS):
+    """Yield (name, geometry) for every frame of every matching file; multi-frame files give one entry per conformer."""
+    reader_converter = GeometryReaderAndConverter()
+    for input_path, relative_path in collect_input_files(patterns, extensions):
+        try:
+            frames = reader_converter.read_frames(input_path, input_unit)
+            first, second = next(frames, None), next(frames, None)
+            if second is None:
+                if first is not None:
+                    yield relative_path, first
+                continue
+            for frame, geometry in enumerate(itertools.chain([first, second], frames)):
+                yield f"{relative_path}#{frame}", geometry
+        except (OSError, ValueError) as e:
+            print(f"Failed to read {input_path}: {type(e).__name__}: {e}", file=sys.stderr)
+
+
+def _optimize_job(job):
+    index, name, atomic_numbers, coordinates, unit, lattice, method, max_steps, time_limit = job
+    start = time.perf_counter()
+    record = {'index': index, 'name': name, 'atoms': len(atomic_numbers), 'initial_energy': None, 'energy': None,
+              'steps': 0, 'converged': False, 'status': 'error', 'seconds': 0.0, 'error': None,
+              'atomic_numbers': atomic_numbers, 'coordinates': None, 'unit': unit, 'lattice': lattice}
+    try:
+        optimizer = GeometryOptimizer(Geometry(atomic_numbers, coordinates, unit, lattice))
+        record['initial_energy'] = optimizer.calculate_energy()
+        limit = _TimeLimit(time_limit)
+        optimizer.optimize(method=method, max_steps=max_steps, callback=limit)
+        result = optimizer.result
+        if result.converged:
+            status = 'converged'
+        elif result.stalled:
+            status = 'stalled'
+        else:
+            status = 'time_limit' if limit.reached else 'max_steps'
+        record.update(energy=result.energy, steps=result.steps, converged=result.converged,
+                      coordinates=optimizer.geometry.coordinates, status=status)
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['seconds'] = time.perf_counter() - start
+    return record
+
+
+def optimize_structures(structures, method='lbfgs', max_steps=1000, time_limit=None, workers=None):
+    """Optimize (name, geometry) pairs in a process pool and yield one result dict per structure as it finishes.
+
+    Each dict has the SUMMARY_FIELDS, whose 'index' is the input position, plus the optimized 'coordinates' (None
+    on error), 'atomic_numbers', 'unit' and 'lattice'. `structures` is consumed lazily: at most
+    JOBS_IN_FLIGHT_PER_WORKER jobs per worker are submitted at a time.
+    """
+    jobs = ((index, name, geometry.atomic_numbers, geometry.coordinates, geometry.unit, geometry.lattice, method,
+             max_steps, time_limit) for index, (name, geometry) in enumerate(structures))
+    if workers == 1:
+        yield from map(_optimize_job, jobs)
+        return
+    in_flight_limit = JOBS_IN_FLIGHT_PER_WORKER * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for job in jobs:
+            in_flight.add(executor.submit(_optimize_job, job))
+            if len(in_flight) >= in_flight_limit:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def format_summary(records):
+    lines = [f"{'#':>4}  {'Name':<30}{'Atoms':>7}{'Initial E':>14}{'Final E':>14}{'Steps':>7}  {'Status':<11}{'Time s':>8}"]
+    for record in records:
+        if record['error'] is not None:
+            lines.append(f"{record['index']:>4}  {record['name']:<30}{record['atoms']:>7}  {record['error']}")
+            continue
+        lines.append(f"{record['index']:>4}  {record['name']:<30}{record['atoms']:>7}{record['initial_energy']:>14.6g}"
+                     f"{record['energy']:>14.6g}{record['steps']:>7}  {record['status']:<11}{record['seconds']:>8.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optimize many structures or conformers in parallel.")
+    parser.add_argument("inputs", nargs="+", help="Input files, glob patterns or directories; "
+                                                  "every frame of a multi-frame file is a separate job")
+    parser.add_argument("-o", "--output", required=True, help="Multi-frame XYZ file receiving the optimized structures")
+    parser.add_argument("-m", "--method", default="lbfgs", choices=sorted(MINIMIZERS))
+    parser.add_argument("--max-steps", type=int, default=1000, help="Step limit per structure")
+    parser.add_argument("--time-limit", type=float, default=None, help="Wall-time limit per structure in seconds")
+    parser.add_argument("--input-unit", default="bohr", choices=["angstrom", "bohr"])
+    parser.add_argument("--output-unit", default="angstrom", choices=["angstrom", "bohr"])
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--summary", help="Write the per-structure results table as CSV")
+    args = parser.parse_args(argv)
+
+    structures = load_structures(args.inputs, args.input_unit)
+    reader_converter = GeometryReaderAndConverter()
+    records = []
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', buffering=WRITE_BUFFER_BYTES) as f:
+        for record in optimize_structures(structures, args.method, args.max_steps, args.time_limit, args.workers):
+            if record['error'] is not None:
+                print(f"Failed to optimize {record['name']}: {record['error']}", file=sys.stderr)
+            else:
+                geometry = Geometry(record['atomic_numbers'], record['coordinates'], record['unit'], record['lattice'])
+                comment = (f"{record['name']} energy={record['energy']:.10g} steps={record['steps']} "
+                           f"status={record['status']}")
+                reader_converter.write_geometry(geometry, 'xyz', f, args.output_unit, comment=comment)
+                f.flush()
+            del record['atomic_numbers'], record['coordinates'], record['unit'], record['lattice']
+            records.append(record)
+
+    if not records:
+        print("No input structures found.", file=sys.stderr)
+        return 1
+    records.sort(key=lambda record: record['index'])
+    print(format_summary(records))
+    failed = sum(record['error'] is not None for record in records)
+    converged = sum(record['converged'] for record in records)
+    print(f"Optimized {len(records) - failed}/{len(records)} structures ({converged} converged) "
+          f"in {time.perf_counter() - start:.2f} s; results in {args.output}")
+    if args.summary:
+        with open(args.summary, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    configure_from_environment()
+    sys.exit(main())
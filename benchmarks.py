@@ -0,0 +1,281 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from Reader_and_convertor import GeometryReaderAndConverter
+from bonds import perceive_bonds
+from geometry import Geometry
+from optimization import GeometryOptimizer
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000, 1000000)
+# Spacing of the synthetic cluster lattice and zigzag chain (angstrom); both bond only nearest neighbors.
+CLUSTER_SPACING = 1.5
+CHAIN_BOND_LENGTH = 1.54
+CLUSTER_ELEMENTS = np.array([6, 6, 7, 8, 6, 1], dtype=np.int16)
+TRAJECTORY_FRAMES = 10
+# Slopes are fitted on sizes at or above this, where fixed per-call overhead no longer dominates.
+SCALING_MIN_ATOMS = 1000
+DEFAULT_TOLERANCE = 0.25
+# Entry points whose import time is measured in a fresh interpreter, and the heavy packages none of them should load.
+STARTUP_MODULES = ('Reader_and_convertor', 'batch_convert', 'batch_optimize', 'Visualizer', 'headless_renderer', 'main')
+GUI_PACKAGES = ('matplotlib', 'tkinter')
+
+
+def make_cluster(atom_count, seed=0):
+    """A jittered simple-cubic cluster of C/N/O/H atoms, roughly cube shaped."""
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(atom_count ** (1 / 3)))
+    grid = np.indices((side, side, side)).reshape(3, -1).T[:atom_count]
+    coordinates = grid * CLUSTER_SPACING + rng.uniform(-0.05, 0.05, (atom_count, 3))
+    atomic_numbers = CLUSTER_ELEMENTS[rng.integers(0, len(CLUSTER_ELEMENTS), atom_count)]
+    return Geometry(atomic_numbers, coordinates, 'angstrom')
+
+
+def make_chain(atom_count):
+    """A planar zigzag carbon chain, the elongated counterpart of `make_cluster`."""
+    index = np.arange(atom_count)
+    coordinates = np.zeros((atom_count, 3))
+    coordinates[:, 0] = index * CHAIN_BOND_LENGTH * np.sin(np.radians(109.5 / 2))
+    coordinates[:, 1] = (index % 2) * CHAIN_BOND_LENGTH * np.cos(np.radians(109.5 / 2))
+    return Geometry(np.full(atom_count, 6), coordinates, 'angstrom')
+
+
+SHAPES = {'cluster': make_cluster, 'chain': make_chain}
+
+
+def _write(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+    return path
+
+
+class Benchmark:
+    """One timed operation: `setup(geometry, workdir)` builds untimed state and `run(state)` is measured."""
+
+    def __init__(self, name, setup, run, max_atoms):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.max_atoms = max_atoms
+
+
+def _setup_read_xyz(geometry, workdir):
+    return _write(os.path.join(workdir, 'bench.xyz'), _reader_converter.convert_to_format(geometry, 'xyz'))
+
+
+def _setup_read_gamess(geometry, workdir):
+    return _write(os.path.join(workdir, 'bench.inp'), _reader_converter.convert_to_format(geometry, 'gamess'))
+
+
+def _setup_read_frames(geometry, workdir):
+    path = os.path.join(workdir, 'frames.xyz')
+    _reader_converter.write_frames([geometry] * TRAJECTORY_FRAMES, path)
+    return path
+
+
+def _setup_optimizer(geometry, workdir):
+    return GeometryOptimizer(geometry.copy(), perceive_bonds(geometry))
+
+
+def _setup_optimize(geometry, workdir):
+    return geometry, perceive_bonds(geometry)
+
+
+def _run_optimize(state):
+    geometry, bonds = state
+    GeometryOptimizer(geometry.copy(), bonds).optimize(max_steps=20, callback=lambda *args: False)
+
+
+def _setup_render(geometry, workdir):
+    from headless_renderer import HeadlessRenderer
+    return HeadlessRenderer(), geometry, perceive_bonds(geometry), os.path.join(workdir, 'render')
+
+
+def _run_render(state):
+    renderer, geometry, bonds, output_stem = state
+    renderer.render(geometry, output_stem, bonds)
+
+
+_reader_converter = GeometryReaderAndConverter()
+
+BENCHMARKS = [
+    Benchmark('read_xyz', _setup_read_xyz, lambda path: _reader_converter.read_geometry(path, 'angstrom'), 10 ** 6),
+    Benchmark('read_gamess', _setup_read_gamess, lambda path: _reader_converter.read_geometry(path, 'bohr'), 10 ** 6),
+    Benchmark('read_frames', _setup_read_frames, lambda path: sum(1 for _ in _reader_converter.read_frames(path)),
+              10 ** 5),
+    Benchmark('convert_xyz', lambda geometry, workdir: geometry,
+              lambda geometry: _reader_converter.convert_to_format(geometry, 'xyz'), 10 ** 6),
+    Benchmark('convert_gamess', lambda geometry, workdir: geometry,
+              lambda geometry: _reader_converter.convert_to_format(geometry, 'gamess'), 10 ** 6),
+    Benchmark('perceive_bonds', lambda geometry, workdir: geometry, perceive_bonds, 10 ** 6),
+    Benchmark('calculate_forces', _setup_optimizer, lambda optimizer: optimizer.calculate_forces(), 10 ** 5),
+    Benchmark('optimize_20_steps', _setup_optimize, _run_optimize, 10 ** 5),
+    Benchmark('render', _setup_render, _run_render, 10 ** 5),
+]
+
+
+def time_call(function, state, repeat):
+    """Best wall time of `repeat` calls, then the peak traced allocation of one more call."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function(state)
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def scaling_exponent(points):
+    """Slope of log(seconds) against log(atoms), i.e. t ~ N**slope; None with fewer than two sizes."""
+    fitted = [(atoms, seconds) for atoms, seconds in points if atoms >= SCALING_MIN_ATOMS and seconds > 0]
+    if len(fitted) < 2:
+        fitted = [(atoms, seconds) for atoms, seconds in points if seconds > 0]
+    if len(fitted) < 2:
+        return None
+    atoms, seconds = np.log(np.array(fitted)).T
+    return float(np.polyfit(atoms, seconds, 1)[0])
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, names=None, shape='cluster', repeat=3, verbose=True):
+    """Run the selected benchmarks at every size up to their limit and return the report dict."""
+    benchmarks = [benchmark for benchmark in BENCHMARKS if names is None or benchmark.name in names]
+    results = {benchmark.name: [] for benchmark in benchmarks}
+    workdir = tempfile.mkdtemp(prefix='benchmarks_')
+    try:
+        for atom_count in sizes:
+            geometry = SHAPES[shape](atom_count)
+            for benchmark in benchmarks:
+                if atom_count > benchmark.max_atoms:
+                    continue
+                state = benchmark.setup(geometry, workdir)
+                seconds, peak = time_call(benchmark.run, state, repeat)
+                results[benchmark.name].append({'atoms': atom_count, 'seconds': seconds, 'peak_bytes': peak})
+                if verbose:
+                    print(f"{benchmark.name:<20} {atom_count:>9} atoms {seconds * 1000:>12.3f} ms "
+                          f"{peak / 2 ** 20:>10.1f} MiB")
+                del state
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'metadata': {
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'shape': shape,
+            'repeat': repeat,
+        },
+        'results': results,
+        'scaling': {name: scaling_exponent([(entry['atoms'], entry['seconds']) for entry in entries])
+                    for name, entries in results.items()},
+    }
+
+
+def _interpreter_seconds(code, repeat):
+    directory = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', code], cwd=directory, capture_output=True, text=True,
+                                check=True).stdout
+        times.append(time.perf_counter() - start)
+    return min(times), output.split()
+
+
+def measure_startup(modules=STARTUP_MODULES, repeat=5, verbose=True):
+    """Best wall time of a fresh interpreter importing each module, and which GUI packages the import loaded.
+
+    The bare interpreter start-up is reported under 'python' for reference.
+    """
+    seconds, _ = _interpreter_seconds('pass', repeat)
+    results = {'python': {'seconds': seconds, 'loaded': []}}
+    for module in modules:
+        code = f"import sys, {module}; print(*[name for name in {GUI_PACKAGES!r} if name in sys.modules])"
+        seconds, loaded = _interpreter_seconds(code, repeat)
+        results[module] = {'seconds': seconds, 'loaded': loaded}
+    if verbose:
+        for module, entry in results.items():
+            loaded = f"  loads {', '.join(entry['loaded'])}" if entry['loaded'] else ""
+            label = 'interpreter only' if module == 'python' else 'import ' + module
+            print(f"{label:<32} {entry['seconds'] * 1000:>9.1f} ms{loaded}")
+    return results
+
+
+def compare_reports(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return (name, atoms, baseline seconds, seconds, ratio) for every case slower than baseline by > tolerance.
+
+    Start-up entries are compared as 'import <module>' with no atom count.
+    """
+    regressions = []
+    for module, entry in report.get('startup', {}).items():
+        previous = baseline.get('startup', {}).get(module, {}).get('seconds')
+        if previous and entry['seconds'] / previous > 1 + tolerance:
+            regressions.append((f"import {module}", None, previous, entry['seconds'], entry['seconds'] / previous))
+    for name, entries in report['results'].items():
+        baseline_seconds = {entry['atoms']: entry['seconds'] for entry in baseline['results'].get(name, [])}
+        for entry in entries:
+            previous = baseline_seconds.get(entry['atoms'])
+            if previous:
+                ratio = entry['seconds'] / previous
+                if ratio > 1 + tolerance:
+                    regressions.append((name, entry['atoms'], previous, entry['seconds'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the parser, bond perception, optimizer and renderer.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Atom counts to run")
+    parser.add_argument("--benchmarks", nargs="+", choices=[benchmark.name for benchmark in BENCHMARKS],
+                        help="Subset of benchmarks (default: all)")
+    parser.add_argument("--shape", default="cluster", choices=sorted(SHAPES))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed calls per case; the fastest is reported")
+    parser.add_argument("-o", "--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Compare against a previously written JSON report")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown against the baseline before failing (0.25 = 25%%)")
+    parser.add_argument("--skip-startup", action="store_true", help="Do not measure module import times")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(sorted(args.sizes), args.benchmarks, args.shape, args.repeat)
+    if not args.skip_startup:
+        report['startup'] = measure_startup()
+    for name, exponent in report['scaling'].items():
+        if exponent is not None:
+            print(f"{name:<20} scales as N^{exponent:.2f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.tolerance)
+        for name, atoms, previous, seconds, ratio in regressions:
+            where = f" at {atoms} atoms" if atoms is not None else ""
+            print(f"Regression: {name}{where} {previous * 1000:.3f} ms -> {seconds * 1000:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import os
+import struct
+import numpy as np
+from Element_infos import ATOMIC_NUMBER_DTYPE
+from geometry import Geometry
+from bonds import Bonds
+
+# Layout: a 64-byte header, the int16 atomic numbers, an optional float64 (3, 3) lattice, optional bond
+# arrays (i, j, order, length) and finally the contiguous (frames, N, 3) coordinates, so frames can be
+# appended at the end of the file.
+# Every section starts on an 8-byte boundary; all values are little-endian.
+BINARY_EXTENSION = '.mvg'
+MAGIC = b'MOLVGEO\x00'
+FORMAT_VERSION = 2
+HEADER_SIZE = 64
+_HEADER = struct.Struct('<8sHHIQQQ')
+_FRAME_COUNT_OFFSET = 8 + 2 + 2 + 4 + 8
+
+FLAG_FLOAT64 = 1
+FLAG_BONDS = 2
+FLAG_LATTICE = 4
+UNIT_CODES = {'angstrom': 0, 'bohr': 1}
+UNITS = {code: unit for unit, code in UNIT_CODES.items()}
+
+
+def _aligned(offset):
+    return (offset + 7) // 8 * 8
+
+
+class _Layout:
+    """Byte offsets of every section, computed from the header fields."""
+
+    def __init__(self, atom_count, bond_count, has_bonds, coordinate_dtype, has_lattice=False):
+        self.atomic_numbers = HEADER_SIZE
+        offset = _aligned(self.atomic_numbers + 2 * atom_count)
+        if has_lattice:
+            self.lattice = offset
+            offset += 9 * 8
+        if has_bonds:
+            self.bond_i = offset
+            self.bond_j = _aligned(self.bond_i + 4 * bond_count)
+            self.bond_order = _aligned(self.bond_j + 4 * bond_count)
+            self.bond_length = _aligned(self.bond_order + bond_count)
+            offset = _aligned(self.bond_length + 8 * bond_count)
+        self.coordinates = offset
+        self.frame_bytes = 3 * atom_count * np.dtype(coordinate_dtype).itemsize
+
+
+class BinaryGeometry:
+    """Frames of one set of atoms read from a binary geometry file, memory-mapped when read from a path."""
+
+    def __init__(self, atomic_numbers, frames, unit, bonds=None, lattice=None):
+        self.atomic_numbers = atomic_numbers
+        self.frames = frames
+        self.unit = unit
+        self.bonds = bonds
+        self.lattice = lattice
+
+    def frame(self, index):
+        return self.frames[index]
+
+    def geometry(self, index=0):
+        """Return one frame as a Geometry; writable float64 frames share memory with the file mapping."""
+        coordinates = self.frames[index]
+        if not coordinates.flags.writeable:
+            coordinates = np.array(coordinates, dtype=np.float64)
+        return Geometry(self.atomic_numbers, coordinates, self.unit, self.lattice)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        for index in range(len(self.frames)):
+            yield self.geometry(index)
+
+
+def is_binary_geometry(source):
+    """True if `source` (a path or a bytes-like buffer) starts with the binary geometry magic."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:len(MAGIC)]) == MAGIC
+    try:
+        with open(source, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except (OSError, TypeError):
+        return False
+
+
+def write_binary(f, atomic_numbers, frames, unit='angstrom', bonds=None, dtype=np.float32, lattice=None):
+    """Write frames to the seekable binary handle `f`; `frames` is an (F, N, 3) array or an iterable of (N, 3) arrays.
+
+    A periodic `lattice` (rows are the cell vectors, in `unit`) is stored once and shared by every frame.
+    """
+    atomic_numbers = np.asarray(atomic_numbers, dtype=ATOMIC_NUMBER_DTYPE)
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"Unsupported coordinate type: {dtype}")
+    if unit not in UNIT_CODES:
+        raise ValueError(f"Unsupported unit: {unit}")
+    bond_count = len(bonds) if bonds is not None else 0
+    flags = ((FLAG_FLOAT64 if dtype == np.float64 else 0) | (FLAG_BONDS if bonds is not None else 0)
+             | (FLAG_LATTICE if lattice is not None else 0))
+    layout = _Layout(len(atomic_numbers), bond_count, bonds is not None, dtype, lattice is not None)
+
+    start = f.tell()
+    f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, flags, UNIT_CODES[unit], len(atomic_numbers), 0, bond_count)
+            .ljust(HEADER_SIZE, b'\x00'))
+    _write_section(f, start, layout.atomic_numbers, atomic_numbers.astype('<i2'))
+    if lattice is not None:
+        _write_section(f, start, layout.lattice, np.asarray(lattice, dtype='<f8').reshape(3, 3))
+    if bonds is not None:
+        _write_section(f, start, layout.bond_i, bonds.i.astype('<i4'))
+        _write_section(f, start, layout.bond_j, bonds.j.astype('<i4'))
+        _write_section(f, start, layout.bond_order, bonds.order.astype('i1'))
+        _write_section(f, start, layout.bond_length, bonds.length.astype('<f8'))
+    _pad_to(f, start + layout.coordinates)
+
+    frame_count = 0
+    for coordinates in frames:
+        coordinates = np.asarray(coordinates, dtype=dtype.newbyteorder('<'))
+        if coordinates.shape != (len(atomic_numbers), 3):
+            raise ValueError(f"Frame {frame_count} has shape {coordinates.shape}, expected ({len(atomic_numbers)}, 3).")
+        f.write(coordinates.tobytes())
+        frame_count += 1
+
+    end = f.tell()
+    f.seek(start + _FRAME_COUNT_OFFSET)
+    f.write(struct.pack('<Q', frame_count))
+    f.seek(end)
+    return frame_count
+
+
+def save_binary(file_path, atomic_numbers, frames, unit='angstrom', bonds=None, dtype=np.float32, lattice=None):
+    with open(file_path, 'wb') as f:
+        return write_binary(f, atomic_numbers, frames, unit, bonds, dtype, lattice)
+
+
+def append_binary_frames(file_path, frames):
+    """Append (N, 3) frames to an existing binary geometry file and update its frame count."""
+    with open(file_path, 'r+b') as f:
+        header = _read_header(f.read(HEADER_SIZE))
+        dtype = np.dtype('<f8' if header['flags'] & FLAG_FLOAT64 else '<f4')
+        layout = _Layout(header['atom_count'], header['bond_count'], header['flags'] & FLAG_BONDS, dtype,
+                         header['flags'] & FLAG_LATTICE)
+        frame_count = header['frame_count']
+        f.seek(layout.coordinates + frame_count * layout.frame_bytes)
+        for coordinates in frames:
+            coordinates = np.asarray(coordinates, dtype=dtype)
+            if coordinates.shape != (header['atom_count'], 3):
+                raise ValueError(f"Frame has shape {coordinates.shape}, expected ({header['atom_count']}, 3).")
+            f.write(coordinates.tobytes())
+            frame_count += 1
+        f.truncate()
+        f.seek(_FRAME_COUNT_OFFSET)
+        f.write(struct.pack('<Q', frame_count))
+    return frame_count
+
+
+def load_binary(source, mmap_mode='c'):
+    """Open a binary geometry file from a path (memory-mapped with `mmap_mode`) or a bytes-like buffer.
+
+    The default copy-on-write mapping reads frames lazily and lets callers modify coordinates without
+    touching the file.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        buffer = memoryview(source)
+        header = _read_header(bytes(buffer[:HEADER_SIZE]))
+
+        def section(offset, dtype, shape):
+            return np.frombuffer(buffer, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+    else:
+        with open(source, 'rb') as f:
+            header = _read_header(f.read(HEADER_SIZE))
+        file_size = os.path.getsize(source)
+
+        def section(offset, dtype, shape):
+            if int(np.prod(shape)) == 0:
+                return np.zeros(shape, dtype=dtype)
+            if offset + int(np.prod(shape)) * np.dtype(dtype).itemsize > file_size:
+                raise ValueError(f"Binary geometry file {source} is truncated.")
+            return np.memmap(source, dtype=dtype, mode=mmap_mode, offset=offset, shape=shape)
+
+    atom_count, frame_count, bond_count = header['atom_count'], header['frame_count'], header['bond_count']
+    has_bonds = bool(header['flags'] & FLAG_BONDS)
+    has_lattice = bool(header['flags'] & FLAG_LATTICE)
+    dtype = np.dtype('<f8' if header['flags'] & FLAG_FLOAT64 else '<f4')
+    layout = _Layout(atom_count, bond_count, has_bonds, dtype, has_lattice)
+
+    atomic_numbers = np.array(section(layout.atomic_numbers, '<i2', (atom_count,)), dtype=ATOMIC_NUMBER_DTYPE)
+    bonds = None
+    if has_bonds:
+        bonds = Bonds(section(layout.bond_i, '<i4', (bond_count,)), section(layout.bond_j, '<i4', (bond_count,)),
+                      section(layout.bond_order, 'i1', (bond_count,)),
+                      section(layout.bond_length, '<f8', (bond_count,)))
+    lattice = np.array(section(layout.lattice, '<f8', (3, 3)), dtype=np.float64) if has_lattice else None
+    frames = section(layout.coordinates, dtype, (frame_count, atom_count, 3))
+    return BinaryGeometry(atomic_numbers, frames, header['unit'], bonds, lattice)
+
+
+def _read_header(data):
+    if len(data) < _HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a binary geometry file.")
+    _, version, flags, unit_code, atom_count, frame_count, bond_count = _HEADER.unpack(data[:_HEADER.size])
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Binary geometry format version {version} is newer than supported ({FORMAT_VERSION}).")
+    if unit_code not in UNITS:
+        raise ValueError(f"Unknown unit code {unit_code} in binary geometry header.")
+    return {'flags': flags, 'unit': UNITS[unit_code], 'atom_count': atom_count, 'frame_count': frame_count,
+            'bond_count': bond_count}
+
+
+def _pad_to(f, offset):
+    position = f.tell()
+    if position < offset:
+        f.write(b'\x00' * (offset - position))
+
+
+def _write_section(f, start, offset, array):
+    _pad_to(f, start + offset)
+    f.write(array.tobytes())
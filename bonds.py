@@ -0,0 +1,225 @@
+import itertools
+import numpy as np
+from Element_infos import element_info
+from geometry import as_geometry, unit_conversion_factor
+from instrumentation import count, timed
+from periodic import fractional_coordinates, image_shifts, perpendicular_widths
+
+# Bonds form when the distance is below the sum of covalent radii plus this tolerance (angstrom).
+BOND_TOLERANCE = 0.4
+# Distance / radius-sum ratios below which a bond is drawn as triple or double.
+TRIPLE_BOND_RATIO = 0.83
+DOUBLE_BOND_RATIO = 0.93
+
+# Candidate pairs examined per vectorized step of the cell-list search (bounds its temporary memory).
+_PAIR_CHUNK_CANDIDATES = 2000000
+_HALF_SHELL_OFFSETS = np.array([offset for offset in itertools.product((-1, 0, 1), repeat=3)
+                                if offset > (0, 0, 0)], dtype=np.int64)
+
+
+class Bonds:
+    """Perceived bonds as parallel atom index, order and length arrays."""
+
+    def __init__(self, i, j, order, length):
+        self.i = np.asarray(i, dtype=np.int32)
+        self.j = np.asarray(j, dtype=np.int32)
+        self.order = np.asarray(order, dtype=np.int8)
+        self.length = np.asarray(length, dtype=np.float64)
+
+    @property
+    def pairs(self):
+        return np.column_stack((self.i, self.j))
+
+    def scaled(self, factor):
+        """Return the same bonds with lengths multiplied by `factor`, e.g. for a unit change."""
+        return Bonds(self.i, self.j, self.order, self.length * factor)
+
+    def __len__(self):
+        return len(self.i)
+
+    def __iter__(self):
+        return zip(self.i.tolist(), self.j.tolist(), self.order.tolist())
+
+    def __repr__(self):
+        return f"Bonds({len(self)} bonds)"
+
+
+def find_pairs_within(coordinates, cutoff):
+    """Return index arrays i < j and distances of all pairs closer than `cutoff`, using a cell list."""
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 3)
+    if len(coordinates) < 2 or cutoff <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    cells = np.floor((coordinates - coordinates.min(axis=0)) / cutoff).astype(np.int64)
+    shape = cells.max(axis=0) + 2
+    keys = (cells[:, 0] * shape[1] + cells[:, 1]) * shape[2] + cells[:, 2]
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    cell_keys, cell_starts, cell_counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+    sorted_cells = cells[order]
+
+    chunk_size = max(1, _PAIR_CHUNK_CANDIDATES // int(cell_counts.max()))
+    found_i, found_j, found_d = [], [], []
+    for chunk_start in range(0, len(order), chunk_size):
+        chunk = np.arange(chunk_start, min(chunk_start + chunk_size, len(order)))
+        for offset in itertools.chain([None], _HALF_SHELL_OFFSETS):
+            if offset is None:
+                neighbor_cells = sorted_cells[chunk]
+            else:
+                neighbor_cells = sorted_cells[chunk] + offset
+            neighbor_keys = (neighbor_cells[:, 0] * shape[1] + neighbor_cells[:, 1]) * shape[2] + neighbor_cells[:, 2]
+            slot = np.searchsorted(cell_keys, neighbor_keys)
+            slot = np.minimum(slot, len(cell_keys) - 1)
+            occupied = (cell_keys[slot] == neighbor_keys) & np.all(neighbor_cells >= 0, axis=1)
+            counts = np.where(occupied, cell_counts[slot], 0)
+            starts = cell_starts[slot]
+
+            total = counts.sum()
+            if total == 0:
+                continue
+            a = np.repeat(chunk, counts)
+            b = np.repeat(starts, counts) + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            if offset is None:
+                keep = b > a
+                a, b = a[keep], b[keep]
+
+            i, j = order[a], order[b]
+            distances = np.linalg.norm(coordinates[i] - coordinates[j], axis=1)
+            within = distances <= cutoff
+            found_i.append(i[within])
+            found_j.append(j[within])
+            found_d.append(distances[within])
+
+    if not found_i:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    i, j, distances = np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_d)
+    swap = i > j
+    i[swap], j[swap] = j[swap], i[swap]
+    return i, j, distances
+
+
+def find_periodic_pairs_within(coordinates, lattice, cutoff):
+    """Return i <= j, distances and integer image shifts of all pairs closer than `cutoff` in a periodic cell.
+
+    A pair's vector is coordinates[j] + shift @ lattice - coordinates[i]. Atoms are wrapped into the cell and
+    only images within `cutoff` of its faces are added before the open cell-list search, so large cells stay
+    linear. Cells narrower than the cutoff also pair atoms with their own images; each pair is reported once.
+    """
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 3)
+    atom_count = len(coordinates)
+    if atom_count == 0 or cutoff <= 0:
+        return (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0),
+                np.zeros((0, 3), dtype=np.int64))
+
+    fractional = fractional_coordinates(coordinates, lattice)
+    cells = np.floor(fractional).astype(np.int64)
+    wrapped = fractional - cells
+    margin = cutoff / perpendicular_widths(lattice)
+    image_atoms, image_cells = [], []
+    for shift in image_shifts(np.ceil(margin).astype(np.int64)):
+        shifted = wrapped + shift
+        inside = np.nonzero(np.all((shifted >= -margin) & (shifted < 1 + margin), axis=1))[0]
+        image_atoms.append(inside)
+        image_cells.append(np.broadcast_to(shift, (len(inside), 3)))
+    image_atoms = np.concatenate(image_atoms)
+    image_cells = np.concatenate(image_cells)
+
+    points = np.concatenate((wrapped, wrapped[image_atoms] + image_cells)) @ lattice
+    i, j, distances = find_pairs_within(points, cutoff)
+    # Originals come first and i < j, so image-image pairs have i >= atom_count.
+    keep = i < atom_count
+    i, j, distances = i[keep], j[keep], distances[keep]
+    image = j >= atom_count
+    shifts = np.zeros((len(i), 3), dtype=np.int64)
+    shifts[image] = image_cells[j[image] - atom_count]
+    j[image] = image_atoms[j[image] - atom_count]
+
+    # Every pair with an image was also found from the other atom with the opposite shift; keep one of them.
+    first_nonzero = np.where(shifts[:, 0] != 0, shifts[:, 0], np.where(shifts[:, 1] != 0, shifts[:, 1], shifts[:, 2]))
+    keep = (i < j) | ((i == j) & (first_nonzero > 0))
+    i, j, distances, shifts = i[keep], j[keep], distances[keep], shifts[keep]
+    return i, j, distances, shifts + cells[i] - cells[j]
+
+
+@timed('perceive_bonds')
+def perceive_bonds(geometry, tolerance=BOND_TOLERANCE):
+    """Find bonds from covalent radii and estimate their order from the bond length."""
+    geometry = as_geometry(geometry)
+    to_geometry_unit = unit_conversion_factor('angstrom', geometry.unit)
+    radii = element_info.get_covalent_radii(geometry.atomic_numbers) * to_geometry_unit
+    if len(radii) == 0:
+        return Bonds([], [], [], [])
+
+    cutoff = 2 * radii.max() + tolerance * to_geometry_unit
+    if geometry.lattice is None:
+        i, j, distances = find_pairs_within(geometry.coordinates, cutoff)
+    else:
+        i, j, distances = _nearest_periodic_pairs(geometry.coordinates, geometry.lattice, cutoff)
+
+    radius_sums = radii[i] + radii[j]
+    bonded = (distances <= radius_sums + tolerance * to_geometry_unit) & (radius_sums > 0)
+    i, j, distances, radius_sums = i[bonded], j[bonded], distances[bonded], radius_sums[bonded]
+
+    ratios = distances / radius_sums
+    orders = np.ones(len(i), dtype=np.int8)
+    orders[ratios < DOUBLE_BOND_RATIO] = 2
+    orders[ratios < TRIPLE_BOND_RATIO] = 3
+    hydrogen = (geometry.atomic_numbers[i] == 1) | (geometry.atomic_numbers[j] == 1)
+    orders[hydrogen] = 1
+
+    sort = np.lexsort((j, i))
+    count('bonds_found', len(i))
+    return Bonds(i[sort], j[sort], orders[sort], distances[sort])
+
+
+def _nearest_periodic_pairs(coordinates, lattice, cutoff):
+    """Periodic pairs without self-images, keeping only the nearest image of each atom pair."""
+    i, j, distances, _ = find_periodic_pairs_within(coordinates, lattice, cutoff)
+    distinct = i != j
+    i, j, distances = i[distinct], j[distinct], distances[distinct]
+    order = np.lexsort((distances, j, i))
+    i, j, distances = i[order], j[order], distances[order]
+    first = np.ones(len(i), dtype=bool)
+    first[1:] = (i[1:] != i[:-1]) | (j[1:] != j[:-1])
+    return i[first], j[first], distances[first]
+
+
+def neighbor_lists(atom_count, bonds):
+    """Return (starts, degree, neighbors): the bonded neighbors of atom a are neighbors[starts[a]:starts[a] + degree[a]]."""
+    centers = np.concatenate((bonds.i, bonds.j)).astype(np.int64)
+    neighbors = np.concatenate((bonds.j, bonds.i)).astype(np.int64)
+    sort = np.lexsort((neighbors, centers))
+    degree = np.bincount(centers, minlength=atom_count)
+    starts = np.concatenate(([0], np.cumsum(degree)[:-1])).astype(np.int64)
+    return starts, degree, neighbors[sort]
+
+
+def angle_triplets(atom_count, bonds):
+    """Return an (A, 3) array of bonded (i, center, k) triplets, each angle once."""
+    starts, degree, neighbors = neighbor_lists(atom_count, bonds)
+    triplets = []
+    for d in np.unique(degree[degree >= 2]):
+        atoms = np.nonzero(degree == d)[0]
+        neighbor_table = neighbors[starts[atoms][:, None] + np.arange(d)]
+        first, second = np.triu_indices(d, 1)
+        triplets.append(np.column_stack((neighbor_table[:, first].ravel(),
+                                         np.repeat(atoms, len(first)),
+                                         neighbor_table[:, second].ravel())))
+    if not triplets:
+        return np.zeros((0, 3), dtype=np.int64)
+    return np.concatenate(triplets)
+
+
+def dihedral_quadruplets(atom_count, bonds):
+    """Return a (D, 4) array of bonded (i, j, k, l) chains around every bond j-k, skipping three-membered rings."""
+    starts, degree, neighbors = neighbor_lists(atom_count, bonds)
+    j, k = bonds.i.astype(np.int64), bonds.j.astype(np.int64)
+    counts = degree[j] * degree[k]
+    total = counts.sum()
+    bond = np.repeat(np.arange(len(j)), counts)
+    offset = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    i = neighbors[starts[j[bond]] + offset // degree[k[bond]]]
+    l = neighbors[starts[k[bond]] + offset % degree[k[bond]]]
+    j, k = j[bond], k[bond]
+    keep = (i != k) & (l != j) & (i != l)
+    return np.column_stack((i[keep], j[keep], k[keep], l[keep]))
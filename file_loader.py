@@ -0,0 +1,137 @@
+import os
+import queue
+import threading
+from Reader_and_convertor import GeometryReaderAndConverter
+from binary_format import is_binary_geometry, load_binary
+from bonds import perceive_bonds
+
+# Files larger than this are previewed by their first PREVIEW_LINES lines instead of their full text.
+PREVIEW_THRESHOLD_BYTES = 256 * 1024
+PREVIEW_LINES = 200
+# Bytes parsed between progress messages and cancellation checks.
+PROGRESS_INTERVAL_BYTES = 1 << 20
+
+
+class LoadedFile:
+    """A parsed geometry file together with the text preview shown for it."""
+
+    def __init__(self, file_path, input_unit, geometry, bonds, preview, truncated):
+        self.file_path = file_path
+        self.input_unit = input_unit
+        self.geometry = geometry
+        self.bonds = bonds
+        self.preview = preview
+        self.truncated = truncated
+        status = os.stat(file_path)
+        # Identifies this version of the file for the geometry cache.
+        self.cache_text = f"file:{os.path.abspath(file_path)}:{status.st_size}:{status.st_mtime_ns}"
+
+
+class _LoadCancelled(Exception):
+    pass
+
+
+class _ProgressReader:
+    """Binary readline() source that reports progress and raises _LoadCancelled once cancelled."""
+
+    def __init__(self, f, report):
+        self.f = f
+        self.report = report
+        self.position = 0
+        self._next_report = PROGRESS_INTERVAL_BYTES
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.position += len(data)
+        return data
+
+    def readline(self):
+        line = self.f.readline()
+        self.position += len(line)
+        if self.position >= self._next_report:
+            self._next_report = self.position + PROGRESS_INTERVAL_BYTES
+            self.report(self.position)
+        return line
+
+
+class FileLoader:
+    """Reads and parses a geometry file in a background thread and streams progress through a queue.
+
+    Messages are ('progress', stage, fraction), then one of ('done', LoadedFile), ('cancelled',)
+    or ('error', exception).
+    """
+
+    def __init__(self, file_path, input_unit='bohr', reader_converter=None,
+                 preview_threshold=PREVIEW_THRESHOLD_BYTES, preview_lines=PREVIEW_LINES):
+        self.file_path = file_path
+        self.input_unit = input_unit
+        self.reader_converter = reader_converter or GeometryReaderAndConverter()
+        self.preview_threshold = preview_threshold
+        self.preview_lines = preview_lines
+        self.messages = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        try:
+            self.messages.put(('done', self._load()))
+        except _LoadCancelled:
+            self.messages.put(('cancelled',))
+        except Exception as e:
+            self.messages.put(('error', e))
+
+    def _load(self):
+        size = os.path.getsize(self.file_path)
+        if is_binary_geometry(self.file_path):
+            binary = load_binary(self.file_path)
+            geometry, bonds = binary.geometry(0), binary.bonds
+            preview = (f"Binary geometry file {self.file_path}\n{len(geometry)} atoms, {len(binary)} frame(s), "
+                       f"unit: {binary.unit}")
+            truncated = True
+            # Binary files record their own unit; the unit chosen in the GUI only applies to text input.
+            input_unit = binary.unit
+        else:
+            preview, truncated = self._preview(size)
+            input_unit = self.input_unit
+
+            def report(position):
+                self._check_cancelled()
+                self.messages.put(('progress', 'Parsing', position / size))
+
+            with open(self.file_path, 'rb') as f:
+                geometry = self.reader_converter.parse_geometry(_ProgressReader(f, report), input_unit)
+            bonds = None
+
+        self._check_cancelled()
+        if bonds is None:
+            self.messages.put(('progress', 'Finding bonds', 1.0))
+            bonds = perceive_bonds(geometry)
+        self._check_cancelled()
+        return LoadedFile(self.file_path, input_unit, geometry, bonds, preview, truncated)
+
+    def _preview(self, size):
+        """Return (text, truncated): the whole file when small, else its first lines and a note."""
+        with open(self.file_path, 'r', errors='replace') as f:
+            if size <= self.preview_threshold:
+                return f.read(), False
+            lines = [f.readline() for _ in range(self.preview_lines)]
+        shown = "".join(lines)
+        return f"{shown}... preview of the first {self.preview_lines} lines of {size:,} bytes ...\n", True
+
+    def _check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise _LoadCancelled()
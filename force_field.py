@@ -0,0 +1,319 @@
+import numpy as np
+from Element_infos import element_info
+from geometry import as_geometry, unit_conversion_factor
+from bonds import (angle_triplets, dihedral_quadruplets, find_pairs_within, find_periodic_pairs_within, neighbor_lists,
+                   perceive_bonds)
+from periodic import minimum_image
+from instrumentation import count
+
+# Reference single-bond lengths in angstrom; other pairs use the sum of covalent radii.
+IDEAL_BOND_LENGTHS = {
+    ('C', 'C'): 1.54,
+    ('C', 'H'): 1.09,
+    ('N', 'N'): 1.45,
+    ('C', 'N'): 1.47,
+    ('N', 'H'): 1.01,
+    ('H', 'H'): 0.74
+}
+# Pauling's bond-order correction: r(n) = r(1) - 0.71 * log10(n).
+BOND_ORDER_SHORTENING = 0.71
+
+TETRAHEDRAL_ANGLE = np.arccos(-1.0 / 3.0)
+TRIGONAL_ANGLE = 2 * np.pi / 3
+LINEAR_ANGLE = np.pi
+
+# Nonbonded terms vanish smoothly at the cutoff (angstrom). The neighbor list reaches cutoff + skin, so it is
+# only rebuilt once some atom has moved more than half the skin.
+NONBONDED_CUTOFF = 6.0
+NEIGHBOR_SKIN = 1.0
+# Atoms one or two bonds apart do not interact; atoms three bonds apart interact at this fraction of full strength.
+ONE_FOUR_SCALE = 0.5
+# UFF van der Waals distances (angstrom) and well depths (kcal/mol). Other elements use twice their
+# covalent radius plus DEFAULT_VDW_PADDING and DEFAULT_WELL_DEPTH.
+LENNARD_JONES_PARAMETERS = {
+    'H': (2.886, 0.044), 'He': (2.362, 0.056), 'Li': (2.451, 0.025), 'B': (4.083, 0.180),
+    'C': (3.851, 0.105), 'N': (3.660, 0.069), 'O': (3.500, 0.060), 'F': (3.364, 0.050),
+    'Na': (2.983, 0.030), 'Mg': (3.021, 0.111), 'Si': (4.295, 0.402), 'P': (4.147, 0.305),
+    'S': (4.035, 0.274), 'Cl': (3.947, 0.227), 'K': (3.812, 0.035), 'Ca': (3.399, 0.238),
+    'Br': (4.189, 0.251), 'I': (4.500, 0.339),
+}
+DEFAULT_VDW_PADDING = 2.0
+DEFAULT_WELL_DEPTH = 0.1
+# kcal/mol per force-field energy unit: the default bond constant of 1.0 per squared angstrom stands for a
+# 700 kcal/mol/angstrom^2 stretch, and nonbonded energies are divided by this to share its scale.
+KCAL_PER_ENERGY_UNIT = 700.0
+COULOMB_CONSTANT = 332.0637  # kcal/mol * angstrom / e^2
+
+
+def ideal_bond_length(symbol1, symbol2, order=1):
+    """Return the reference bond length in angstrom for a pair of elements."""
+    length = IDEAL_BOND_LENGTHS.get((symbol1, symbol2), IDEAL_BOND_LENGTHS.get((symbol2, symbol1)))
+    if length is None:
+        radii = element_info.get_covalent_radii([element_info.get_atomic_number_from_symbol(symbol1) or 0,
+                                                 element_info.get_atomic_number_from_symbol(symbol2) or 0])
+        length = radii.sum() if radii.all() else 1.5
+    return length - BOND_ORDER_SHORTENING * np.log10(order)
+
+
+def lennard_jones_parameters(atomic_numbers):
+    """Return per-atom van der Waals distances (angstrom) and well depths (kcal/mol)."""
+    unique_numbers, inverse = np.unique(np.asarray(atomic_numbers), return_inverse=True)
+    parameters = np.array([LENNARD_JONES_PARAMETERS.get(symbol, (2 * radius + DEFAULT_VDW_PADDING, DEFAULT_WELL_DEPTH))
+                           for symbol, radius in zip(element_info.get_symbols(unique_numbers),
+                                                     element_info.get_covalent_radii(unique_numbers))],
+                          dtype=np.float64).reshape(-1, 2)
+    inverse = inverse.reshape(-1)
+    return parameters[inverse, 0], parameters[inverse, 1]
+
+
+class Topology:
+    """Bond and angle index arrays with their reference lengths and angles, plus the atom pairs three bonds apart."""
+
+    def __init__(self, atom_count, bonds, bond_lengths, angles, angle_values, one_four_pairs=None):
+        self.atom_count = atom_count
+        self.bonds = np.asarray(bonds, dtype=np.int64).reshape(-1, 2)
+        self.bond_lengths = np.asarray(bond_lengths, dtype=np.float64)
+        self.angles = np.asarray(angles, dtype=np.int64).reshape(-1, 3)
+        self.angle_values = np.asarray(angle_values, dtype=np.float64)
+        self.one_four_pairs = np.asarray(one_four_pairs if one_four_pairs is not None else [],
+                                         dtype=np.int64).reshape(-1, 2)
+
+    @classmethod
+    def from_geometry(cls, geometry, bonds=None):
+        """Build the topology from perceived connectivity, reusing `bonds` when given."""
+        geometry = as_geometry(geometry)
+        if bonds is None:
+            bonds = perceive_bonds(geometry)
+        symbols = geometry.symbols
+        to_geometry_unit = unit_conversion_factor('angstrom', geometry.unit)
+        reference_lengths = {}
+        bond_lengths = np.empty(len(bonds))
+        for n, (i, j, order) in enumerate(bonds):
+            key = (symbols[i], symbols[j], order)
+            if key not in reference_lengths:
+                reference_lengths[key] = ideal_bond_length(*key) * to_geometry_unit
+            bond_lengths[n] = reference_lengths[key]
+
+        angles, angle_values = cls._angles_from_bonds(len(geometry), bonds)
+        one_four_pairs = dihedral_quadruplets(len(geometry), bonds)[:, [0, 3]]
+        return cls(len(geometry), bonds.pairs, bond_lengths, angles, angle_values, one_four_pairs)
+
+    @staticmethod
+    def _angles_from_bonds(atom_count, bonds):
+        """Reference angle per triplet from the hybridization its center's bond orders imply.
+
+        A two-coordinate center with a triple bond or two double bonds is linear, a three-coordinate center
+        with a double bond is trigonal and everything else is tetrahedral. Aromatic bonds are perceived as
+        double bonds from their length, so aromatic centers are trigonal too.
+        """
+        angles = angle_triplets(atom_count, bonds)
+        if len(angles) == 0:
+            return angles, np.zeros(0)
+        _, degree, _ = neighbor_lists(atom_count, bonds)
+        ends = np.concatenate((bonds.i, bonds.j))
+        orders = np.concatenate((bonds.order, bonds.order))
+        max_orders = np.zeros(atom_count, dtype=np.int8)
+        np.maximum.at(max_orders, ends, orders)
+        double_bonds = np.bincount(ends[orders == 2], minlength=atom_count)
+
+        centers = angles[:, 1]
+        center_degree = degree[centers]
+        linear = (center_degree == 2) & ((max_orders[centers] == 3) | (double_bonds[centers] >= 2))
+        trigonal = (center_degree == 3) & (max_orders[centers] >= 2)
+        angle_values = np.full(len(angles), TETRAHEDRAL_ANGLE)
+        angle_values[trigonal] = TRIGONAL_ANGLE
+        angle_values[linear] = LINEAR_ANGLE
+        return angles, angle_values
+
+
+class NeighborList:
+    """Verlet list of nonbonded atom pairs within cutoff + skin, rebuilt once any atom has moved more than skin / 2.
+
+    Pairs in `excluded_pairs` are left out and pairs in `scaled_pairs` carry `scale` instead of 1. With a
+    `lattice` the pairs include periodic images, whose translation is kept in `offsets`.
+    """
+
+    def __init__(self, atom_count, cutoff, skin, excluded_pairs=None, scaled_pairs=None, scale=ONE_FOUR_SCALE,
+                 lattice=None):
+        self.atom_count = atom_count
+        self.cutoff = cutoff
+        self.skin = skin
+        self.lattice = lattice
+        self.excluded_keys = self._pair_keys(excluded_pairs)
+        scaled_keys = self._pair_keys(scaled_pairs)
+        self.scaled_keys = scaled_keys[~_contains(self.excluded_keys, scaled_keys)]
+        self.scale_factor = scale
+        self.builds = 0
+        self.i = self.j = np.zeros(0, dtype=np.int64)
+        self.scale = np.zeros(0)
+        self.offsets = None
+        self._reference = None
+
+    def update(self, coordinates):
+        """Return (i, j, scale, offsets) of the listed pairs, rebuilding the list first if it may be stale.
+
+        `offsets` is None without a lattice; otherwise pair vectors are coordinates[i] - coordinates[j] - offsets.
+        """
+        if self._reference is None or self._reference.shape != coordinates.shape:
+            self.build(coordinates)
+        else:
+            displacement = coordinates - self._reference
+            if np.max(np.einsum('ij,ij->i', displacement, displacement), initial=0.0) > (0.5 * self.skin) ** 2:
+                self.build(coordinates)
+        return self.i, self.j, self.scale, self.offsets
+
+    def build(self, coordinates):
+        if self.lattice is None:
+            i, j, _ = find_pairs_within(coordinates, self.cutoff + self.skin)
+        else:
+            i, j, _, shifts = find_periodic_pairs_within(coordinates, self.lattice, self.cutoff + self.skin)
+        keys = i * self.atom_count + j
+        keep = ~_contains(self.excluded_keys, keys)
+        self.i, self.j, keys = i[keep], j[keep], keys[keep]
+        if self.lattice is not None:
+            self.offsets = shifts[keep] @ self.lattice
+        self.scale = np.where(_contains(self.scaled_keys, keys), self.scale_factor, 1.0)
+        self._reference = np.array(coordinates, dtype=np.float64)
+        self.builds += 1
+        count('neighbor_list_builds')
+
+    def _pair_keys(self, pairs):
+        pairs = np.sort(np.asarray(pairs if pairs is not None else [], dtype=np.int64).reshape(-1, 2), axis=1)
+        return np.unique(pairs[:, 0] * self.atom_count + pairs[:, 1])
+
+
+class NonbondedTerms:
+    """Lennard-Jones and Coulomb energy between atoms at least three bonds apart, cut off at `cutoff` angstrom.
+
+    Both terms are shifted so that energy and force go to zero at the cutoff. `charges` are per-atom partial
+    charges in elementary charges; without them only the Lennard-Jones term is evaluated.
+    """
+
+    def __init__(self, geometry, topology, charges=None, cutoff=NONBONDED_CUTOFF, skin=NEIGHBOR_SKIN):
+        geometry = as_geometry(geometry)
+        to_geometry_unit = unit_conversion_factor('angstrom', geometry.unit)
+        self.cutoff = cutoff * to_geometry_unit
+        distances, depths = lennard_jones_parameters(geometry.atomic_numbers)
+        # Geometric-mean combination rules, so pair parameters are products of per-atom square roots.
+        self.root_distances = np.sqrt(distances * to_geometry_unit)
+        self.root_depths = np.sqrt(depths / KCAL_PER_ENERGY_UNIT)
+        self.charges = None
+        if charges is not None and np.any(charges):
+            self.charges = np.asarray(charges, dtype=np.float64)
+            if self.charges.shape != (len(geometry),):
+                raise ValueError(f"Expected {len(geometry)} charges, got {self.charges.shape}.")
+        self.coulomb_constant = COULOMB_CONSTANT / KCAL_PER_ENERGY_UNIT * to_geometry_unit
+        excluded_pairs = np.concatenate((topology.bonds, topology.angles[:, [0, 2]]))
+        self.neighbor_list = NeighborList(len(geometry), self.cutoff, skin * to_geometry_unit, excluded_pairs,
+                                          topology.one_four_pairs, lattice=geometry.lattice)
+
+    def add_terms(self, coordinates, gradient):
+        """Return the nonbonded energy and add its gradient to `gradient`."""
+        i, j, scale, offsets = self.neighbor_list.update(coordinates)
+        vectors = coordinates[i] - coordinates[j]
+        if offsets is not None:
+            vectors -= offsets
+        lengths = np.linalg.norm(vectors, axis=1)
+        within = lengths < self.cutoff
+        i, j, scale, vectors = i[within], j[within], scale[within], vectors[within]
+        lengths = np.maximum(lengths[within], 1e-12)
+        if len(i) == 0:
+            return 0.0
+
+        cutoff = self.cutoff
+        depth = self.root_depths[i] * self.root_depths[j] * scale
+        contact = self.root_distances[i] * self.root_distances[j]
+        x6, xc6 = (contact / lengths) ** 6, (contact / cutoff) ** 6
+        cutoff_derivative = -12 * depth * (xc6 * xc6 - xc6) / cutoff
+        pair_energy = (depth * (x6 * x6 - 2 * x6) - depth * (xc6 * xc6 - 2 * xc6)
+                       - (lengths - cutoff) * cutoff_derivative)
+        derivative = -12 * depth * (x6 * x6 - x6) / lengths - cutoff_derivative
+
+        if self.charges is not None:
+            product = self.coulomb_constant * self.charges[i] * self.charges[j] * scale
+            pair_energy += product / lengths - product / cutoff + (lengths - cutoff) * product / cutoff ** 2
+            derivative += product / cutoff ** 2 - product / lengths ** 2
+
+        pair_gradient = (derivative / lengths)[:, None] * vectors
+        _accumulate(gradient, i, pair_gradient)
+        _accumulate(gradient, j, -pair_gradient)
+        return float(pair_energy.sum())
+
+
+class ForceField:
+    """Harmonic bond-stretch and angle-bend energy, plus optional nonbonded terms, with an analytic gradient.
+
+    With a `lattice`, bonded vectors follow the minimum-image convention.
+    """
+
+    def __init__(self, topology, bond_constant=1.0, angle_constant=0.5, nonbonded=None, lattice=None):
+        self.topology = topology
+        self.bond_constant = bond_constant
+        self.angle_constant = angle_constant
+        self.nonbonded = nonbonded
+        self.lattice = lattice
+
+    def energy(self, coordinates):
+        return self.energy_and_gradient(coordinates)[0]
+
+    def energy_and_gradient(self, coordinates):
+        """Return the energy and its (N, 3) gradient for one coordinate array."""
+        count('force_evaluations')
+        coordinates = np.asarray(coordinates, dtype=np.float64)
+        gradient = np.zeros_like(coordinates)
+        energy = self._bond_terms(coordinates, gradient)
+        energy += self._angle_terms(coordinates, gradient)
+        if self.nonbonded is not None:
+            energy += self.nonbonded.add_terms(coordinates, gradient)
+        return energy, gradient
+
+    def _bond_terms(self, coordinates, gradient):
+        bonds = self.topology.bonds
+        if len(bonds) == 0:
+            return 0.0
+        i, j = bonds[:, 0], bonds[:, 1]
+        vectors = minimum_image(coordinates[i] - coordinates[j], self.lattice)
+        lengths = np.linalg.norm(vectors, axis=1)
+        stretch = lengths - self.topology.bond_lengths
+        energy = 0.5 * self.bond_constant * np.dot(stretch, stretch)
+
+        pair_gradient = (self.bond_constant * stretch / np.maximum(lengths, 1e-12))[:, None] * vectors
+        _accumulate(gradient, i, pair_gradient)
+        _accumulate(gradient, j, -pair_gradient)
+        return energy
+
+    def _angle_terms(self, coordinates, gradient):
+        angles = self.topology.angles
+        if len(angles) == 0:
+            return 0.0
+        i, j, k = angles[:, 0], angles[:, 1], angles[:, 2]
+        a = minimum_image(coordinates[i] - coordinates[j], self.lattice)
+        b = minimum_image(coordinates[k] - coordinates[j], self.lattice)
+        a_length = np.maximum(np.linalg.norm(a, axis=1), 1e-12)
+        b_length = np.maximum(np.linalg.norm(b, axis=1), 1e-12)
+        cos_theta = np.clip(np.einsum('ij,ij->i', a, b) / (a_length * b_length), -1.0, 1.0)
+        theta = np.arccos(cos_theta)
+        bend = theta - self.topology.angle_values
+        energy = 0.5 * self.angle_constant * np.dot(bend, bend)
+
+        sin_theta = np.maximum(np.sqrt(1.0 - cos_theta ** 2), 1e-8)
+        scale = (-self.angle_constant * bend / sin_theta)[:, None]
+        gradient_i = scale * (b / (a_length * b_length)[:, None] - cos_theta[:, None] * a / (a_length ** 2)[:, None])
+        gradient_k = scale * (a / (a_length * b_length)[:, None] - cos_theta[:, None] * b / (b_length ** 2)[:, None])
+        _accumulate(gradient, i, gradient_i)
+        _accumulate(gradient, k, gradient_k)
+        _accumulate(gradient, j, -(gradient_i + gradient_k))
+        return energy
+
+
+def _accumulate(gradient, indices, values):
+    for axis in range(3):
+        gradient[:, axis] += np.bincount(indices, weights=values[:, axis], minlength=len(gradient))
+
+
+def _contains(sorted_keys, keys):
+    """Boolean mask of which `keys` occur in the sorted unique array `sorted_keys`."""
+    if len(sorted_keys) == 0:
+        return np.zeros(len(keys), dtype=bool)
+    slot = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return sorted_keys[slot] == keys
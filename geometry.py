@@ -0,0 +1,151 @@
+from collections.abc import MutableMapping
+import numpy as np
+from Element_infos import ATOMIC_NUMBER_DTYPE, element_info
+from instrumentation import timed
+
+BOHR_PER_ANGSTROM = 1.8897259886
+
+
+def _symbol_for(atomic_number):
+    info = element_info.get_element_info(atomic_number)
+    return info["symbol"] if info else 'X'
+
+
+class AtomView(MutableMapping):
+    """Dict-compatible view of one atom stored in a Geometry."""
+    _axes = {'x': 0, 'y': 1, 'z': 2}
+    _keys = ('atomic_number', 'symbol', 'x', 'y', 'z')
+
+    def __init__(self, geometry, index):
+        self._geometry = geometry
+        self._index = index
+
+    def __getitem__(self, key):
+        if key in self._axes:
+            return float(self._geometry.coordinates[self._index, self._axes[key]])
+        if key == 'atomic_number':
+            atomic_number = int(self._geometry.atomic_numbers[self._index])
+            return atomic_number if atomic_number > 0 else None
+        if key == 'symbol':
+            return _symbol_for(int(self._geometry.atomic_numbers[self._index]))
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._axes:
+            self._geometry.coordinates[self._index, self._axes[key]] = value
+        elif key == 'atomic_number':
+            self._geometry.atomic_numbers[self._index] = value or 0
+        elif key == 'symbol':
+            atomic_number = element_info.get_atomic_number_from_symbol(value)
+            self._geometry.atomic_numbers[self._index] = atomic_number or 0
+        else:
+            raise KeyError(key)
+
+    def __delitem__(self, key):
+        raise TypeError("Atoms of a Geometry do not support key deletion.")
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class Geometry:
+    """Atomic numbers and an (N, 3) coordinate array tagged with a length unit.
+
+    Periodic geometries carry a (3, 3) `lattice` whose rows are the cell vectors, in the same unit.
+    """
+
+    def __init__(self, atomic_numbers, coordinates, unit='angstrom', lattice=None):
+        coordinates = np.asarray(coordinates, dtype=np.float64)
+        self.coordinates = np.ascontiguousarray(coordinates.reshape(-1, 3))
+        self.atomic_numbers = np.asarray(atomic_numbers, dtype=ATOMIC_NUMBER_DTYPE).reshape(-1)
+        if len(self.atomic_numbers) != len(self.coordinates):
+            raise ValueError(f"Got {len(self.atomic_numbers)} atomic numbers for {len(self.coordinates)} coordinates.")
+        self.unit = unit
+        self.lattice = None if lattice is None else np.array(lattice, dtype=np.float64).reshape(3, 3)
+
+    @classmethod
+    def from_atoms(cls, atoms, unit='angstrom'):
+        """Build a Geometry from a list of per-atom dicts."""
+        atomic_numbers = []
+        coordinates = np.empty((len(atoms), 3), dtype=np.float64)
+        for i, atom in enumerate(atoms):
+            atomic_number = atom.get('atomic_number')
+            if atomic_number is None:
+                atomic_number = element_info.get_atomic_number_from_symbol(atom.get('symbol', ''))
+            atomic_numbers.append(atomic_number or 0)
+            coordinates[i] = atom['x'], atom['y'], atom['z']
+        return cls(atomic_numbers, coordinates, unit)
+
+    def to_atoms(self):
+        """Return the geometry as a list of plain per-atom dicts."""
+        return [dict(atom) for atom in self]
+
+    @property
+    def symbols(self):
+        return element_info.get_symbols(self.atomic_numbers).tolist()
+
+    @property
+    def periodic(self):
+        return self.lattice is not None
+
+    def copy(self):
+        return Geometry(self.atomic_numbers.copy(), self.coordinates.copy(), self.unit, self.lattice)
+
+    def converted(self, unit):
+        """Return a copy of the geometry with coordinates expressed in `unit`."""
+        return self.copy().convert_units(unit)
+
+    @timed('convert_units')
+    def convert_units(self, unit):
+        """Convert the coordinates to `unit` in place and return the geometry."""
+        if unit != self.unit:
+            factor = unit_conversion_factor(self.unit, unit)
+            self.coordinates *= factor
+            if self.lattice is not None:
+                self.lattice *= factor
+            self.unit = unit
+        return self
+
+    def __len__(self):
+        return len(self.atomic_numbers)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [AtomView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Atom index out of range.")
+        return AtomView(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield AtomView(self, i)
+
+    def __repr__(self):
+        periodic = ", periodic" if self.lattice is not None else ""
+        return f"Geometry({len(self)} atoms, unit={self.unit!r}{periodic})"
+
+
+def unit_conversion_factor(from_unit, to_unit):
+    if from_unit == to_unit:
+        return 1.0
+    elif from_unit == 'angstrom' and to_unit == 'bohr':
+        return BOHR_PER_ANGSTROM
+    elif from_unit == 'bohr' and to_unit == 'angstrom':
+        return 1.0 / BOHR_PER_ANGSTROM
+    else:
+        raise ValueError(f"Unsupported unit conversion: {from_unit} to {to_unit}")
+
+
+def as_geometry(geometry, unit='angstrom'):
+    """Return `geometry` as a Geometry, wrapping old list-of-dicts input in `unit`."""
+    if isinstance(geometry, Geometry):
+        return geometry
+    return Geometry.from_atoms(geometry, unit)
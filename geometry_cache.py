@@ -0,0 +1,143 @@
+import hashlib
+import os
+from collections import OrderedDict
+import numpy as np
+from geometry import Geometry
+from bonds import Bonds
+
+CACHE_DIR_ENVIRONMENT_VARIABLE = "MOLECULE_VISUALIZER_CACHE_DIR"
+# Size limits of the disk tier; the least recently used .npz files are removed beyond them.
+DISK_CACHE_MAX_BYTES = 1 << 30
+DISK_CACHE_MAX_ENTRIES = 1024
+
+
+class CacheEntry:
+    def __init__(self, geometry, bonds=None):
+        self.geometry = geometry
+        self.bonds = bonds
+
+
+class GeometryCache:
+    """LRU cache of parsed geometries and bonds keyed by input content, with an optional .npz disk tier.
+
+    The disk tier is pruned on every put to `max_disk_bytes` and `max_disk_entries`, dropping the files that were
+    used least recently (reads refresh a file's modification time).
+    """
+
+    def __init__(self, max_entries=32, cache_dir=None, max_disk_bytes=DISK_CACHE_MAX_BYTES,
+                 max_disk_entries=DISK_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text, input_unit, input_format=""):
+        if isinstance(text, str):
+            text = text.encode()
+        digest = hashlib.sha256(text)
+        digest.update(f"\0{input_unit}\0{input_format}".encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None and self.cache_dir:
+            entry = self._load(key)
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, geometry, bonds=None):
+        entry = CacheEntry(geometry, bonds)
+        self._remember(key, entry)
+        if self.cache_dir:
+            self._save(key, entry)
+            self._prune_disk()
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+    def __contains__(self, key):
+        return key in self._entries or (bool(self.cache_dir) and os.path.exists(self._path(key)))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _save(self, key, entry):
+        arrays = {
+            "atomic_numbers": entry.geometry.atomic_numbers,
+            "coordinates": entry.geometry.coordinates,
+            "unit": np.array(entry.geometry.unit),
+            "lattice": np.zeros(0) if entry.geometry.lattice is None else entry.geometry.lattice,
+        }
+        if entry.bonds is not None:
+            arrays.update(bond_i=entry.bonds.i, bond_j=entry.bonds.j,
+                          bond_order=entry.bonds.order, bond_length=entry.bonds.length)
+        temporary_path = self._path(key) + f".{os.getpid()}.tmp"
+        with open(temporary_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temporary_path, self._path(key))
+
+    def _prune_disk(self):
+        """Remove the least recently used .npz files until the disk tier fits its byte and entry limits."""
+        files = []
+        for item in os.scandir(self.cache_dir):
+            if item.name.endswith(".npz"):
+                try:
+                    status = item.stat()
+                except OSError:  # Removed by another process in the meantime
+                    continue
+                files.append((status.st_mtime_ns, status.st_size, item.path))
+        files.sort(reverse=True)
+        total_bytes = 0
+        for index, (_, size, path) in enumerate(files):
+            total_bytes += size
+            if index >= self.max_disk_entries or total_bytes > self.max_disk_bytes:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _load(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                lattice = data["lattice"] if data["lattice"].size else None
+                geometry = Geometry(data["atomic_numbers"], data["coordinates"], str(data["unit"]), lattice)
+                bonds = None
+                if "bond_i" in data:
+                    bonds = Bonds(data["bond_i"], data["bond_j"], data["bond_order"], data["bond_length"])
+        except (OSError, ValueError, KeyError):
+            return None
+        try:
+            os.utime(path)  # Mark the file as recently used, so pruning keeps it
+        except OSError:
+            pass
+        return CacheEntry(geometry, bonds)
+
+
+def default_cache_dir():
+    """Return the on-disk cache directory from the environment, or None to keep the cache in memory only."""
+    return os.environ.get(CACHE_DIR_ENVIRONMENT_VARIABLE) or None
@@ -0,0 +1,520 @@
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from Reader_and_convertor import BINARY_FORMAT, GeometryReaderAndConverter
+from instrumentation import configure_from_environment
+
+# Requests waiting for a worker beyond this are answered with 503 so clients back off instead of queueing forever.
+DEFAULT_MAX_PENDING = 64
+# Up to this many queued requests go to one worker in a single round trip, gathered for at most the window.
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_BATCH_WINDOW_MS = 2.0
+DEFAULT_TIMEOUT = 30.0
+MAX_BODY_BYTES = 64 << 20
+MAX_IMAGE_SIZE = 4096
+# Recent latencies kept per endpoint for the percentiles in /metrics, and the window for recent throughput.
+LATENCY_SAMPLES = 2048
+THROUGHPUT_WINDOW = 60.0
+# Per-worker renderers kept for distinct image sizes and options.
+RENDERER_CACHE_SIZE = 8
+# Connections the listening socket holds before accepting; the socketserver default of 5 resets bursts of clients.
+LISTEN_BACKLOG = 256
+
+CONVERT_FORMATS = {'xyz': 'text/plain; charset=utf-8', 'gamess': 'text/plain; charset=utf-8',
+                   BINARY_FORMAT: 'application/octet-stream'}
+IMAGE_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml', 'jpg': 'image/jpeg', 'pdf': 'application/pdf'}
+UNITS = ('angstrom', 'bohr')
+
+_reader_converter = None
+_renderers = collections.OrderedDict()
+# Queued by a done-callback that saw the pool break, to wake the dispatcher, which replaces the pool.
+_RESTART = object()
+
+
+class ServiceBusy(Exception):
+    """Raised by GeometryService.submit when the pending-request queue is full or the service is closing."""
+
+
+def _warm_worker():
+    """Process-pool initializer: import matplotlib and draw once so the first real request is not a cold start."""
+    global _reader_converter
+    _reader_converter = GeometryReaderAndConverter()
+    geometry = _reader_converter.parse_geometry("3\nwater\nO 0 0 0\nH 0.96 0 0\nH -0.24 0.93 0\n", 'angstrom')
+    _get_renderer((64, 64, 100, True, False, False)).render_image(geometry)
+
+
+def _get_renderer(key):
+    from headless_renderer import HeadlessRenderer
+
+    if key in _renderers:
+        _renderers.move_to_end(key)
+        return _renderers[key]
+    width, height, dpi, show_bonds, show_labels, show_images = key
+    renderer = HeadlessRenderer(width, height, dpi, show_bonds=show_bonds, show_labels=show_labels,
+                                show_images=show_images)
+    _renderers[key] = renderer
+    if len(_renderers) > RENDERER_CACHE_SIZE:
+        _renderers.popitem(last=False)[1].close()
+    return renderer
+
+
+def _process_job(job):
+    """Run one request in a worker; returns (status, content type, body, worker seconds)."""
+    kind, payload, options = job
+    start = time.perf_counter()
+    try:
+        geometry = _reader_converter.parse_geometry(payload, options['input_unit'])
+        if kind == 'convert':
+            body = _reader_converter.convert_to_format(geometry, options['format'], options['output_unit'])
+            if isinstance(body, str):
+                body = (body + "\n").encode()
+            content_type = CONVERT_FORMATS[options['format']]
+        else:
+            renderer = _get_renderer((options['width'], options['height'], options['dpi'], options['bonds'],
+                                      options['labels'], options['images']))
+            body = renderer.render_image(geometry, options['format'], title=options['title'],
+                                         view=(options['elev'], options['azim']))
+            content_type = IMAGE_FORMATS[options['format']]
+        return 200, content_type, body, time.perf_counter() - start
+    except (ValueError, UnicodeDecodeError) as e:
+        return 400, 'text/plain; charset=utf-8', f"{type(e).__name__}: {e}\n".encode(), time.perf_counter() - start
+    except Exception as e:
+        return 500, 'text/plain; charset=utf-8', f"{type(e).__name__}: {e}\n".encode(), time.perf_counter() - start
+
+
+def _process_batch(jobs):
+    return [_process_job(job) for job in jobs]
+
+
+def parse_options(kind, query):
+    """Validate the query parameters of a /convert or /render request; raises ValueError for bad values."""
+    def get(name, default):
+        values = query.get(name)
+        return values[-1] if values else default
+
+    def choice(name, default, allowed):
+        value = get(name, default).lower()
+        if value not in allowed:
+            raise ValueError(f"{name} must be one of {', '.join(allowed)}, got {value!r}")
+        return value
+
+    def number(name, default, convert, low, high):
+        try:
+            value = convert(get(name, default))
+        except ValueError:
+            raise ValueError(f"{name} must be a number, got {get(name, default)!r}")
+        if not low <= value <= high:
+            raise ValueError(f"{name} must be between {low} and {high}, got {value}")
+        return value
+
+    def flag(name, default):
+        return get(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+    options = {'input_unit': choice('input_unit', 'bohr', UNITS)}
+    if kind == 'convert':
+        options['format'] = choice('format', 'xyz', tuple(CONVERT_FORMATS))
+        options['output_unit'] = choice('output_unit', 'angstrom', UNITS)
+    else:
+        options['format'] = choice('format', 'png', tuple(IMAGE_FORMATS))
+        options['width'] = number('width', '400', int, 16, MAX_IMAGE_SIZE)
+        options['height'] = number('height', '400', int, 16, MAX_IMAGE_SIZE)
+        options['dpi'] = number('dpi', '100', int, 10, 600)
+        options['elev'] = number('elev', '30', float, -360, 360)
+        options['azim'] = number('azim', '-60', float, -360, 360)
+        options['bonds'] = flag('bonds', '1')
+        options['labels'] = flag('labels', '0')
+        options['images'] = flag('images', '0')
+        options['title'] = get('title', None)
+    return options
+
+
+class ServiceMetrics:
+    """Thread-safe request counters, latency percentiles, throughput and batch sizes for /metrics."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.responses = collections.defaultdict(collections.Counter)
+        self.latencies = collections.defaultdict(lambda: collections.deque(maxlen=LATENCY_SAMPLES))
+        self.worker_times = collections.defaultdict(lambda: collections.deque(maxlen=LATENCY_SAMPLES))
+        self.completed = collections.deque()
+        self.rejected = 0
+        self.timeouts = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.largest_batch = 0
+        self.worker_restarts = 0
+
+    def record(self, endpoint, status, latency, worker_time=None):
+        now = time.time()
+        with self.lock:
+            self.responses[endpoint][status] += 1
+            self.latencies[endpoint].append(latency)
+            if worker_time is not None:
+                self.worker_times[endpoint].append(worker_time)
+            self.completed.append(now)
+            while self.completed and self.completed[0] < now - THROUGHPUT_WINDOW:
+                self.completed.popleft()
+
+    def record_rejected(self):
+        with self.lock:
+            self.rejected += 1
+
+    def record_restart(self):
+        with self.lock:
+            self.worker_restarts += 1
+
+    def record_timeout(self):
+        with self.lock:
+            self.timeouts += 1
+
+    def record_batch(self, size):
+        with self.lock:
+            self.batches += 1
+            self.batched_requests += size
+            self.largest_batch = max(self.largest_batch, size)
+
+    def snapshot(self, **gauges):
+        """Return every metric as a JSON-serializable dict; latencies are in milliseconds."""
+        now = time.time()
+        with self.lock:
+            uptime = now - self.started
+            total = sum(sum(counts.values()) for counts in self.responses.values())
+            recent = sum(1 for stamp in self.completed if stamp >= now - THROUGHPUT_WINDOW)
+            return dict(gauges, **{
+                'uptime_s': round(uptime, 3),
+                'requests': {endpoint: {str(status): number for status, number in sorted(counts.items())}
+                             for endpoint, counts in self.responses.items()},
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'worker_restarts': self.worker_restarts,
+                'latency_ms': {endpoint: _summarize(samples) for endpoint, samples in self.latencies.items()},
+                'worker_ms': {endpoint: _summarize(samples) for endpoint, samples in self.worker_times.items()},
+                'throughput_rps': {'overall': round(total / uptime, 3) if uptime > 0 else 0.0,
+                                   'last_60s': round(recent / min(uptime, THROUGHPUT_WINDOW), 3) if uptime > 0 else 0.0},
+                'batches': {'count': self.batches, 'largest': self.largest_batch,
+                            'mean_size': round(self.batched_requests / self.batches, 3) if self.batches else 0.0},
+            })
+
+
+def _summarize(samples):
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def percentile(fraction):
+        return round(1000 * ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+    return {'count': len(ordered), 'mean': round(1000 * sum(ordered) / len(ordered), 3), 'p50': percentile(0.5),
+            'p95': percentile(0.95), 'p99': percentile(0.99), 'max': round(1000 * ordered[-1], 3)}
+
+
+class _Request:
+    def __init__(self, kind, payload, options):
+        self.kind = kind
+        self.job = (kind, payload, options)
+        self.future = Future()
+        self.received = time.perf_counter()
+
+
+class GeometryService:
+    """Converts and renders geometries in a pool of warm worker processes.
+
+    Requests wait in a bounded queue; a dispatcher thread groups whatever arrives within the batch window
+    into per-worker batches and keeps at most two batches per worker in flight, so a saturated pool fills
+    the queue and further requests are refused with ServiceBusy instead of piling up.
+    """
+
+    def __init__(self, workers=None, batch_size=DEFAULT_BATCH_SIZE, batch_window=DEFAULT_BATCH_WINDOW_MS / 1000,
+                 max_pending=DEFAULT_MAX_PENDING, timeout=DEFAULT_TIMEOUT):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.metrics = ServiceMetrics()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._slots = threading.BoundedSemaphore(2 * self.workers)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._broken = None
+        self._closing = threading.Event()
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+
+    def start(self):
+        """Start and warm up every worker process, then begin dispatching; returns self."""
+        self._executor = self._start_workers()
+        self._dispatcher.start()
+        return self
+
+    def submit(self, kind, payload, options):
+        """Queue a 'convert' or 'render' job; returns a Future of (status, content type, body, worker seconds)."""
+        if self._closing.is_set():
+            raise ServiceBusy("service is shutting down")
+        request = _Request(kind, payload, options)
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            self.metrics.record_rejected()
+            raise ServiceBusy(f"{self._queue.maxsize} requests already pending")
+        return request.future
+
+    def snapshot(self):
+        return self.metrics.snapshot(workers=self.workers, pending=self._queue.qsize(), in_flight=self._in_flight)
+
+    def close(self):
+        """Stop accepting requests, finish the batches already sent to workers and shut the pool down.
+
+        Requests still waiting in the queue fail with ServiceBusy.
+        """
+        self._closing.set()
+        while True:  # Make room for the stop marker; never block on a full queue
+            try:
+                self._queue.put_nowait(None)
+                break
+            except queue.Full:
+                self._fail_pending()
+        self._dispatcher.join()
+        self._fail_pending()  # Anything submitted while closing, behind the stop marker
+        self._executor.shutdown(cancel_futures=True)
+
+    def _fail_pending(self):
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(request, _Request):
+                request.future.set_exception(ServiceBusy("service is shutting down"))
+
+    def _start_workers(self):
+        # Spawned rather than forked: the pool may be restarted while server threads hold locks.
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=_warm_worker)
+        # Workers are spawned on demand; one no-op job each brings them all up before the first request.
+        for future in [executor.submit(_process_batch, []) for _ in range(self.workers)]:
+            future.result()
+        return executor
+
+    def _dispatch(self):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            if request is _RESTART:
+                self._restart_if_broken()
+                continue
+            requests = [request]
+            deadline = time.perf_counter() + self.batch_window
+            closing = False
+            while len(requests) < self.batch_size * self.workers:
+                try:
+                    request = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if request is None:
+                    closing = True
+                    break
+                if request is not _RESTART:
+                    requests.append(request)
+
+            # Spread the gathered requests over the workers so batching never serializes independent work.
+            per_batch = min(self.batch_size, -(-len(requests) // self.workers))
+            for start in range(0, len(requests), per_batch):
+                self._submit_batch(requests[start:start + per_batch])
+            if closing:
+                return
+
+    def _submit_batch(self, batch):
+        self._restart_if_broken()
+        self._slots.acquire()
+        with self._lock:
+            self._in_flight += len(batch)
+        self.metrics.record_batch(len(batch))
+        executor = self._executor
+        try:
+            future = executor.submit(_process_batch, [request.job for request in batch])
+        except BrokenProcessPool as e:
+            self._finish_batch(batch, executor, None, e)
+            return
+        future.add_done_callback(lambda done: self._finish_batch(batch, executor, done, None))
+
+    def _finish_batch(self, batch, executor, done, error):
+        if done is not None:
+            error = CancelledError() if done.cancelled() else done.exception()
+        with self._lock:
+            self._in_flight -= len(batch)
+        self._slots.release()
+        if error is None:
+            for request, result in zip(batch, done.result()):
+                request.future.set_result(result)
+            return
+        for request in batch:
+            request.future.set_exception(error)
+        if isinstance(error, BrokenProcessPool):
+            # This may run in a done-callback on the pool's own thread; starting workers here would block it.
+            with self._lock:
+                self._broken = executor
+            try:
+                self._queue.put_nowait(_RESTART)
+            except queue.Full:
+                pass  # The dispatcher restarts the pool before it submits the next queued batch
+
+    def _restart_if_broken(self):
+        """Replace a pool whose worker died; called only on the dispatcher thread, once per broken pool."""
+        with self._lock:
+            broken, self._broken = self._broken, None
+        if broken is None or broken is not self._executor:
+            return
+        print("Worker pool broke; starting new workers", file=sys.stderr)
+        broken.shutdown(wait=False)
+        self._executor = self._start_workers()
+        self.metrics.record_restart()
+
+
+class GeometryRequestHandler(BaseHTTPRequestHandler):
+    """POST /convert and /render with the geometry file as the body; GET /metrics and /health."""
+
+    server_version = "GeometryService/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/metrics':
+            self._reply(200, 'application/json', json.dumps(self.server.service.snapshot(), indent=1).encode())
+        elif path == '/health':
+            self._reply(200, 'text/plain; charset=utf-8', b"ok\n")
+        else:
+            self._reply(404, 'text/plain; charset=utf-8', b"Not found\n")
+
+    def do_POST(self):
+        received = time.perf_counter()
+        url = urlsplit(self.path)
+        kind = url.path.strip('/')
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return self.send_error(400, "Invalid Content-Length")
+        if kind not in ('convert', 'render'):
+            return self._reject(404, "Not found", length)
+        if length > MAX_BODY_BYTES:
+            return self._reject(413, f"Body larger than {MAX_BODY_BYTES} bytes", length)
+        payload = self.rfile.read(length)
+        try:
+            if not payload:
+                raise ValueError("Empty request body; send the geometry file as the body")
+            options = parse_options(kind, parse_qs(url.query))
+        except ValueError as e:
+            self.server.service.metrics.record(kind, 400, time.perf_counter() - received)
+            return self._reply(400, 'text/plain; charset=utf-8', f"{e}\n".encode())
+
+        service = self.server.service
+        try:
+            future = service.submit(kind, payload, options)
+        except ServiceBusy as e:
+            return self._reply(503, 'text/plain; charset=utf-8', f"Service busy: {e}\n".encode(), {'Retry-After': '1'})
+        try:
+            status, content_type, body, worker_time = future.result(timeout=service.timeout)
+        except FutureTimeoutError:
+            service.metrics.record_timeout()
+            status, content_type, body, worker_time = 504, 'text/plain; charset=utf-8', b"Timed out\n", None
+        except Exception as e:
+            status, content_type, body, worker_time = (500, 'text/plain; charset=utf-8',
+                                                       f"{type(e).__name__}: {e}\n".encode(), None)
+        service.metrics.record(kind, status, time.perf_counter() - received, worker_time)
+        self._reply(status, content_type, body)
+
+    def _reject(self, status, message, length):
+        if length <= MAX_BODY_BYTES:
+            self.rfile.read(length)
+        else:
+            self.close_connection = True
+        self._reply(status, 'text/plain; charset=utf-8', f"{message}\n".encode())
+
+    def _reply(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    request_queue_size = LISTEN_BACKLOG
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ('unix', 0)
+
+
+def make_server(service, host='127.0.0.1', port=8765, unix_socket=None, verbose=False):
+    """Create a threaded HTTP server for `service` on a TCP port or, with `unix_socket`, a Unix socket path."""
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = _UnixHTTPServer(unix_socket, GeometryRequestHandler)
+    else:
+        server = _HTTPServer((host, port), GeometryRequestHandler)
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve geometry conversion and rendering over HTTP with warm workers.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="Listen on a Unix socket instead of a TCP port")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Requests per worker round trip")
+    parser.add_argument("--batch-window-ms", type=float, default=DEFAULT_BATCH_WINDOW_MS,
+                        help="How long to gather concurrent requests into one batch")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="Queued requests before new ones get 503")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds before a request gets 504")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    service = GeometryService(args.workers, args.batch_size, args.batch_window_ms / 1000, args.max_pending,
+                              args.timeout).start()
+    server = make_server(service, args.host, args.port, args.unix, args.verbose)
+    where = args.unix or f"http://{args.host}:{server.server_address[1]}"
+    print(f"Serving with {service.workers} warm workers on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+    return 0
+
+
+if __name__ == "__main__":
+    configure_from_environment()
+    sys.exit(main())
@@ -0,0 +1,224 @@
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from Reader_and_convertor import GeometryReaderAndConverter
+from Visualizer import GeometryVisualizer
+from bonds import perceive_bonds
+from geometry import Geometry
+from trajectory import Trajectory, count_xyz_frames
+from batch_convert import DEFAULT_INPUT_EXTENSIONS, collect_input_files
+from instrumentation import configure_from_environment, timed
+
+# (elevation, azimuth) camera angles in degrees; the first is matplotlib's default view.
+DEFAULT_VIEWS = ((30, -60),)
+# Only multi-frame XYZ files are picked up from directories in --trajectory mode.
+TRAJECTORY_EXTENSIONS = ('.xyz',)
+
+_renderer = None
+_reader_converter = None
+
+
+class HeadlessRenderer:
+    """Renders geometries to image files on the Agg backend, reusing one Figure for every image."""
+
+    def __init__(self, width=400, height=400, dpi=100, views=DEFAULT_VIEWS, formats=('png',),
+                 show_bonds=True, show_labels=False, show_images=False):
+        self.dpi = dpi
+        self.views = tuple(views)
+        self.formats = tuple(formats)
+        self.show_bonds = show_bonds
+        self.show_labels = show_labels
+        self.show_images = show_images
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from mpl_toolkits.mplot3d import Axes3D  # Registers the '3d' projection on older matplotlib
+
+        self.visualizer = GeometryVisualizer()
+        self.figure = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot(111, projection='3d')
+
+    @timed('render')
+    def render(self, geometry, output_stem, bonds=None, title=None):
+        """Render every view in every format to `output_stem[_view<k>].<format>`; returns the written paths."""
+        self._draw(geometry, bonds, title)
+        paths = []
+        for view_index, (elevation, azimuth) in enumerate(self.views):
+            self.ax.view_init(elev=elevation, azim=azimuth)
+            suffix = f"_view{view_index}" if len(self.views) > 1 else ""
+            for image_format in self.formats:
+                path = f"{output_stem}{suffix}.{image_format}"
+                self.figure.savefig(path, format=image_format, dpi=self.dpi)
+                paths.append(path)
+        return paths
+
+    @timed('render_image')
+    def render_image(self, geometry, image_format='png', bonds=None, title=None, view=None):
+        """Render one view, the first of `views` by default, and return the encoded image bytes."""
+        self._draw(geometry, bonds, title)
+        elevation, azimuth = view if view is not None else self.views[0]
+        self.ax.view_init(elev=elevation, azim=azimuth)
+        buffer = io.BytesIO()
+        self.figure.savefig(buffer, format=image_format, dpi=self.dpi)
+        return buffer.getvalue()
+
+    def _draw(self, geometry, bonds, title):
+        if bonds is None and self.show_bonds:
+            bonds = perceive_bonds(geometry)
+        self.ax.clear()
+        self.visualizer.draw_geometry(self.ax, geometry, bonds if self.show_bonds else None,
+                                      show_labels=self.show_labels, show_images=self.show_images)
+        self.visualizer.set_equal_limits(self.ax, geometry.coordinates, geometry.lattice, int(self.show_images))
+        if title:
+            self.ax.set_title(title)
+
+    def close(self):
+        self.figure.clear()
+
+
+def _get_renderer(renderer_options):
+    global _renderer, _reader_converter
+    if _renderer is None:
+        _renderer = HeadlessRenderer(**renderer_options)
+        _reader_converter = GeometryReaderAndConverter()
+    return _renderer
+
+
+def _render_file(job):
+    input_path, output_stem, input_unit, renderer_options = job
+    try:
+        renderer = _get_renderer(renderer_options)
+        geometry = _reader_converter.read_geometry(input_path, input_unit)
+        os.makedirs(os.path.dirname(output_stem) or '.', exist_ok=True)
+        return input_path, renderer.render(geometry, output_stem), None
+    except Exception as e:
+        return input_path, [], f"{type(e).__name__}: {e}"
+
+
+def _render_frames(job):
+    frames_path, atomic_numbers, unit, lattice, bonds, frame_indices, output_prefix, renderer_options = job
+    try:
+        renderer = _get_renderer(renderer_options)
+        trajectory = Trajectory.load(frames_path, atomic_numbers, unit)
+        paths = []
+        for index in frame_indices:
+            geometry = Geometry(atomic_numbers, trajectory.frame(index), unit, lattice)
+            paths.extend(renderer.render(geometry, f"{output_prefix}{index:06d}", bonds))
+        return f"frames {frame_indices[0]}-{frame_indices[-1]}", paths, None
+    except Exception as e:
+        return f"frames {frame_indices[0]}-{frame_indices[-1]}", [], f"{type(e).__name__}: {e}"
+
+
+def render_files(input_files, output_dir, input_unit='bohr', workers=None, chunk_size=8, **renderer_options):
+    """Render (input path, output relative path) pairs in a process pool; returns a summary dict."""
+    jobs = [(input_path, os.path.join(output_dir, os.path.splitext(relative_path)[0]), input_unit, renderer_options)
+            for input_path, relative_path in input_files]
+    return _run_jobs(_render_file, jobs, workers, chunk_size)
+
+
+def render_trajectory(file_path, output_dir, input_unit='bohr', workers=None, frames_per_job=16, **renderer_options):
+    """Render every frame of a multi-frame XYZ file, sharing one memory-mapped frame store between workers."""
+    trajectory = Trajectory.from_xyz(file_path, input_unit)
+    trajectory.trim()
+    trajectory.flush()
+    bonds = perceive_bonds(trajectory.geometry(0)) if renderer_options.get('show_bonds', True) else None
+    os.makedirs(output_dir, exist_ok=True)
+    output_prefix = os.path.join(output_dir, os.path.splitext(os.path.basename(file_path))[0] + "_frame")
+    jobs = [(trajectory.path, trajectory.atomic_numbers, trajectory.unit, trajectory.lattice, bonds,
+             list(range(start, min(start + frames_per_job, len(trajectory)))), output_prefix, renderer_options)
+            for start in range(0, len(trajectory), frames_per_job)]
+    try:
+        return _run_jobs(_render_frames, jobs, workers, 1)
+    finally:
+        trajectory.close()
+
+
+def _run_jobs(function, jobs, workers, chunk_size):
+    start = time.perf_counter()
+    images = 0
+    errors = []
+    executor = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    try:
+        if executor is None:
+            results = map(function, jobs)
+        else:
+            results = executor.map(function, jobs, chunksize=chunk_size)
+        for name, paths, error in results:
+            if error is not None:
+                errors.append((name, error))
+                print(f"Failed to render {name}: {error}", file=sys.stderr)
+            images += len(paths)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    elapsed = time.perf_counter() - start
+    return {
+        "jobs": len(jobs),
+        "failed": len(errors),
+        "errors": errors,
+        "images": images,
+        "seconds": elapsed,
+        "images_per_second": images / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _parse_view(text):
+    elevation, azimuth = text.split(',')
+    return float(elevation), float(azimuth)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render thumbnails of geometry files without a display.")
+    parser.add_argument("inputs", nargs="+", help="Input files, glob patterns or directories")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for the images")
+    parser.add_argument("--trajectory", action="store_true", help="Render every frame of multi-frame XYZ inputs")
+    parser.add_argument("--input-unit", default="bohr", choices=["angstrom", "bohr"])
+    parser.add_argument("--size", type=int, nargs=2, default=(400, 400), metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--views", type=_parse_view, nargs="+", default=list(DEFAULT_VIEWS),
+                        metavar="ELEV,AZIM", help="Camera angles in degrees, one image per view")
+    parser.add_argument("--formats", nargs="+", default=["png"], help="Image formats, e.g. png svg jpg")
+    parser.add_argument("--no-bonds", action="store_true")
+    parser.add_argument("--labels", action="store_true", help="Draw element labels (small molecules only)")
+    parser.add_argument("--images", action="store_true", help="Draw the atoms of neighboring cells for periodic inputs")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    renderer_options = dict(width=args.size[0], height=args.size[1], dpi=args.dpi, views=args.views,
+                            formats=args.formats, show_bonds=not args.no_bonds, show_labels=args.labels,
+                            show_images=args.images)
+    extensions = TRAJECTORY_EXTENSIONS if args.trajectory else DEFAULT_INPUT_EXTENSIONS
+    input_files = collect_input_files(args.inputs, extensions)
+    if not input_files:
+        print("No input files found.", file=sys.stderr)
+        return 1
+
+    failed = 0
+    if args.trajectory:
+        for input_path, _ in input_files:
+            try:
+                if count_xyz_frames(input_path) == 0:
+                    continue
+                summary = render_trajectory(input_path, args.output_dir, args.input_unit, args.workers,
+                                            **renderer_options)
+            except Exception as e:  # Not a readable XYZ trajectory; report it and go on, like render_files
+                failed += 1
+                print(f"Failed to render {input_path}: {type(e).__name__}: {e}", file=sys.stderr)
+                continue
+            failed += summary['failed']
+            print(f"{input_path}: {summary['images']} images in {summary['seconds']:.2f} s "
+                  f"({summary['images_per_second']:.1f} images/s)")
+    else:
+        summary = render_files(input_files, args.output_dir, args.input_unit, args.workers, **renderer_options)
+        failed = summary['failed']
+        print(f"Rendered {summary['images']} images from {summary['jobs'] - summary['failed']}/{summary['jobs']} "
+              f"files in {summary['seconds']:.2f} s ({summary['images_per_second']:.1f} images/s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    configure_from_environment()
+    sys.exit(main())
@@ -0,0 +1,216 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+PROFILE_ENVIRONMENT_VARIABLE = "MOLECULE_VISUALIZER_PROFILE"
+
+_enabled = False
+_sinks = []
+_sinks_lock = threading.Lock()
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Times the enclosed block and emits a 'span' event to every sink on exit."""
+
+    __slots__ = ('name', 'attributes', 'start')
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        event = {'type': 'span', 'name': self.name, 'seconds': time.perf_counter() - self.start,
+                 'time': time.time(), 'thread': threading.current_thread().name}
+        if exc_type is not None:
+            event['error'] = exc_type.__name__
+        event.update(self.attributes)
+        _emit(event)
+        return False
+
+
+def span(name, **attributes):
+    """Context manager timing a block; a shared no-op object while instrumentation is disabled."""
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, attributes)
+
+
+def timed(name):
+    """Decorator that wraps every call in `span(name)`."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with Span(name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """Add `value` to the counter `name`."""
+    if _enabled:
+        _emit({'type': 'counter', 'name': name, 'value': value, 'time': time.time()})
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable(*sinks):
+    global _enabled
+    for sink in sinks:
+        add_sink(sink)
+    _enabled = True
+
+
+def disable():
+    """Stop recording and close every sink."""
+    global _enabled
+    _enabled = False
+    with _sinks_lock:
+        sinks = list(_sinks)
+        _sinks.clear()
+    for sink in sinks:
+        sink.close()
+
+
+def add_sink(sink):
+    with _sinks_lock:
+        if sink not in _sinks:
+            _sinks.append(sink)
+
+
+def remove_sink(sink):
+    """Detach and close `sink`; instrumentation is disabled once no sinks remain."""
+    global _enabled
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+        if not _sinks:
+            _enabled = False
+    sink.close()
+
+
+def _emit(event):
+    for sink in _sinks:
+        sink.record(event)
+
+
+class LoggingSink:
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger("molecule_visualizer")
+        self.level = level
+
+    def record(self, event):
+        if event['type'] == 'span':
+            self.logger.log(self.level, "%s took %.3f ms", event['name'], event['seconds'] * 1000)
+        else:
+            self.logger.log(self.level, "%s += %s", event['name'], event['value'])
+
+    def close(self):
+        pass
+
+
+class JsonLinesSink:
+    """Appends one JSON object per event, tagged with the process id, to a file.
+
+    The file is line buffered in append mode, so every event is written as one whole line as soon as it is
+    recorded. Worker processes forked from the configuring process can then share the file without repeating
+    buffered events or splitting lines.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', buffering=1)
+        self._lock = threading.Lock()
+
+    def record(self, event):
+        line = json.dumps(dict(event, pid=os.getpid()))
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class StatsCollector:
+    """Aggregates span timings (calls, total, max) and counter totals in memory."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, event):
+        with self._lock:
+            if event['type'] == 'span':
+                calls, total, longest = self.spans.get(event['name'], (0, 0.0, 0.0))
+                self.spans[event['name']] = (calls + 1, total + event['seconds'], max(longest, event['seconds']))
+            else:
+                self.counters[event['name']] = self.counters.get(event['name'], 0) + event['value']
+
+    def reset(self):
+        with self._lock:
+            self.spans = {}
+            self.counters = {}
+
+    def summary(self):
+        with self._lock:
+            return {
+                'spans': {name: {'calls': calls, 'total_seconds': total, 'max_seconds': longest}
+                          for name, (calls, total, longest) in self.spans.items()},
+                'counters': dict(self.counters),
+            }
+
+    def format_summary(self):
+        summary = self.summary()
+        lines = [f"{'Span':<28}{'Calls':>8}{'Total ms':>12}{'Max ms':>10}"]
+        for name, stats in sorted(summary['spans'].items(), key=lambda item: -item[1]['total_seconds']):
+            lines.append(f"{name:<28}{stats['calls']:>8}{stats['total_seconds'] * 1000:>12.1f}"
+                         f"{stats['max_seconds'] * 1000:>10.1f}")
+        if summary['counters']:
+            lines.append("")
+            lines.append(f"{'Counter':<28}{'Total':>8}")
+            for name, total in sorted(summary['counters'].items()):
+                lines.append(f"{name:<28}{total:>8}")
+        return "\n".join(lines)
+
+    def close(self):
+        pass
+
+
+def configure_from_environment():
+    """Enable a sink from MOLECULE_VISUALIZER_PROFILE: 'log' for logging, any other value is a JSON lines path.
+
+    Only the command-line entry points call this, once at start-up; importing a module never opens a sink.
+    """
+    target = os.environ.get(PROFILE_ENVIRONMENT_VARIABLE)
+    if not target:
+        return
+    if target == 'log':
+        logging.basicConfig(level=logging.INFO)
+        enable(LoggingSink())
+    else:
+        enable(JsonLinesSink(target))
+
@@ -0,0 +1,227 @@
+import numpy as np
+
+
+class ConvergenceCriteria:
+    """Force and energy-change thresholds; a run converges when all of them are met."""
+
+    def __init__(self, rms_force=1e-4, max_force=3e-4, energy_change=1e-8):
+        self.rms_force = rms_force
+        self.max_force = max_force
+        self.energy_change = energy_change
+
+    def is_converged(self, gradient, energy_change):
+        rms_force, max_force = force_norms(gradient)
+        return (rms_force <= self.rms_force and max_force <= self.max_force
+                and abs(energy_change) <= self.energy_change)
+
+
+class OptimizationResult:
+    def __init__(self, coordinates, energy, gradient, steps, converged, stalled=False):
+        self.coordinates = coordinates
+        self.energy = energy
+        self.gradient = gradient
+        self.steps = steps
+        self.converged = converged
+        self.stalled = stalled
+        self.rms_force, self.max_force = force_norms(gradient)
+
+    def __repr__(self):
+        return (f"OptimizationResult(energy={self.energy:.6g}, steps={self.steps}, converged={self.converged}, "
+                f"stalled={self.stalled}, rms_force={self.rms_force:.3g}, max_force={self.max_force:.3g})")
+
+
+def force_norms(gradient):
+    """Return the RMS and largest per-atom force magnitude of an (N, 3) gradient."""
+    if gradient.size == 0:
+        return 0.0, 0.0
+    atom_forces = np.linalg.norm(gradient.reshape(-1, 3), axis=1)
+    return float(np.sqrt(np.mean(atom_forces ** 2))), float(atom_forces.max())
+
+
+class Minimizer:
+    """Base class for minimizers of an `energy_and_gradient(coordinates)` function.
+
+    The callback is called after every iteration as
+    `callback(step, coordinates, energy, gradient)`; returning True stops the run. A step that cannot lower the
+    energy sets `stalled`, which also stops the run, unconverged.
+    """
+    name = None
+
+    def __init__(self, max_steps=1000, criteria=None, max_step_size=0.2):
+        self.max_steps = max_steps
+        self.criteria = criteria or ConvergenceCriteria()
+        self.max_step_size = max_step_size
+        self.stalled = False
+
+    def minimize(self, energy_and_gradient, coordinates, callback=None):
+        coordinates = np.array(coordinates, dtype=np.float64)
+        energy, gradient = energy_and_gradient(coordinates)
+        self.reset(coordinates, energy, gradient)
+        self.stalled = False
+        converged = self.criteria.is_converged(gradient, 0.0)
+        step = 0
+        while not converged and step < self.max_steps:
+            step += 1
+            coordinates, new_energy, gradient = self.step(energy_and_gradient, coordinates, energy, gradient)
+            converged = self.criteria.is_converged(gradient, new_energy - energy)
+            energy = new_energy
+            if callback is not None and callback(step, coordinates, energy, gradient):
+                break
+            if self.stalled:  # Every further step would start from the same point and fail the same way
+                break
+        return OptimizationResult(coordinates, energy, gradient, step, converged, self.stalled and not converged)
+
+    def reset(self, coordinates, energy, gradient):
+        pass
+
+    def step(self, energy_and_gradient, coordinates, energy, gradient):
+        raise NotImplementedError
+
+    def _limit_step(self, displacement):
+        largest = np.linalg.norm(displacement.reshape(-1, 3), axis=1).max(initial=0.0)
+        if largest > self.max_step_size:
+            displacement = displacement * (self.max_step_size / largest)
+        return displacement
+
+
+class GradientDescentMinimizer(Minimizer):
+    """Fixed-step steepest descent, as the original optimizer did."""
+    name = 'gradient_descent'
+
+    def __init__(self, learning_rate=0.001, **kwargs):
+        super().__init__(**kwargs)
+        self.learning_rate = learning_rate
+
+    def step(self, energy_and_gradient, coordinates, energy, gradient):
+        coordinates = coordinates - self._limit_step(self.learning_rate * gradient)
+        energy, gradient = energy_and_gradient(coordinates)
+        return coordinates, energy, gradient
+
+
+class LBFGSMinimizer(Minimizer):
+    """Limited-memory BFGS with a backtracking (Armijo) line search."""
+    name = 'lbfgs'
+
+    def __init__(self, memory=10, armijo=1e-4, max_line_search=20, **kwargs):
+        super().__init__(**kwargs)
+        self.memory = memory
+        self.armijo = armijo
+        self.max_line_search = max_line_search
+
+    def reset(self, coordinates, energy, gradient):
+        self.s_history = []
+        self.y_history = []
+
+    def step(self, energy_and_gradient, coordinates, energy, gradient):
+        g = gradient.ravel()
+        direction = -self._two_loop(g)
+        if np.dot(direction, g) >= 0:  # Not a descent direction, restart from steepest descent
+            self.reset(coordinates, energy, gradient)
+            direction = -g
+        accepted = self._line_search(energy_and_gradient, coordinates, energy, g, direction)
+        if accepted is None and self.s_history:
+            # The quasi-Newton direction found no decrease: drop the curvature pairs and take a small
+            # steepest-descent step instead (the two-loop recursion without history scales -g to length 0.1)
+            self.reset(coordinates, energy, gradient)
+            accepted = self._line_search(energy_and_gradient, coordinates, energy, g, -self._two_loop(g))
+        if accepted is None:  # Reject the step rather than move uphill, and stop the run
+            self.reset(coordinates, energy, gradient)
+            self.stalled = True
+            return coordinates, energy, gradient
+        new_coordinates, new_energy, new_gradient = accepted
+
+        s = (new_coordinates - coordinates).ravel()
+        y = (new_gradient - gradient).ravel()
+        if np.dot(s, y) > 1e-12:  # Keep only pairs with positive curvature
+            self.s_history.append(s)
+            self.y_history.append(y)
+            if len(self.s_history) > self.memory:
+                self.s_history.pop(0)
+                self.y_history.pop(0)
+        return new_coordinates, new_energy, new_gradient
+
+    def _line_search(self, energy_and_gradient, coordinates, energy, g, direction):
+        """Backtrack along `direction` until the Armijo condition holds; None if it never does."""
+        direction = self._limit_step(direction.reshape(coordinates.shape))
+        step_length = 1.0
+        slope = np.dot(direction.ravel(), g)
+        for _ in range(self.max_line_search):
+            new_coordinates = coordinates + step_length * direction
+            new_energy, new_gradient = energy_and_gradient(new_coordinates)
+            if new_energy <= energy + self.armijo * step_length * slope:
+                return new_coordinates, new_energy, new_gradient
+            step_length *= 0.5
+        return None
+
+    def _two_loop(self, g):
+        q = g.copy()
+        alphas = []
+        for s, y in zip(reversed(self.s_history), reversed(self.y_history)):
+            rho = 1.0 / np.dot(y, s)
+            alpha = rho * np.dot(s, q)
+            q -= alpha * y
+            alphas.append((rho, alpha))
+        if self.s_history:
+            s, y = self.s_history[-1], self.y_history[-1]
+            q *= np.dot(s, y) / np.dot(y, y)
+        else:
+            q *= 0.1 / max(np.linalg.norm(g), 1e-12)
+        for (s, y), (rho, alpha) in zip(zip(self.s_history, self.y_history), reversed(alphas)):
+            beta = rho * np.dot(y, q)
+            q += (alpha - beta) * s
+        return q
+
+
+class FIREMinimizer(Minimizer):
+    """Fast Inertial Relaxation Engine (Bitzek et al., 2006) with unit masses."""
+    name = 'fire'
+
+    def __init__(self, time_step=0.1, max_time_step=1.0, min_steps_before_increase=5, time_step_increase=1.1,
+                 time_step_decrease=0.5, alpha_start=0.1, alpha_decrease=0.99, **kwargs):
+        super().__init__(**kwargs)
+        self.initial_time_step = time_step
+        self.max_time_step = max_time_step
+        self.min_steps_before_increase = min_steps_before_increase
+        self.time_step_increase = time_step_increase
+        self.time_step_decrease = time_step_decrease
+        self.alpha_start = alpha_start
+        self.alpha_decrease = alpha_decrease
+
+    def reset(self, coordinates, energy, gradient):
+        self.velocity = np.zeros_like(coordinates)
+        self.time_step = self.initial_time_step
+        self.alpha = self.alpha_start
+        self.steps_since_reset = 0
+
+    def step(self, energy_and_gradient, coordinates, energy, gradient):
+        forces = -gradient
+        power = np.vdot(forces, self.velocity)
+        if power > 0:
+            force_norm = np.linalg.norm(forces)
+            velocity_norm = np.linalg.norm(self.velocity)
+            self.velocity = ((1 - self.alpha) * self.velocity
+                             + self.alpha * forces * velocity_norm / max(force_norm, 1e-12))
+            self.steps_since_reset += 1
+            if self.steps_since_reset > self.min_steps_before_increase:
+                self.time_step = min(self.time_step * self.time_step_increase, self.max_time_step)
+                self.alpha *= self.alpha_decrease
+        else:
+            self.velocity[:] = 0.0
+            self.time_step *= self.time_step_decrease
+            self.alpha = self.alpha_start
+            self.steps_since_reset = 0
+
+        self.velocity += self.time_step * forces
+        coordinates = coordinates + self._limit_step(self.time_step * self.velocity)
+        energy, gradient = energy_and_gradient(coordinates)
+        return coordinates, energy, gradient
+
+
+MINIMIZERS = {minimizer.name: minimizer for minimizer in (LBFGSMinimizer, FIREMinimizer, GradientDescentMinimizer)}
+
+
+def get_minimizer(method, **kwargs):
+    """Create the minimizer registered under `method` ('lbfgs', 'fire' or 'gradient_descent')."""
+    if method not in MINIMIZERS:
+        raise ValueError(f"Unsupported optimization method: {method}")
+    return MINIMIZERS[method](**kwargs)
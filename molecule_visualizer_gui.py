@@ -1,14 +1,27 @@
+import queue
 import tkinter as tk
 from tkinter import filedialog, ttk
 from Reader_and_convertor import GeometryReaderAndConverter
 from Visualizer import GeometryVisualizer
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import numpy as np
+from geometry import as_geometry, unit_conversion_factor
+from bonds import perceive_bonds
+from geometry_cache import GeometryCache, default_cache_dir
+from scene import MoleculeScene
 from advanced_options import AdvancedOptions
+from trajectory_controls import TrajectoryControls
+from instrumentation import configure_from_environment, timed
+from stats_panel import StatsPanel
+from file_loader import FileLoader
+
+ZOOM_COALESCE_MS = 30
+LOAD_POLL_MS = 50
 
 class MoleculeVisualizerApp:
     def __init__(self, root):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from mpl_toolkits.mplot3d import Axes3D  # Registers the '3d' projection on older matplotlib
+
         self.root = root
         self.root.title("Molecule Visualizer and Converter")
         self.style = ttk.Style()
@@ -19,6 +32,7 @@ class MoleculeVisualizerApp:
 
         self.reader_converter = GeometryReaderAndConverter()
         self.visualizer = GeometryVisualizer()
+        self.geometry_cache = GeometryCache(cache_dir=default_cache_dir())
 
         self.frame = ttk.Frame(root, padding="10")
         self.frame.grid(row=0, column=0, padx=10, pady=10)
@@ -41,8 +55,19 @@ class MoleculeVisualizerApp:
         self.input_unit_dropdown = ttk.OptionMenu(self.frame, self.input_unit_var, "bohr", "bohr", "angstrom")
         self.input_unit_dropdown.grid(row=3, column=1, padx=5)
 
-        self.load_button = ttk.Button(self.frame, text="Load Geometry from File", command=self.load_geometry_file)
-        self.load_button.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
+        self.load_frame = ttk.Frame(self.frame)
+        self.load_frame.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
+        self.load_button = ttk.Button(self.load_frame, text="Load Geometry from File", command=self.load_geometry_file)
+        self.load_button.grid(row=0, column=0, padx=5)
+        self.load_cancel_button = ttk.Button(self.load_frame, text="Cancel", command=self.cancel_file_load,
+                                             state=tk.DISABLED)
+        self.load_cancel_button.grid(row=0, column=1, padx=5)
+        self.load_progress = ttk.Progressbar(self.load_frame, length=150, maximum=1.0)
+        self.load_progress.grid(row=1, column=0, padx=5, sticky="EW")
+        self.load_status = ttk.Label(self.load_frame, text="")
+        self.load_status.grid(row=1, column=1, padx=5, sticky="W")
+        self.file_loader = None
+        self.loaded_file = None
 
         self.output_label = ttk.Label(self.frame, text="Output Settings")
         self.output_label.grid(row=5, column=0, columnspan=2, sticky="W", pady=10)
@@ -55,7 +80,7 @@ class MoleculeVisualizerApp:
         self.output_format_label = ttk.Label(self.frame, text="Output Format (GAMESS or XYZ)")
         self.output_format_label.grid(row=7, column=0, sticky="W")
         self.output_format_var = tk.StringVar(self.frame)
-        self.output_format_dropdown = ttk.OptionMenu(self.frame, self.output_format_var, "xyz", "xyz", "gamess")
+        self.output_format_dropdown = ttk.OptionMenu(self.frame, self.output_format_var, "xyz", "xyz", "gamess", "binary")
         self.output_format_dropdown.grid(row=7, column=1, padx=5)
 
         self.output_unit_label = ttk.Label(self.frame, text="Output Unit (Angstrom or Bohr)")
@@ -69,53 +94,142 @@ class MoleculeVisualizerApp:
 
         self.show_bonds_var = tk.IntVar(value=1)
         self.show_bonds_checkbox = ttk.Checkbutton(self.frame, text="Show Bonds", variable=self.show_bonds_var)
-        self.show_bonds_checkbox.grid(row=10, column=0, columnspan=2)
+        self.show_bonds_checkbox.grid(row=10, column=0)
+        self.show_images_var = tk.IntVar(value=0)
+        self.show_images_checkbox = ttk.Checkbutton(self.frame, text="Show Periodic Images",
+                                                    variable=self.show_images_var)
+        self.show_images_checkbox.grid(row=10, column=1)
 
-        self.fig = plt.figure(figsize=(7, 7))
+        self.fig = Figure(figsize=(7, 7))
         self.ax = self.fig.add_subplot(111, projection='3d')
         self.canvas = FigureCanvasTkAgg(self.fig, master=root)
         self.canvas.get_tk_widget().grid(row=11, column=0, columnspan=2, padx=10, pady=10)
+        # draw_idle() ends in canvas.draw(); wrapping the instance attribute times every real redraw.
+        self.canvas.draw = timed('canvas.draw')(self.canvas.draw)
 
         self.canvas.mpl_connect('scroll_event', self.zoom)
 
         self.zoom_factor = 1.0
+        self.geometry = None
+        self.bonds = None
+        self.scene = MoleculeScene(self.ax, self.visualizer)
+        self._pending_zoom = 1.0
         self.create_fullscreen_button()
 
         self.advanced_options = AdvancedOptions(root, self)
+        self.trajectory_controls = TrajectoryControls(root, self)
 
     def create_fullscreen_button(self):
         self.fullscreen_button = ttk.Button(self.frame, text="Toggle Fullscreen", command=self.toggle_fullscreen)
         self.fullscreen_button.grid(row=12, column=0, columnspan=2, pady=10)
+        self.stats_button = ttk.Button(self.frame, text="Performance Stats", command=self.show_stats_panel)
+        self.stats_button.grid(row=13, column=0, columnspan=2)
+        self.stats_panel = None
+
+    def show_stats_panel(self):
+        if self.stats_panel is None or self.stats_panel.collector is None:
+            self.stats_panel = StatsPanel(self.root)
+        else:
+            self.stats_panel.window.lift()
 
     def toggle_fullscreen(self):
         is_fullscreen = self.root.attributes('-fullscreen')
         self.root.attributes('-fullscreen', not is_fullscreen)
         self.canvas.get_tk_widget().config(width=self.root.winfo_width(), height=self.root.winfo_height())
-        self.canvas.draw()
+        self.canvas.draw_idle()
 
     def zoom(self, event):
         if event.button == 'up':
-            self.zoom_factor *= 1.1
+            step = 1.1
         elif event.button == 'down':
-            self.zoom_factor /= 1.1
-
-        xlim = self.ax.get_xlim()
-        ylim = self.ax.get_ylim()
-        zlim = self.ax.get_zlim()
-
-        self.ax.set_xlim([x * self.zoom_factor for x in xlim])
-        self.ax.set_ylim([y * self.zoom_factor for y in ylim])
-        self.ax.set_zlim([z * self.zoom_factor for z in zlim])
-
-        self.canvas.draw()
+            step = 1 / 1.1
+        else:
+            return
+        self.zoom_factor *= step
+
+        # Coalesce a burst of scroll ticks into one limit change and one redraw.
+        if self._pending_zoom == 1.0:
+            self.root.after(ZOOM_COALESCE_MS, self.apply_pending_zoom)
+        self._pending_zoom *= step
+
+    def apply_pending_zoom(self):
+        factor, self._pending_zoom = self._pending_zoom, 1.0
+        for get_limits, set_limits in ((self.ax.get_xlim, self.ax.set_xlim),
+                                       (self.ax.get_ylim, self.ax.set_ylim),
+                                       (self.ax.get_zlim, self.ax.set_zlim)):
+            low, high = get_limits()
+            middle, half_range = (low + high) / 2, (high - low) / 2 * factor
+            set_limits(middle - half_range, middle + half_range)
+        self.canvas.draw_idle()
 
     def load_geometry_file(self):
         file_path = filedialog.askopenfilename()
-        with open(file_path, 'r') as file:
-            geometry_data = file.read()
-        self.geometry_textbox.delete(1.0, tk.END)
-        self.geometry_textbox.insert(tk.END, geometry_data)
+        if not file_path:
+            return
+        if self.file_loader is not None:
+            self.file_loader.cancel()
+        self.file_loader = FileLoader(file_path, self.input_unit_var.get(), self.reader_converter).start()
+        self.load_cancel_button.config(state=tk.NORMAL)
+        self.load_progress.config(value=0.0)
+        self.load_status.config(text="Reading...")
+        self.root.after(LOAD_POLL_MS, self.poll_file_loader, self.file_loader)
+
+    def cancel_file_load(self):
+        if self.file_loader is not None:
+            self.file_loader.cancel()
+            self.load_status.config(text="Cancelling...")
+
+    def poll_file_loader(self, loader):
+        if loader is not self.file_loader:
+            return  # Superseded by a newer load; its messages are ignored.
+        while True:
+            try:
+                message = loader.messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == 'progress':
+                _, stage, fraction = message
+                self.load_progress.config(value=fraction)
+                self.load_status.config(text=f"{stage} {fraction:.0%}")
+                continue
+            self.file_loader = None
+            self.load_cancel_button.config(state=tk.DISABLED)
+            if message[0] == 'done':
+                self.show_loaded_file(message[1])
+            elif message[0] == 'cancelled':
+                self.load_progress.config(value=0.0)
+                self.load_status.config(text="Cancelled")
+            else:
+                self.load_status.config(text=f"Failed: {message[1]}")
+                print(f"Failed to load {loader.file_path}: {message[1]}")
+            return
+        self.root.after(LOAD_POLL_MS, self.poll_file_loader, loader)
 
+    def show_loaded_file(self, loaded_file):
+        """Show a parsed file: its text (or a preview) in the text box and its geometry on the canvas."""
+        self.loaded_file = loaded_file
+        self.geometry_textbox.delete(1.0, tk.END)
+        self.geometry_textbox.insert(tk.END, loaded_file.preview)
+        cache_key = self.geometry_cache.make_key(loaded_file.cache_text, loaded_file.input_unit, "file")
+        self.geometry_cache.put(cache_key, loaded_file.geometry, loaded_file.bonds)
+        self.geometry = loaded_file.geometry.copy()
+        self.visualize_with_bonds(self.geometry, loaded_file.bonds)
+        self.canvas.draw_idle()
+        self.load_progress.config(value=1.0)
+        self.load_status.config(text=f"Loaded {len(self.geometry)} atoms" + (" (preview)" if loaded_file.truncated else ""))
+
+    def loaded_file_entry(self, input_unit):
+        """Cache entry for the loaded file in `input_unit`, re-using the parsed geometry instead of the preview text."""
+        loaded_file = self.loaded_file
+        cache_key = self.geometry_cache.make_key(loaded_file.cache_text, input_unit, "file")
+        entry = self.geometry_cache.get(cache_key)
+        if entry is None:
+            factor = unit_conversion_factor(loaded_file.geometry.unit, input_unit)
+            entry = self.geometry_cache.put(cache_key, loaded_file.geometry.converted(input_unit),
+                                            loaded_file.bonds.scaled(factor))
+        return entry
+
+    @timed('convert_and_visualize')
     def convert_and_visualize(self):
         input_unit = self.input_unit_var.get()
         input_format = self.input_format_var.get()
@@ -127,62 +241,34 @@ class MoleculeVisualizerApp:
             print("Please provide a valid output file name.")
             return
 
-        geometry_data = self.geometry_textbox.get(1.0, tk.END).strip().splitlines()
-
-        with open("temp_geometry.txt", 'w') as temp_file:
-            for line in geometry_data:
-                temp_file.write(f"{line}\n")
-
-        self.geometry = self.reader_converter.read_geometry("temp_geometry.txt", input_unit)
-        self.reader_converter.save_converted_geometry(self.geometry, output_format, output_file, output_unit)
-
-        self.ax.clear()
-        self.visualize_with_bonds(self.geometry)
-        self.canvas.draw()
-
-    def visualize_with_bonds(self, geometry):
-        atoms = np.array([[atom['x'], atom['y'], atom['z']] for atom in geometry])
-        labels = [atom['symbol'] for atom in geometry]
-
-        self.ax.scatter(atoms[:, 0], atoms[:, 1], atoms[:, 2], s=100, color='b')
-
-        for i in range(len(atoms)):
-            self.ax.text(atoms[i, 0], atoms[i, 1], atoms[i, 2], labels[i], size=12, zorder=1, color='k')
-
-        if self.show_bonds_var.get():
-            self.draw_bonds(atoms)
-
-        max_range = np.ptp(atoms, axis=0).max()
-        mid_x, mid_y, mid_z = np.mean(atoms, axis=0)
-        self.ax.set_xlim(mid_x - max_range / 2, mid_x + max_range / 2)
-        self.ax.set_ylim(mid_y - max_range / 2, mid_y + max_range / 2)
-        self.ax.set_zlim(mid_z - max_range / 2, mid_z + max_range / 2)
-
-    def draw_bonds(self, atoms):
-        bond_thresholds = {
-            "single": 1.6,
-            "double": 1.3,
-            "triple": 1.2,
-        }
-
-        for i in range(len(atoms)):
-            for j in range(i + 1, len(atoms)):
-                distance = np.linalg.norm(atoms[i] - atoms[j])
-
-                if distance <= bond_thresholds["triple"]:
-                    self.ax.plot([atoms[i, 0], atoms[j, 0]],
-                                 [atoms[i, 1], atoms[j, 1]],
-                                 [atoms[i, 2], atoms[j, 2]], 'r-', lw=4)
-                elif distance <= bond_thresholds["double"]:
-                    self.ax.plot([atoms[i, 0], atoms[j, 0]],
-                                 [atoms[i, 1], atoms[j, 1]],
-                                 [atoms[i, 2], atoms[j, 2]], 'g-', lw=3)
-                elif distance <= bond_thresholds["single"]:
-                    self.ax.plot([atoms[i, 0], atoms[j, 0]],
-                                 [atoms[i, 1], atoms[j, 1]],
-                                 [atoms[i, 2], atoms[j, 2]], 'b-', lw=2)
+        geometry_text = self.geometry_textbox.get(1.0, tk.END).strip()
+        if self.loaded_file is not None and geometry_text == self.loaded_file.preview.strip():
+            entry = self.loaded_file_entry(input_unit)
+        else:
+            cache_key = self.geometry_cache.make_key(geometry_text, input_unit, input_format)
+            entry = self.geometry_cache.get(cache_key)
+            if entry is None:
+                geometry = self.reader_converter.parse_geometry(geometry_text, input_unit)
+                entry = self.geometry_cache.put(cache_key, geometry, perceive_bonds(geometry))
+
+        self.geometry = entry.geometry.copy()
+        # The cached geometry is streamed to the file in chunks; the converted text is never held in memory.
+        self.reader_converter.save_converted_geometry(entry.geometry, output_format, output_file, output_unit)
+        print(f"Geometry saved to {output_file}")
+
+        self.visualize_with_bonds(self.geometry, entry.bonds)
+        self.canvas.draw_idle()
+
+    @timed('visualize_with_bonds')
+    def visualize_with_bonds(self, geometry, bonds=None):
+        geometry = as_geometry(geometry)
+        self.bonds = bonds if bonds is not None else perceive_bonds(geometry)
+        show_images = bool(self.show_images_var.get())
+        self.scene.show(geometry, self.bonds, show_bonds=bool(self.show_bonds_var.get()), show_images=show_images)
+        self.visualizer.set_equal_limits(self.ax, geometry.coordinates, geometry.lattice, int(show_images))
 
 if __name__ == "__main__":
+    configure_from_environment()
     root = tk.Tk()
     app = MoleculeVisualizerApp(root)
     root.mainloop()
@@ -1,8 +1,26 @@
+import logging
+import queue
+import threading
+import time
 import numpy as np
+from geometry import as_geometry
+from force_field import ForceField, NonbondedTerms, Topology, ideal_bond_length
+from minimizers import get_minimizer
+from trajectory import TrajectoryRecorder
+from instrumentation import count, span
+
+# Progress of optimizations run without a callback goes to this logger every PROGRESS_LOG_INTERVAL steps.
+logger = logging.getLogger("molecule_visualizer.optimization")
+PROGRESS_LOG_INTERVAL = 100
 
 class GeometryOptimizer:
-    def __init__(self, geometry):
-        self.geometry = geometry
+    def __init__(self, geometry, bonds=None, charges=None, nonbonded=True):
+        self.geometry = as_geometry(geometry)
+        self.topology = Topology.from_geometry(self.geometry, bonds)
+        self.nonbonded = NonbondedTerms(self.geometry, self.topology, charges) if nonbonded else None
+        self.force_field = ForceField(self.topology, nonbonded=self.nonbonded, lattice=self.geometry.lattice)
+        self.result = None
+        self.trajectory = None
 
     def calculate_bond_length(self, atom1, atom2):
         return np.linalg.norm(np.array([atom1['x'], atom1['y'], atom1['z']]) - np.array([atom2['x'], atom2['y'], atom2['z']]))
@@ -14,62 +32,94 @@ class GeometryOptimizer:
         return np.arccos(np.clip(cos_theta, -1.0, 1.0))
 
     def calculate_energy(self):
-        energy = 0
-        bond_constant = 1.0
-        angle_constant = 0.5
-        ideal_bond_angle = np.pi / 2  
-        
-        # Bond stretching energy
-        for i in range(len(self.geometry)):
-            for j in range(i + 1, len(self.geometry)):
-                bond_length = self.calculate_bond_length(self.geometry[i], self.geometry[j])
-                r0 = self.get_ideal_bond_length(self.geometry[i]['symbol'], self.geometry[j]['symbol'])
-                energy += 0.5 * bond_constant * (bond_length - r0) ** 2
-        
-        # Angle bending energy
-        for i in range(len(self.geometry)):
-            for j in range(i + 1, len(self.geometry)):
-                for k in range(j + 1, len(self.geometry)):
-                    angle = self.calculate_bond_angle(self.geometry[i], self.geometry[j], self.geometry[k])
-                    energy += 0.5 * angle_constant * (angle - ideal_bond_angle) ** 2
-        
-        return energy
-
-    def optimize(self, learning_rate=0.001, max_steps=1000):
-        for step in range(max_steps):
-            forces = self.calculate_forces()
-            for i, atom in enumerate(self.geometry):
-                atom['x'] -= learning_rate * forces[i][0]
-                atom['y'] -= learning_rate * forces[i][1]
-                atom['z'] -= learning_rate * forces[i][2]
-
-            if step % 100 == 0:
-                print(f"Step {step}, Energy: {self.calculate_energy()}")
+        return self.force_field.energy(self.geometry.coordinates)
+
+    def calculate_energy_and_gradient(self):
+        return self.force_field.energy_and_gradient(self.geometry.coordinates)
+
+    def optimize(self, learning_rate=0.001, max_steps=1000, method='lbfgs', criteria=None, callback=None,
+                 record_trajectory=False):
+        if method == 'gradient_descent':
+            minimizer = get_minimizer(method, learning_rate=learning_rate, max_steps=max_steps, criteria=criteria)
+        else:
+            minimizer = get_minimizer(method, max_steps=max_steps, criteria=criteria)
+        if callback is None:
+            callback = self._log_progress
+        if record_trajectory:
+            callback = TrajectoryRecorder(self.geometry, callback=callback)
+            self.trajectory = callback.trajectory
+        with span('optimize', method=method, atoms=len(self.geometry)):
+            self.result = minimizer.minimize(self.force_field.energy_and_gradient, self.geometry.coordinates, callback)
+        count('optimizer_steps', self.result.steps)
+        self.geometry.coordinates[:] = self.result.coordinates
         return self.geometry
 
+    def _log_progress(self, step, coordinates, energy, gradient):
+        if step % PROGRESS_LOG_INTERVAL == 0:
+            logger.info("Step %d, Energy: %s", step, energy)
+
     def calculate_forces(self):
-        forces = []
-        bond_constant = 1.0
-        for i in range(len(self.geometry)):
-            force = np.zeros(3)
-            for j in range(len(self.geometry)):
-                if i != j:
-                    bond_length = self.calculate_bond_length(self.geometry[i], self.geometry[j])
-                    r0 = self.get_ideal_bond_length(self.geometry[i]['symbol'], self.geometry[j]['symbol'])
-                    bond_vector = np.array([self.geometry[i]['x'] - self.geometry[j]['x'],
-                                            self.geometry[i]['y'] - self.geometry[j]['y'],
-                                            self.geometry[i]['z'] - self.geometry[j]['z']])
-                    force += bond_constant * (bond_length - r0) * bond_vector / bond_length
-            forces.append(force)
-        return forces
+        """Return the energy gradient for the current coordinates (the optimizer steps against it)."""
+        return self.calculate_energy_and_gradient()[1]
 
     def get_ideal_bond_length(self, atom1_symbol, atom2_symbol):
-        bond_lengths = {
-            ('C', 'C'): 1.54,
-            ('C', 'H'): 1.09,
-            ('N', 'N'): 1.45,
-            ('C', 'N'): 1.47,
-            ('N', 'H'): 1.01,
-            ('H', 'H'): 0.74
-        }
-        return bond_lengths.get((atom1_symbol, atom2_symbol), 1.5)  
+        return ideal_bond_length(atom1_symbol, atom2_symbol)
+
+
+class OptimizationWorker:
+    """Runs a GeometryOptimizer in a background thread and streams progress through a queue.
+
+    Messages are ('progress', [(step, energy), ...], coordinates), then one of
+    ('done', result, geometry) or ('error', exception). With `record_trajectory`
+    every step is kept in `self.trajectory`.
+    """
+
+    def __init__(self, geometry, bonds=None, method='lbfgs', max_steps=1000, snapshot_interval=1 / 15,
+                 record_trajectory=False):
+        self.geometry = as_geometry(geometry).copy()
+        self.record_trajectory = record_trajectory
+        self.trajectory = None
+        self.bonds = bonds
+        self.method = method
+        self.max_steps = max_steps
+        self.snapshot_interval = snapshot_interval
+        self.messages = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._pending_energies = []
+        self._last_snapshot = 0.0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        try:
+            optimizer = GeometryOptimizer(self.geometry, self.bonds)
+            optimizer.optimize(method=self.method, max_steps=self.max_steps, callback=self._report,
+                               record_trajectory=self.record_trajectory)
+            self.trajectory = optimizer.trajectory
+            if self._pending_energies:
+                self.messages.put(('progress', self._pending_energies, self.geometry.coordinates.copy()))
+            self.messages.put(('done', optimizer.result, self.geometry))
+        except Exception as e:
+            self.messages.put(('error', e))
+
+    def _report(self, step, coordinates, energy, gradient):
+        self._pending_energies.append((step, energy))
+        now = time.monotonic()
+        if now - self._last_snapshot >= self.snapshot_interval:
+            self.messages.put(('progress', self._pending_energies, coordinates.copy()))
+            self._pending_energies = []
+            self._last_snapshot = now
+        return self._cancel_event.is_set()
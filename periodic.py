@@ -0,0 +1,83 @@
+import itertools
+import re
+import numpy as np
+from geometry import Geometry
+
+# Lattice vectors are the rows of a (3, 3) array, in the same unit as the coordinates they belong to.
+LATTICE_PATTERN = re.compile(r'Lattice\s*=\s*"([^"]*)"', re.IGNORECASE)
+# The twelve edges of the unit cell as pairs of fractional corner coordinates.
+CELL_EDGES = np.array([(corner, tuple(1 if axis == flip else value for axis, value in enumerate(corner)))
+                       for corner in itertools.product((0, 1), repeat=3)
+                       for flip in range(3) if corner[flip] == 0], dtype=np.float64)
+
+
+def parse_lattice(comment):
+    """Return the (3, 3) lattice of an extended XYZ comment line, or None if it has no Lattice="..." entry."""
+    match = LATTICE_PATTERN.search(comment)
+    if match is None:
+        return None
+    values = match.group(1).split()
+    if len(values) != 9:
+        raise ValueError(f"Lattice needs 9 numbers, got {len(values)}: {match.group(1)!r}")
+    lattice = np.array(values, dtype=np.float64).reshape(3, 3)
+    if abs(np.linalg.det(lattice)) < 1e-12:
+        raise ValueError("Lattice vectors are linearly dependent.")
+    return lattice
+
+
+def format_lattice(lattice):
+    """Return the extended XYZ Lattice="..." pbc="T T T" entry for a (3, 3) lattice."""
+    return 'Lattice="%s" pbc="T T T"' % " ".join(f"{value:.8f}" for value in np.ravel(lattice))
+
+
+def fractional_coordinates(coordinates, lattice):
+    return np.asarray(coordinates, dtype=np.float64) @ np.linalg.inv(lattice)
+
+
+def wrap(coordinates, lattice):
+    """Translate every position into the unit cell, 0 <= fractional coordinate < 1."""
+    fractional = fractional_coordinates(coordinates, lattice)
+    return (fractional - np.floor(fractional)) @ lattice
+
+
+def minimum_image(vectors, lattice):
+    """Replace difference vectors of shape (..., 3) by their nearest periodic image.
+
+    Exact for orthorhombic cells and for vectors shorter than half the narrowest cell width; more
+    strongly skewed cells should be reduced or expanded into a supercell first.
+    """
+    if lattice is None:
+        return vectors
+    fractional = fractional_coordinates(vectors, lattice)
+    return (fractional - np.round(fractional)) @ lattice
+
+
+def perpendicular_widths(lattice):
+    """Distances between opposite faces of the cell, one per lattice vector."""
+    lattice = np.asarray(lattice, dtype=np.float64)
+    volume = abs(np.linalg.det(lattice))
+    return volume / np.linalg.norm(np.cross(lattice[[1, 2, 0]], lattice[[2, 0, 1]]), axis=1)
+
+
+def image_shifts(repeats):
+    """Integer (S, 3) shifts of every neighboring cell within `repeats` cells along each axis, excluding (0, 0, 0)."""
+    ranges = [range(-count, count + 1) for count in np.broadcast_to(repeats, 3)]
+    return np.array([shift for shift in itertools.product(*ranges) if any(shift)], dtype=np.int64).reshape(-1, 3)
+
+
+def cell_edges(lattice, origin=(0.0, 0.0, 0.0)):
+    """Return the (12, 2, 3) segments outlining the unit cell."""
+    return CELL_EDGES @ np.asarray(lattice, dtype=np.float64) + np.asarray(origin, dtype=np.float64)
+
+
+def supercell(geometry, repeats):
+    """Return a Geometry with the cell repeated `repeats` (one count or three) times along each lattice vector."""
+    repeats = np.broadcast_to(np.asarray(repeats, dtype=np.int64), 3)
+    if geometry.lattice is None:
+        raise ValueError("Only periodic geometries can be expanded into a supercell.")
+    if np.any(repeats < 1):
+        raise ValueError(f"Supercell repeats must be positive, got {repeats.tolist()}.")
+    shifts = np.indices(repeats).reshape(3, -1).T @ geometry.lattice
+    coordinates = (geometry.coordinates[None, :, :] + shifts[:, None, :]).reshape(-1, 3)
+    atomic_numbers = np.tile(geometry.atomic_numbers, len(shifts))
+    return Geometry(atomic_numbers, coordinates, geometry.unit, geometry.lattice * repeats[:, None])
@@ -0,0 +1,111 @@
+import numpy as np
+from geometry import as_geometry
+from instrumentation import timed
+from Visualizer import bond_segments, image_coordinates
+
+
+class MoleculeScene:
+    """Keeps the artists of one displayed molecule so coordinate changes only move them."""
+
+    def __init__(self, ax, visualizer):
+        self.ax = ax
+        self.visualizer = visualizer
+        self.geometry = None
+        self.coordinates = None
+        self.bonds = None
+        self.atom_artist = None
+        self.bond_artists = {}
+        self.label_artists = []
+        self.annotation_artists = []
+        self.cell_artist = None
+        self.image_artist = None
+        self.show_images = False
+
+    @timed('scene.show')
+    def show(self, geometry, bonds=None, show_bonds=True, show_labels=True, show_images=False):
+        """Display `geometry`, reusing the existing artists when the atoms and cell are unchanged."""
+        geometry = as_geometry(geometry)
+        same_atoms = (self.geometry is not None and self.atom_artist is not None
+                      and np.array_equal(self.geometry.atomic_numbers, geometry.atomic_numbers)
+                      and _same_lattice(self.geometry.lattice, geometry.lattice)
+                      and self.show_images == show_images)
+        if not same_atoms:
+            self.clear()
+            self.geometry = geometry
+            self.coordinates = geometry.coordinates
+            self.show_images = show_images
+            self.atom_artist = self.visualizer.draw_atoms(self.ax, geometry)
+            if show_labels:
+                self.label_artists = self.visualizer.draw_labels(self.ax, geometry)
+            if geometry.lattice is not None:
+                self.cell_artist = self.visualizer.draw_cell(self.ax, geometry.lattice)
+                if show_images:
+                    self.image_artist = self.visualizer.draw_images(self.ax, geometry)
+        else:
+            self.geometry = geometry
+            self.update_coordinates(geometry.coordinates)
+
+        self.set_bonds(bonds if show_bonds else None)
+
+    @timed('scene.update_coordinates')
+    def update_coordinates(self, coordinates):
+        """Move atoms, bonds and labels to new coordinates without creating artists."""
+        coordinates = np.asarray(coordinates, dtype=np.float64)
+        self.coordinates = coordinates
+        self.remove_annotations()
+        if self.atom_artist is None:
+            return
+        self.atom_artist._offsets3d = (coordinates[:, 0], coordinates[:, 1], coordinates[:, 2])
+        for text, position in zip(self.label_artists, coordinates):
+            text.set_position_3d(position)
+        if self.image_artist is not None:
+            images = image_coordinates(coordinates, self.geometry.lattice)
+            self.image_artist._offsets3d = (images[:, 0], images[:, 1], images[:, 2])
+        if self.bonds is not None:
+            for order, collection in self.bond_artists.items():
+                collection.set_segments(self._bond_segments(order))
+
+    def set_bonds(self, bonds):
+        if bonds is self.bonds:
+            return
+        for collection in self.bond_artists.values():
+            collection.remove()
+        self.bond_artists = {}
+        self.bonds = bonds
+        if bonds is not None and len(bonds):
+            self.bond_artists = self.visualizer.draw_bonds(self.ax, self.coordinates, bonds, self.geometry.lattice)
+
+    def set_atom_colors(self, colors):
+        if self.atom_artist is not None:
+            self.atom_artist.set_facecolor(colors)
+
+    def add_annotation(self, position, text, **kwargs):
+        x, y, z = position
+        self.annotation_artists.append(self.ax.text(x, y, z, text, **kwargs))
+
+    def remove_annotations(self):
+        for artist in self.annotation_artists:
+            artist.remove()
+        self.annotation_artists = []
+
+    def clear(self):
+        self.ax.clear()
+        self.geometry = None
+        self.coordinates = None
+        self.bonds = None
+        self.atom_artist = None
+        self.bond_artists = {}
+        self.label_artists = []
+        self.annotation_artists = []
+        self.cell_artist = None
+        self.image_artist = None
+        self.show_images = False
+
+    def _bond_segments(self, order):
+        return bond_segments(self.coordinates, self.bonds, self.bonds.order == order, self.geometry.lattice)
+
+
+def _same_lattice(first, second):
+    if first is None or second is None:
+        return first is None and second is None
+    return np.array_equal(first, second)
@@ -0,0 +1,35 @@
+import tkinter as tk
+from tkinter import ttk
+import instrumentation
+from instrumentation import StatsCollector
+
+STATS_REFRESH_MS = 500
+
+class StatsPanel:
+    """A window listing span timings and counters while it is open; closing it stops collection."""
+
+    def __init__(self, root):
+        self.root = root
+        self.collector = StatsCollector()
+        instrumentation.enable(self.collector)
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Performance Stats")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.text = tk.Text(self.window, height=24, width=60, font=("Courier", 10))
+        self.text.grid(row=0, column=0, columnspan=2, padx=5, pady=5)
+        ttk.Button(self.window, text="Reset", command=self.collector.reset).grid(row=1, column=0, pady=5)
+        ttk.Button(self.window, text="Close", command=self.close).grid(row=1, column=1, pady=5)
+        self.refresh()
+
+    def refresh(self):
+        if self.collector is None:
+            return
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, self.collector.format_summary())
+        self.root.after(STATS_REFRESH_MS, self.refresh)
+
+    def close(self):
+        instrumentation.remove_sink(self.collector)
+        self.collector = None
+        self.window.destroy()
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from analysis import (AnalysisCancelled, TrajectoryAnalysisWorker, TrajectoryReport, angles, dihedrals, distances,
+                      rmsd)
+from bonds import perceive_bonds
+from geometry import Geometry
+from trajectory import Trajectory
+
+ETHANE = Geometry([6, 6, 1, 1, 1, 1, 1, 1],
+                  [[0.0, 0.0, 0.0], [1.54, 0.0, 0.0],
+                   [-0.36, 1.03, 0.0], [-0.36, -0.51, 0.89], [-0.36, -0.51, -0.89],
+                   [1.90, -1.03, 0.0], [1.90, 0.51, 0.89], [1.90, 0.51, -0.89]])
+
+
+def _frames(count=37):
+    rng = np.random.default_rng(0)
+    return ETHANE.coordinates + rng.normal(scale=0.05, size=(count, len(ETHANE), 3))
+
+
+def test_internal_coordinates():
+    coordinates = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [1.0, 1.0, 0.0], [1.0, 1.0, 1.0]])
+    assert distances(coordinates, [[0, 1]]) == pytest.approx([1.0])
+    assert angles(coordinates, [[0, 1, 2]]) == pytest.approx([90.0])
+    assert abs(dihedrals(coordinates, [[0, 1, 2, 3]])[0]) == pytest.approx(90.0)
+
+
+def test_rmsd_ignores_rigid_motion():
+    angle = np.radians(30)
+    rotation = np.array([[np.cos(angle), -np.sin(angle), 0], [np.sin(angle), np.cos(angle), 0], [0, 0, 1]])
+    moved = ETHANE.coordinates @ rotation.T + [1.0, 2.0, 3.0]
+    assert rmsd(moved, ETHANE.coordinates) == pytest.approx(0.0, abs=1e-10)
+    assert rmsd(moved, ETHANE.coordinates, superpose=False) > 1.0
+
+
+def test_chunked_report_matches_single_chunk():
+    frames = _frames()
+    bonds = perceive_bonds(ETHANE)
+    whole = TrajectoryReport(frames, ETHANE.atomic_numbers, bonds=bonds, chunk_frames=len(frames))
+    chunked = TrajectoryReport(frames, ETHANE.atomic_numbers, bonds=bonds, chunk_frames=5)
+    for name in ('bond_lengths', 'bond_angles', 'dihedral_angles', 'centroids', 'centers_of_mass', 'rmsd'):
+        np.testing.assert_allclose(getattr(chunked, name), getattr(whole, name))
+    assert chunked.bond_lengths.shape == (len(frames), 7)
+    assert chunked.rmsd[0] == pytest.approx(0.0, abs=1e-10)
+
+
+def test_progress_can_cancel():
+    calls = []
+
+    def progress(done, total):
+        calls.append(done)
+        return done >= 10
+
+    with pytest.raises(AnalysisCancelled):
+        TrajectoryReport(_frames(), ETHANE.atomic_numbers, chunk_frames=5, progress=progress)
+    assert calls == [5, 10]
+
+
+def test_worker_reports_memory_mapped_trajectory():
+    trajectory = Trajectory(ETHANE.atomic_numbers)
+    for coordinates in _frames(20):
+        trajectory.append(coordinates)
+    worker = TrajectoryAnalysisWorker(trajectory).start()
+    messages = []
+    while not messages or messages[-1][0] == 'progress':
+        messages.append(worker.messages.get(timeout=10))
+    assert messages[-1][0] == 'done'
+    assert len(messages[-1][1]) == 20
+    trajectory.close()
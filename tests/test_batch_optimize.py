@@ -0,0 +1,26 @@
+import numpy as np
+from batch_optimize import JOBS_IN_FLIGHT_PER_WORKER, optimize_structures
+from geometry import Geometry
+
+
+def _structures(count, consumed):
+    for index in range(count):
+        consumed.append(index)
+        yield f"h2_{index}", Geometry([1, 1], [[0.0, 0.0, 0.0], [0.8 + 0.01 * index, 0.0, 0.0]])
+
+
+def test_structures_are_consumed_lazily():
+    consumed = []
+    results = optimize_structures(_structures(12, consumed), max_steps=200, workers=2)
+    first = next(results)
+    assert len(consumed) <= 2 * JOBS_IN_FLIGHT_PER_WORKER
+    records = [first] + list(results)
+    assert sorted(record['index'] for record in records) == list(range(12))
+    assert all(record['error'] is None and record['converged'] for record in records)
+
+
+def test_single_worker_keeps_input_order():
+    records = list(optimize_structures(_structures(3, []), max_steps=200, workers=1))
+    assert [record['index'] for record in records] == [0, 1, 2]
+    bond_lengths = [np.linalg.norm(np.diff(record['coordinates'], axis=0)) for record in records]
+    np.testing.assert_allclose(bond_lengths, bond_lengths[0], rtol=1e-3)
@@ -0,0 +1,68 @@
+import io
+import numpy as np
+from binary_format import append_binary_frames, load_binary, save_binary, write_binary
+from bonds import perceive_bonds
+from file_loader import FileLoader
+from geometry import Geometry
+
+LATTICE = np.array([[5.0, 0.0, 0.0], [0.5, 6.0, 0.0], [0.0, 0.0, 7.0]])
+
+
+def _water():
+    return Geometry([8, 1, 1], [[0.0, 0.0, 0.0], [0.96, 0.0, 0.0], [-0.24, 0.93, 0.0]])
+
+
+def test_frames_and_bonds_round_trip(tmp_path):
+    geometry = _water()
+    bonds = perceive_bonds(geometry)
+    frames = np.stack([geometry.coordinates, geometry.coordinates + 1.0])
+    path = tmp_path / "water.mvg"
+    assert save_binary(path, geometry.atomic_numbers, frames, 'angstrom', bonds, np.float64) == 2
+
+    binary = load_binary(path)
+    assert binary.unit == 'angstrom'
+    assert binary.lattice is None
+    np.testing.assert_array_equal(binary.atomic_numbers, geometry.atomic_numbers)
+    np.testing.assert_array_equal(binary.frames, frames)
+    np.testing.assert_array_equal(binary.bonds.pairs, bonds.pairs)
+    np.testing.assert_array_equal(binary.bonds.length, bonds.length)
+
+
+def test_lattice_round_trip_and_append(tmp_path):
+    geometry = _water()
+    path = tmp_path / "periodic.mvg"
+    save_binary(path, geometry.atomic_numbers, [geometry.coordinates], 'bohr', perceive_bonds(geometry),
+                lattice=LATTICE)
+    assert append_binary_frames(path, [geometry.coordinates + 0.5]) == 2
+
+    binary = load_binary(path)
+    assert binary.unit == 'bohr'
+    np.testing.assert_array_equal(binary.lattice, LATTICE)
+    np.testing.assert_allclose(binary.frame(1), geometry.coordinates + 0.5, rtol=1e-6)
+    np.testing.assert_array_equal(binary.geometry(0).lattice, LATTICE)
+
+
+def test_load_from_bytes():
+    geometry = _water()
+    buffer = io.BytesIO()
+    write_binary(buffer, geometry.atomic_numbers, [geometry.coordinates], lattice=LATTICE)
+
+    binary = load_binary(buffer.getvalue())
+    np.testing.assert_array_equal(binary.lattice, LATTICE)
+    np.testing.assert_allclose(binary.frame(0), geometry.coordinates, rtol=1e-6)
+
+
+def test_file_loader_keeps_the_binary_unit(tmp_path):
+    geometry = _water()
+    path = tmp_path / "water.mvg"
+    save_binary(path, geometry.atomic_numbers, [geometry.coordinates], 'angstrom', perceive_bonds(geometry))
+
+    loader = FileLoader(str(path), input_unit='bohr').start()
+    message = loader.messages.get(timeout=10)
+    while message[0] == 'progress':
+        message = loader.messages.get(timeout=10)
+    assert message[0] == 'done'
+    loaded_file = message[1]
+    assert loaded_file.input_unit == 'angstrom'
+    assert loaded_file.geometry.unit == 'angstrom'
+    np.testing.assert_allclose(loaded_file.geometry.coordinates, geometry.coordinates, rtol=1e-6)
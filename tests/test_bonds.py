@@ -0,0 +1,78 @@
+import itertools
+import os
+import numpy as np
+import pytest
+from Reader_and_convertor import GeometryReaderAndConverter
+from bonds import find_pairs_within, find_periodic_pairs_within, perceive_bonds
+from geometry import Geometry
+
+HEPTAZINE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "heptazine.txt")
+
+
+@pytest.mark.parametrize("input_unit", ["angstrom", "bohr"])
+def test_heptazine_bonds(input_unit):
+    geometry = GeometryReaderAndConverter().read_geometry(HEPTAZINE_PATH, input_unit)
+    bonds = perceive_bonds(geometry)
+    assert len(geometry) == 16
+    assert len(bonds) == 18
+    assert set(bonds.order.tolist()) == {1, 2}
+
+
+def _brute_force_pairs(coordinates, cutoff):
+    i, j = np.triu_indices(len(coordinates), 1)
+    distances = np.linalg.norm(coordinates[j] - coordinates[i], axis=1)
+    within = distances <= cutoff
+    return dict(zip(zip(i[within].tolist(), j[within].tolist()), distances[within]))
+
+
+def _brute_force_periodic_pairs(coordinates, lattice, cutoff, reach=2):
+    pairs = {}
+    shifts = np.array(list(itertools.product(range(-reach, reach + 1), repeat=3)))
+    for i in range(len(coordinates)):
+        for j in range(i, len(coordinates)):
+            distances = np.linalg.norm(coordinates[j] + shifts @ lattice - coordinates[i], axis=1)
+            for shift, distance in zip(shifts.tolist(), distances):
+                if distance <= cutoff and (i < j or shift > [0, 0, 0]):
+                    pairs[(i, j, tuple(shift))] = distance
+    return pairs
+
+
+@pytest.mark.parametrize("cutoff", [0.5, 1.7, 4.0])
+def test_find_pairs_within_matches_brute_force(cutoff):
+    coordinates = np.random.default_rng(1).uniform(-5.0, 5.0, size=(300, 3))
+    i, j, distances = find_pairs_within(coordinates, cutoff)
+    assert np.all(i < j)
+    found = dict(zip(zip(i.tolist(), j.tolist()), distances))
+    expected = _brute_force_pairs(coordinates, cutoff)
+    assert found.keys() == expected.keys()
+    np.testing.assert_allclose([found[key] for key in expected], list(expected.values()))
+
+
+@pytest.mark.parametrize("cutoff", [1.5, 3.5])
+def test_find_periodic_pairs_within_matches_brute_force(cutoff):
+    lattice = np.array([[6.0, 0.0, 0.0], [1.5, 5.5, 0.0], [-1.0, 0.5, 7.0]])
+    rng = np.random.default_rng(2)
+    # Some atoms start outside the cell, so wrapping is exercised too.
+    coordinates = rng.uniform(-0.3, 1.3, size=(60, 3)) @ lattice
+    i, j, distances, shifts = find_periodic_pairs_within(coordinates, lattice, cutoff)
+    found = dict(zip(zip(i.tolist(), j.tolist(), map(tuple, shifts.tolist())), distances))
+    assert len(found) == len(i)
+    expected = _brute_force_periodic_pairs(coordinates, lattice, cutoff)
+    assert found.keys() == expected.keys()
+    np.testing.assert_allclose([found[key] for key in expected], list(expected.values()))
+    vectors = coordinates[j] + shifts @ lattice - coordinates[i]
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), distances)
+
+
+def test_small_cell_pairs_atoms_with_their_own_images():
+    lattice = np.eye(3) * 2.0
+    i, j, distances, shifts = find_periodic_pairs_within([[0.5, 0.5, 0.5]], lattice, 2.5)
+    assert set(map(tuple, shifts.tolist())) == {(1, 0, 0), (0, 1, 0), (0, 0, 1)}
+    np.testing.assert_allclose(distances, 2.0)
+
+
+def test_periodic_bonds_cross_cell_faces():
+    geometry = Geometry([6, 6], [[0.75, 2.0, 2.0], [3.25, 2.0, 2.0]], 'angstrom', np.eye(3) * 4.0)
+    bonds = perceive_bonds(geometry)
+    assert bonds.pairs.tolist() == [[0, 1]]
+    np.testing.assert_allclose(bonds.length, 1.5)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from bonds import Bonds
+from force_field import LINEAR_ANGLE, TETRAHEDRAL_ANGLE, TRIGONAL_ANGLE, ForceField, NonbondedTerms, Topology
+from geometry import Geometry
+
+# Butane with hydrogens, slightly distorted so every term has a nonzero gradient.
+BUTANE = Geometry([6, 6, 6, 6, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+                  [[-1.90, -0.30, 0.05], [-0.55, 0.40, -0.02], [0.60, -0.45, 0.03], [1.95, 0.25, 0.01],
+                   [-2.70, 0.45, 0.10], [-2.00, -0.95, 0.92], [-2.05, -0.92, -0.85], [-0.48, 1.05, 0.88],
+                   [-0.50, 1.08, -0.90], [0.55, -1.12, 0.90], [0.52, -1.08, -0.88], [2.75, -0.48, 0.05],
+                   [2.05, 0.88, 0.90], [2.02, 0.90, -0.85]])
+
+
+def _numerical_gradient(force_field, coordinates, step=1e-6):
+    gradient = np.zeros_like(coordinates)
+    for index in np.ndindex(coordinates.shape):
+        plus, minus = coordinates.copy(), coordinates.copy()
+        plus[index] += step
+        minus[index] -= step
+        gradient[index] = (force_field.energy(plus) - force_field.energy(minus)) / (2 * step)
+    return gradient
+
+
+def _force_field(geometry, charges=None, nonbonded=True):
+    topology = Topology.from_geometry(geometry)
+    terms = NonbondedTerms(geometry, topology, charges) if nonbonded else None
+    return ForceField(topology, nonbonded=terms, lattice=geometry.lattice)
+
+
+@pytest.mark.parametrize("nonbonded", [False, True])
+@pytest.mark.parametrize("unit", ["angstrom", "bohr"])
+def test_gradient_matches_finite_differences(nonbonded, unit):
+    geometry = BUTANE.converted(unit)
+    charges = np.where(geometry.atomic_numbers == 6, -0.18, 0.06) if nonbonded else None
+    force_field = _force_field(geometry, charges, nonbonded)
+    _, gradient = force_field.energy_and_gradient(geometry.coordinates)
+    np.testing.assert_allclose(gradient, _numerical_gradient(force_field, geometry.coordinates),
+                               rtol=1e-5, atol=1e-7)
+
+
+def test_periodic_gradient_matches_finite_differences():
+    # The molecule straddles a cell face, so bonded and nonbonded vectors use images.
+    lattice = np.array([[7.0, 0.0, 0.0], [0.5, 7.5, 0.0], [0.0, 0.3, 8.0]])
+    geometry = Geometry(BUTANE.atomic_numbers, BUTANE.coordinates + [0.4, 0.0, 0.0], 'angstrom', lattice)
+    force_field = _force_field(geometry)
+    _, gradient = force_field.energy_and_gradient(geometry.coordinates)
+    np.testing.assert_allclose(gradient, _numerical_gradient(force_field, geometry.coordinates),
+                               rtol=1e-5, atol=1e-7)
+
+
+def test_gradient_sums_to_zero():
+    _, gradient = _force_field(BUTANE, np.full(len(BUTANE), 0.05)).energy_and_gradient(BUTANE.coordinates)
+    np.testing.assert_allclose(gradient.sum(axis=0), 0.0, atol=1e-10)
+
+
+@pytest.mark.parametrize("atomic_numbers, pairs, orders, expected", [
+    ([7, 1, 1, 1], [(0, 1), (0, 2), (0, 3)], [1, 1, 1], TETRAHEDRAL_ANGLE),  # ammonia
+    ([6, 8, 1, 1], [(0, 1), (0, 2), (0, 3)], [2, 1, 1], TRIGONAL_ANGLE),  # formaldehyde
+    ([8, 1, 1], [(0, 1), (0, 2)], [1, 1], TETRAHEDRAL_ANGLE),  # water
+    ([6, 8, 8], [(0, 1), (0, 2)], [2, 2], LINEAR_ANGLE),  # carbon dioxide
+    ([6, 1, 7], [(0, 1), (0, 2)], [1, 3], LINEAR_ANGLE),  # hydrogen cyanide
+])
+def test_reference_angles_follow_bond_orders(atomic_numbers, pairs, orders, expected):
+    geometry = Geometry(atomic_numbers, np.eye(len(atomic_numbers), 3) * 1.5)
+    i, j = np.array(pairs).T
+    topology = Topology.from_geometry(geometry, Bonds(i, j, orders, np.ones(len(pairs))))
+    assert np.all(topology.angles[:, 1] == 0)
+    np.testing.assert_allclose(topology.angle_values, expected)
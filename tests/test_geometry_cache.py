@@ -0,0 +1,82 @@
+import os
+import numpy as np
+from bonds import perceive_bonds
+from geometry import Geometry
+from geometry_cache import GeometryCache
+
+
+def test_make_key_depends_on_text_and_unit():
+    key = GeometryCache.make_key("2\n\nH 0 0 0\nH 0.74 0 0\n", 'angstrom', 'xyz')
+    assert key == GeometryCache.make_key(b"2\n\nH 0 0 0\nH 0.74 0 0\n", 'angstrom', 'xyz')
+    assert key != GeometryCache.make_key("2\n\nH 0 0 0\nH 0.74 0 0\n", 'bohr', 'xyz')
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = GeometryCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, Geometry([1], [[0.0, 0.0, 0.0]]))
+    assert cache.get("a") is not None
+    cache.put("c", Geometry([1], [[0.0, 0.0, 0.0]]))
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_disk_tier_keeps_geometry_and_bonds(tmp_path):
+    geometry = Geometry([6, 8], [[0.0, 0.0, 0.0], [1.2, 0.0, 0.0]], 'angstrom')
+    GeometryCache(cache_dir=tmp_path).put("co", geometry, perceive_bonds(geometry))
+
+    entry = GeometryCache(cache_dir=tmp_path).get("co")
+    np.testing.assert_array_equal(entry.geometry.coordinates, geometry.coordinates)
+    np.testing.assert_array_equal(entry.geometry.atomic_numbers, geometry.atomic_numbers)
+    assert entry.geometry.unit == 'angstrom'
+    assert len(entry.bonds) == 1
+
+
+def test_disk_tier_keeps_entries_without_bonds(tmp_path):
+    geometry = Geometry([1, 1], [[0.0, 0.0, 0.0], [0.74, 0.0, 0.0]])
+    GeometryCache(cache_dir=tmp_path).put("molecule", geometry)
+
+    entry = GeometryCache(cache_dir=tmp_path).get("molecule")
+    assert entry.bonds is None
+    assert entry.geometry.lattice is None
+    assert GeometryCache(cache_dir=tmp_path).get("missing") is None
+
+
+def test_disk_tier_keeps_lattice(tmp_path):
+    geometry = Geometry([6, 6], [[0.0, 0.0, 0.0], [0.7, 0.7, 0.7]], 'angstrom', np.eye(3) * 5.0)
+    GeometryCache(cache_dir=tmp_path).put("periodic", geometry, perceive_bonds(geometry))
+
+    entry = GeometryCache(cache_dir=tmp_path).get("periodic")
+    np.testing.assert_array_equal(entry.geometry.lattice, geometry.lattice)
+    np.testing.assert_array_equal(entry.geometry.coordinates, geometry.coordinates)
+    assert len(entry.bonds) == 1
+
+
+def _set_mtime(path, seconds):
+    os.utime(path, ns=(seconds * 10 ** 9, seconds * 10 ** 9))
+
+
+def test_disk_tier_keeps_most_recently_used_entries(tmp_path):
+    cache = GeometryCache(max_entries=1, cache_dir=tmp_path, max_disk_entries=2)
+    for number, key in enumerate(("a", "b")):
+        cache.put(key, Geometry([1], [[0.0, 0.0, 0.0]]))
+        _set_mtime(tmp_path / f"{key}.npz", 1000 + number)
+    assert GeometryCache(cache_dir=tmp_path).get("a") is not None  # Reading "a" makes "b" the oldest file
+
+    cache.put("c", Geometry([1], [[0.0, 0.0, 0.0]]))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.npz", "c.npz"]
+
+
+def test_disk_tier_stays_within_byte_limit(tmp_path):
+    geometry = Geometry(np.ones(1000, dtype=int), np.zeros((1000, 3)))
+    GeometryCache(cache_dir=tmp_path).put("first", geometry)
+    file_size = (tmp_path / "first.npz").stat().st_size
+    _set_mtime(tmp_path / "first.npz", 1000)
+
+    cache = GeometryCache(cache_dir=tmp_path, max_disk_bytes=int(2.5 * file_size))
+    for number, key in enumerate(("second", "third")):
+        cache.put(key, geometry)
+        _set_mtime(tmp_path / f"{key}.npz", 1001 + number)
+    cache.put("fourth", geometry)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["fourth.npz", "third.npz"]
+    assert "second" in cache  # Still in the memory tier
@@ -0,0 +1,104 @@
+import os
+import signal
+import socket
+import threading
+import time
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from geometry_service import GeometryService, ServiceBusy, make_server, parse_options
+
+WATER = b"3\nwater\nO 0 0 0\nH 0.96 0 0\nH -0.24 0.93 0\n"
+
+
+@pytest.fixture(scope="module")
+def service():
+    service = GeometryService(workers=1, max_pending=4, timeout=60).start()
+    yield service
+    service.close()
+
+
+def test_convert(service):
+    options = parse_options('convert', {'format': ['xyz'], 'input_unit': ['angstrom']})
+    status, content_type, body, _ = service.submit('convert', WATER, options).result(timeout=60)
+    assert status == 200
+    assert body.decode().splitlines()[2].split() == ['O', '0.000000', '0.000000', '0.000000']
+
+
+def test_bad_input_is_a_client_error(service):
+    options = parse_options('convert', {'format': ['xyz']})
+    status, _, body, _ = service.submit('convert', b"2\n\nC 0 0\n", options).result(timeout=60)
+    assert status == 400
+
+
+def test_invalid_content_length_is_a_client_error(service):
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with socket.create_connection(server.server_address[:2], timeout=10) as client:
+            client.sendall(b"POST /convert HTTP/1.1\r\nHost: localhost\r\nContent-Length: lots\r\n\r\n")
+            assert client.recv(1024).split(b"\r\n")[0] == b"HTTP/1.1 400 Invalid Content-Length"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGKILL'), reason="needs SIGKILL")
+def test_broken_pool_is_restarted():
+    service = GeometryService(workers=1, timeout=60).start()
+    try:
+        options = parse_options('convert', {'format': ['xyz']})
+        for pid in list(service._executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        # Requests sent to the broken pool fail; the dispatcher then starts new workers for later ones.
+        deadline = time.monotonic() + 60
+        while service.metrics.worker_restarts == 0 and time.monotonic() < deadline:
+            try:
+                service.submit('convert', WATER, options).result(timeout=60)
+            except Exception:
+                pass
+            time.sleep(0.05)
+        assert service.metrics.worker_restarts == 1
+        status, _, _, _ = service.submit('convert', WATER, options).result(timeout=60)
+        assert status == 200
+    finally:
+        service.close()
+
+
+def test_close_with_full_queue_does_not_block():
+    service = GeometryService(workers=1, max_pending=2, timeout=60).start()
+    options = parse_options('convert', {'format': ['xyz']})
+    # Hold every dispatch slot so the dispatcher stalls and later requests stay queued, then fill the queue.
+    for _ in range(2 * service.workers):
+        service._slots.acquire()
+    futures = [service.submit('convert', WATER, options)]
+    try:
+        while service._queue.qsize():  # Wait for the dispatcher to take it and stall
+            time.sleep(0.01)
+        time.sleep(0.1)
+        futures += [service.submit('convert', WATER, options) for _ in range(2)]
+        with pytest.raises(ServiceBusy):
+            service.submit('convert', WATER, options)
+        queued = service._queue.qsize()
+        assert queued == 2
+
+        closer = threading.Thread(target=service.close, daemon=True)
+        closer.start()
+        deadline = time.monotonic() + 10
+        while sum(_failed_busy(future) for future in futures) < queued and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert sum(_failed_busy(future) for future in futures) == queued
+    finally:
+        for _ in range(2 * service.workers):
+            service._slots.release()
+    closer.join(timeout=60)
+    assert not closer.is_alive()
+    assert all(future.done() for future in futures)
+    with pytest.raises(ServiceBusy):
+        service.submit('convert', WATER, options)
+
+
+def _failed_busy(future):
+    return future.done() and isinstance(future.exception(), ServiceBusy)
@@ -0,0 +1,26 @@
+from headless_renderer import main
+
+WATER_FRAME = "3\nwater\nO 0.0 0.0 0.1173\nH 0.0 0.7572 -0.4692\nH 0.0 -0.7572 -0.4692\n"
+WATER_GAMESS = " $DATA\nwater\nC1\nOXYGEN 8.0 0.0 0.0 0.1173\nHYDROGEN 1.0 0.0 0.7572 -0.4692\n $END\n"
+
+
+def test_trajectory_mode_skips_other_formats_in_directories(tmp_path):
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    (inputs / "water.xyz").write_text(WATER_FRAME * 2)
+    (inputs / "water.inp").write_text(WATER_GAMESS)
+    output_dir = tmp_path / "images"
+
+    assert main([str(inputs), "-o", str(output_dir), "--trajectory", "-j", "1", "--size", "100", "100"]) == 0
+    assert sorted(path.name for path in output_dir.iterdir()) == ["water_frame000000.png", "water_frame000001.png"]
+
+
+def test_trajectory_mode_reports_unreadable_files_and_continues(tmp_path, capsys):
+    (tmp_path / "water.inp").write_text(WATER_GAMESS)
+    (tmp_path / "water.xyz").write_text(WATER_FRAME)
+    output_dir = tmp_path / "images"
+
+    pattern = str(tmp_path / "water.*")
+    assert main([pattern, "-o", str(output_dir), "--trajectory", "-j", "1", "--size", "100", "100"]) == 1
+    assert "Failed to render" in capsys.readouterr().err
+    assert [path.name for path in output_dir.iterdir()] == ["water_frame000000.png"]
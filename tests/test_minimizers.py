@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from minimizers import ConvergenceCriteria, LBFGSMinimizer, get_minimizer
+
+CURVATURES = np.array([1.0, 4.0, 9.0])
+MINIMUM = np.array([0.5, -1.0, 2.0])
+
+
+def quadratic(coordinates):
+    """Separable quadratic bowl with its minimum at MINIMUM on every atom."""
+    displacement = coordinates - MINIMUM
+    return 0.5 * float(np.sum(CURVATURES * displacement ** 2)), CURVATURES * displacement
+
+
+def rosenbrock(coordinates):
+    """The Rosenbrock valley in the x-y plane of one atom, with a harmonic z."""
+    x, y, z = coordinates[0]
+    energy = (1 - x) ** 2 + 100 * (y - x ** 2) ** 2 + z ** 2
+    gradient = np.array([[-2 * (1 - x) - 400 * x * (y - x ** 2), 200 * (y - x ** 2), 2 * z]])
+    return energy, gradient
+
+
+@pytest.mark.parametrize("method", ["lbfgs", "fire"])
+def test_converges_on_quadratic(method):
+    start = np.zeros((4, 3))
+    result = get_minimizer(method, max_steps=2000).minimize(quadratic, start)
+    assert result.converged
+    np.testing.assert_allclose(result.coordinates, np.broadcast_to(MINIMUM, start.shape), atol=1e-3)
+    assert result.max_force <= ConvergenceCriteria().max_force
+
+
+@pytest.mark.parametrize("method", ["lbfgs", "fire"])
+def test_converges_on_rosenbrock(method):
+    result = get_minimizer(method, max_steps=20000).minimize(rosenbrock, [[-1.2, 1.0, 0.3]])
+    assert result.converged
+    np.testing.assert_allclose(result.coordinates, [[1.0, 1.0, 0.0]], atol=1e-2)
+
+
+def test_callback_stops_run():
+    result = get_minimizer('lbfgs').minimize(quadratic, np.zeros((2, 3)), lambda step, *_: step == 3)
+    assert result.steps == 3
+    assert not result.converged
+
+
+def test_lbfgs_never_moves_uphill():
+    """A failed line search must not accept an uphill step or store a curvature pair."""
+    def wrong_gradient(coordinates):
+        energy, gradient = quadratic(coordinates)
+        return energy, -gradient  # A gradient pointing uphill, so no trial step satisfies Armijo
+
+    minimizer = LBFGSMinimizer(max_steps=3)
+    start = np.zeros((2, 3))
+    energy = quadratic(start)[0]
+    result = minimizer.minimize(wrong_gradient, start)
+    assert result.energy <= energy
+    np.testing.assert_array_equal(result.coordinates, start)
+    assert minimizer.s_history == []
+
+
+def test_lbfgs_stops_when_stalled():
+    """When no step lowers the energy, the run ends at once instead of retrying until max_steps."""
+    calls = []
+
+    def flat_with_gradient(coordinates):
+        calls.append(1)
+        return 0.0, np.ones_like(coordinates)  # A constant energy with a nonzero gradient never converges
+
+    result = LBFGSMinimizer(max_steps=1000).minimize(flat_with_gradient, np.zeros((2, 3)))
+    assert result.stalled and not result.converged
+    assert result.steps == 1
+    assert len(calls) < 50
+
+    result = LBFGSMinimizer().minimize(quadratic, np.zeros((2, 3)))
+    assert result.converged and not result.stalled
@@ -0,0 +1,118 @@
+import io
+import numpy as np
+import pytest
+from Reader_and_convertor import GeometryReaderAndConverter
+from geometry import BOHR_PER_ANGSTROM, Geometry
+
+WATER_XYZ = """3
+water
+O 0.000000 0.000000 0.117300
+H 0.000000 0.757200 -0.469200
+H 0.000000 -0.757200 -0.469200
+"""
+WATER_ANGSTROM = np.array([[0.0, 0.0, 0.1173], [0.0, 0.7572, -0.4692], [0.0, -0.7572, -0.4692]])
+WATER_GAMESS = """ $DATA
+water
+C1
+OXYGEN      8.0   0.0000000000   0.0000000000   0.1173000000
+HYDROGEN    1.0   0.0000000000   0.7572000000  -0.4692000000
+HYDROGEN    1.0   0.0000000000  -0.7572000000  -0.4692000000
+ $END
+"""
+UNITS = ('angstrom', 'bohr')
+
+
+@pytest.fixture
+def reader_converter():
+    return GeometryReaderAndConverter()
+
+
+def _written_coordinates(text):
+    """The x, y, z columns of the atom rows, skipping title and $CONTRL lines."""
+    rows = [line.split() for line in text.splitlines()]
+    return np.array([row[-3:] for row in rows if len(row) >= 4 and row[-1][-1].isdigit()], dtype=np.float64)
+
+
+@pytest.mark.parametrize("source", [WATER_XYZ, WATER_GAMESS], ids=["xyz", "gamess"])
+@pytest.mark.parametrize("input_unit", UNITS)
+def test_read_tags_the_requested_unit(reader_converter, source, input_unit):
+    geometry = reader_converter.parse_geometry(source, input_unit)
+    assert geometry.unit == input_unit
+    scale = BOHR_PER_ANGSTROM if input_unit == 'bohr' else 1.0
+    np.testing.assert_allclose(geometry.coordinates, WATER_ANGSTROM * scale)
+    assert geometry.symbols == ['O', 'H', 'H']
+
+
+@pytest.mark.parametrize("target_format", ["xyz", "gamess"])
+@pytest.mark.parametrize("source", [WATER_XYZ, WATER_GAMESS], ids=["xyz", "gamess"])
+@pytest.mark.parametrize("input_unit", UNITS)
+@pytest.mark.parametrize("output_unit", UNITS)
+def test_written_values_depend_only_on_output_unit(reader_converter, target_format, source, input_unit,
+                                                   output_unit):
+    geometry = reader_converter.parse_geometry(source, input_unit)
+    text = reader_converter.convert_to_format(geometry, target_format, output_unit)
+    scale = BOHR_PER_ANGSTROM if output_unit == 'bohr' else 1.0
+    np.testing.assert_allclose(_written_coordinates(text), WATER_ANGSTROM * scale, atol=1e-6)
+
+
+@pytest.mark.parametrize("input_unit", UNITS)
+@pytest.mark.parametrize("output_unit", UNITS)
+def test_gamess_round_trip(reader_converter, input_unit, output_unit):
+    geometry = reader_converter.parse_geometry(WATER_XYZ, input_unit)
+    text = reader_converter.convert_to_format(geometry, 'gamess', output_unit)
+    assert ("UNITS=BOHR" in text) == (output_unit == 'bohr')
+    reread = reader_converter.parse_geometry(text, 'angstrom')
+    np.testing.assert_allclose(reread.coordinates, WATER_ANGSTROM, atol=1e-6)
+    np.testing.assert_array_equal(reread.atomic_numbers, geometry.atomic_numbers)
+
+
+@pytest.mark.parametrize("input_unit", UNITS)
+def test_xyz_round_trip(reader_converter, input_unit):
+    geometry = reader_converter.parse_geometry(WATER_GAMESS, input_unit)
+    reread = reader_converter.parse_geometry(reader_converter.convert_to_format(geometry, 'xyz'), input_unit)
+    np.testing.assert_allclose(reread.coordinates, geometry.coordinates, atol=1e-5)
+    assert reread.unit == input_unit
+
+
+def test_lattice_round_trip(reader_converter):
+    text = '2\nLattice="4.0 0.0 0.0 0.0 5.0 0.0 1.0 0.0 6.0" Properties=species:S:1:pos:R:3\nC 0 0 0\nC 1 1 1\n'
+    geometry = reader_converter.parse_geometry(text, 'angstrom')
+    assert geometry.periodic
+    reread = reader_converter.parse_geometry(reader_converter.convert_to_format(geometry, 'xyz'), 'bohr')
+    np.testing.assert_allclose(reread.lattice, geometry.lattice * BOHR_PER_ANGSTROM)
+    np.testing.assert_allclose(reread.converted('angstrom').coordinates, geometry.coordinates, atol=1e-6)
+
+
+@pytest.mark.parametrize("output_unit", UNITS)
+def test_binary_round_trip(reader_converter, output_unit):
+    text = '2\nLattice="4.0 0.0 0.0 0.0 5.0 0.0 1.0 0.0 6.0"\nC 0 0 0\nO 1.1 0 0\n'
+    geometry = reader_converter.parse_geometry(text, 'angstrom')
+    reread = reader_converter.parse_geometry(reader_converter.convert_to_format(geometry, 'binary', output_unit))
+    assert reread.unit == output_unit
+    np.testing.assert_allclose(reread.converted('angstrom').coordinates, geometry.coordinates, atol=1e-12)
+    np.testing.assert_allclose(reread.converted('angstrom').lattice, geometry.lattice, atol=1e-12)
+    np.testing.assert_array_equal(reread.atomic_numbers, geometry.atomic_numbers)
+
+
+def test_unknown_symbols_are_written_as_x(reader_converter):
+    geometry = reader_converter.parse_geometry("2\n\nC 0 0 0\nQq 1 0 0\n", 'angstrom')
+    assert geometry.atomic_numbers.tolist() == [6, 0]
+    assert reader_converter.convert_to_format(geometry, 'xyz').splitlines()[3].split()[0] == 'X'
+
+
+def test_save_converted_geometry_returns_written_geometry(reader_converter, tmp_path, capsys):
+    geometry = reader_converter.parse_geometry(WATER_XYZ, 'angstrom')
+    path = tmp_path / "water.inp"
+    written = reader_converter.save_converted_geometry(geometry, 'gamess', path, 'bohr')
+    assert isinstance(written, Geometry) and written.unit == 'bohr'
+    np.testing.assert_allclose(written.coordinates, WATER_ANGSTROM * BOHR_PER_ANGSTROM)
+    assert capsys.readouterr().out == ""
+    np.testing.assert_allclose(reader_converter.read_geometry(path, 'angstrom').coordinates, WATER_ANGSTROM,
+                               atol=1e-6)
+
+
+def test_xyz_frames_from_stream(reader_converter):
+    stream = io.BytesIO((WATER_XYZ * 3).encode())
+    frames = list(reader_converter.parse_frames(stream, 'angstrom'))
+    assert len(frames) == 3
+    np.testing.assert_allclose(frames[2].coordinates, WATER_ANGSTROM)
@@ -0,0 +1,25 @@
+import numpy as np
+from binary_format import save_binary
+from geometry import Geometry
+from trajectory import Trajectory
+
+
+def test_matches_checks_atom_count_and_elements():
+    trajectory = Trajectory([8, 1, 1])
+    trajectory.append(np.zeros((3, 3)))
+    assert trajectory.matches(Geometry([8, 1, 1], np.ones((3, 3))))
+    assert not trajectory.matches(Geometry([1, 8, 1], np.ones((3, 3))))
+    assert not trajectory.matches(Geometry([8, 1], np.ones((2, 3))))
+    trajectory.close()
+
+
+def test_geometry_of_read_only_float64_frames_is_writable(tmp_path):
+    path = tmp_path / "frames.mvg"
+    save_binary(path, [8, 1, 1], np.zeros((2, 3, 3)), 'angstrom', dtype=np.float64)
+    trajectory = Trajectory.from_binary(path)
+    assert not trajectory.frame(1).flags.writeable
+
+    geometry = trajectory.geometry(1)
+    geometry.coordinates[:] = 1.0
+    np.testing.assert_array_equal(trajectory.frame(1), 0.0)
+    trajectory.close()
@@ -0,0 +1,199 @@
+import itertools
+import os
+import tempfile
+import weakref
+import numpy as np
+from numpy.lib.format import open_memmap
+from Element_infos import ATOMIC_NUMBER_DTYPE
+from geometry import Geometry, as_geometry
+from Reader_and_convertor import GeometryReaderAndConverter
+from binary_format import load_binary, save_binary
+
+_GROW_CHUNK_FRAMES = 256
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class Trajectory:
+    """Frames of one set of atoms stored in a memory-mapped (frames, N, 3) float32 .npy array.
+
+    Without an explicit `path` the frames live in a temporary file that is removed with the trajectory.
+    Periodic trajectories share the `lattice` of their first frame.
+    """
+
+    def __init__(self, atomic_numbers, unit='angstrom', path=None, capacity=16, lattice=None):
+        self.atomic_numbers = np.asarray(atomic_numbers, dtype=ATOMIC_NUMBER_DTYPE)
+        self.unit = unit
+        self.lattice = lattice
+        if path is None:
+            descriptor, path = tempfile.mkstemp(suffix='.npy', prefix='trajectory_')
+            os.close(descriptor)
+            self._finalizer = weakref.finalize(self, _remove_file, path)
+        else:
+            self._finalizer = None
+        self.path = path
+        self._length = 0
+        self._frames = self._allocate(max(capacity, 1))
+
+    @classmethod
+    def from_xyz(cls, file_path, input_unit='bohr', reader_converter=None, path=None):
+        """Load a multi-frame XYZ file frame by frame into a memory-mapped store."""
+        if reader_converter is None:
+            reader_converter = GeometryReaderAndConverter()
+        frame_count = count_xyz_frames(file_path)
+        trajectory = None
+        for geometry in reader_converter.read_frames(file_path, input_unit):
+            if trajectory is None:
+                trajectory = cls(geometry.atomic_numbers, geometry.unit, path, capacity=frame_count,
+                                 lattice=geometry.lattice)
+            trajectory.append(geometry.coordinates)
+        if trajectory is None:
+            raise ValueError(f"No frames found in {file_path}.")
+        return trajectory
+
+    @classmethod
+    def load(cls, path, atomic_numbers, unit='angstrom'):
+        """Open an existing (frames, N, 3) .npy frame file without reading it into memory."""
+        trajectory = cls.__new__(cls)
+        trajectory.atomic_numbers = np.asarray(atomic_numbers, dtype=ATOMIC_NUMBER_DTYPE)
+        trajectory.unit = unit
+        trajectory.lattice = None
+        trajectory.path = path
+        trajectory._finalizer = None
+        trajectory._frames = np.load(path, mmap_mode='r')
+        trajectory._length = len(trajectory._frames)
+        return trajectory
+
+    @classmethod
+    def from_binary(cls, file_path):
+        """Open the frames of a binary geometry file as a read-only memory map, without copying them."""
+        binary = load_binary(file_path, mmap_mode='r')
+        trajectory = cls.__new__(cls)
+        trajectory.atomic_numbers = binary.atomic_numbers
+        trajectory.unit = binary.unit
+        trajectory.lattice = binary.lattice
+        trajectory.path = file_path
+        trajectory._finalizer = None
+        trajectory._frames = binary.frames
+        trajectory._length = len(binary)
+        return trajectory
+
+    def append(self, coordinates):
+        if self._length == len(self._frames):
+            self._grow(2 * len(self._frames))
+        self._frames[self._length] = coordinates
+        self._length += 1
+
+    def frame(self, index):
+        """Return the float32 coordinates of one frame as a view into the memory map."""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("Frame index out of range.")
+        return self._frames[index]
+
+    def geometry(self, index):
+        """Return one frame as a Geometry; frames of read-only maps are copied so the geometry can be edited."""
+        coordinates = self.frame(index)
+        if not coordinates.flags.writeable:
+            coordinates = np.array(coordinates, dtype=np.float64)
+        return Geometry(self.atomic_numbers.copy(), coordinates, self.unit, self.lattice)
+
+    @property
+    def frames(self):
+        return self._frames[:self._length]
+
+    def save_xyz(self, file_path, output_unit='angstrom', reader_converter=None, append=False):
+        """Stream every frame to a multi-frame XYZ file; returns the number of frames written."""
+        if reader_converter is None:
+            reader_converter = GeometryReaderAndConverter()
+        return reader_converter.write_frames(self, file_path, output_unit, append)
+
+    def save_binary(self, file_path, bonds=None):
+        """Write every frame as float32 to a binary geometry file; returns the number of frames written."""
+        return save_binary(file_path, self.atomic_numbers, self.frames, self.unit, bonds, lattice=self.lattice)
+
+    def trim(self):
+        """Shrink the frame file to the recorded frames, dropping spare capacity."""
+        if self._length and self._length < len(self._frames):
+            self._grow(self._length)
+
+    def flush(self):
+        if hasattr(self._frames, 'flush'):
+            self._frames.flush()
+
+    def close(self):
+        self._frames = np.zeros((0, len(self.atomic_numbers), 3), dtype=np.float32)
+        self._length = 0
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def matches(self, geometry):
+        """True if `geometry` has the same atoms, in the same order, as the frames of this trajectory."""
+        geometry = as_geometry(geometry)
+        return (len(geometry) == len(self.atomic_numbers)
+                and np.array_equal(geometry.atomic_numbers, self.atomic_numbers))
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield self.geometry(index)
+
+    def __repr__(self):
+        return f"Trajectory({self._length} frames, {len(self.atomic_numbers)} atoms, unit={self.unit!r})"
+
+    def _allocate(self, capacity, path=None):
+        return open_memmap(path or self.path, mode='w+', dtype=np.float32,
+                           shape=(capacity, len(self.atomic_numbers), 3))
+
+    def _grow(self, capacity):
+        grown_path = self.path + '.grow'
+        grown_frames = self._allocate(capacity, grown_path)
+        for start in range(0, self._length, _GROW_CHUNK_FRAMES):
+            stop = min(start + _GROW_CHUNK_FRAMES, self._length)
+            grown_frames[start:stop] = self._frames[start:stop]
+        grown_frames.flush()
+        del grown_frames
+        self._frames = None
+        os.replace(grown_path, self.path)
+        self._frames = np.load(self.path, mmap_mode='r+')
+
+
+class TrajectoryRecorder:
+    """Optimizer callback that appends every step's coordinates to a Trajectory."""
+
+    def __init__(self, geometry, path=None, every=1, callback=None):
+        geometry = as_geometry(geometry)
+        self.trajectory = Trajectory(geometry.atomic_numbers, geometry.unit, path, lattice=geometry.lattice)
+        self.trajectory.append(geometry.coordinates)
+        self.every = every
+        self.callback = callback
+
+    def __call__(self, step, coordinates, energy, gradient):
+        if step % self.every == 0:
+            self.trajectory.append(coordinates)
+        if self.callback is not None:
+            return self.callback(step, coordinates, energy, gradient)
+        return False
+
+
+def count_xyz_frames(file_path):
+    """Count the frames of a multi-frame XYZ file by skipping over the atom blocks."""
+    frames = 0
+    with open(file_path, 'r') as f:
+        for count_line in f:
+            if not count_line.strip():
+                continue
+            atom_count = int(count_line)
+            skipped = sum(1 for _ in itertools.islice(f, atom_count + 1))
+            if skipped < atom_count + 1:
+                break
+            frames += 1
+    return frames
@@ -0,0 +1,97 @@
+import tkinter as tk
+from tkinter import filedialog, ttk
+import numpy as np
+from trajectory import Trajectory
+from binary_format import is_binary_geometry
+
+PLAYBACK_INTERVAL_MS = 50
+
+class TrajectoryControls:
+    def __init__(self, root, visualizer_app):
+        self.root = root
+        self.visualizer_app = visualizer_app
+        self.trajectory = None
+        self.current_frame = 0
+        self.playing = False
+
+        self.frame = ttk.Frame(root, padding="5")
+        self.frame.grid(row=12, column=0, columnspan=2, padx=10, pady=5, sticky="EW")
+        ttk.Button(self.frame, text="Load Trajectory", command=self.load_trajectory_file).grid(row=0, column=0, padx=5)
+        self.play_button = ttk.Button(self.frame, text="Play", command=self.toggle_playback, state=tk.DISABLED)
+        self.play_button.grid(row=0, column=1, padx=5)
+        self.slider = ttk.Scale(self.frame, from_=0, to=0, orient=tk.HORIZONTAL, length=350, command=self.on_slider)
+        self.slider.grid(row=0, column=2, padx=5)
+        self.frame_label = ttk.Label(self.frame, text="No trajectory")
+        self.frame_label.grid(row=0, column=3, padx=5)
+        self.save_button = ttk.Button(self.frame, text="Save Trajectory", command=self.save_trajectory_file,
+                                      state=tk.DISABLED)
+        self.save_button.grid(row=0, column=4, padx=5)
+
+    def load_trajectory_file(self):
+        file_path = filedialog.askopenfilename()
+        if not file_path:
+            return
+        if is_binary_geometry(file_path):
+            trajectory = Trajectory.from_binary(file_path)
+        else:
+            trajectory = Trajectory.from_xyz(file_path, self.visualizer_app.input_unit_var.get(),
+                                             self.visualizer_app.reader_converter)
+        geometry = trajectory.geometry(0)
+        self.visualizer_app.geometry = geometry
+        self.visualizer_app.visualize_with_bonds(geometry)
+        self.set_trajectory(trajectory, 0)
+
+    def save_trajectory_file(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".xyz")
+        if not file_path:
+            return
+        frames = self.trajectory.save_xyz(file_path, self.visualizer_app.output_unit_var.get(),
+                                          self.visualizer_app.reader_converter)
+        print(f"Trajectory with {frames} frames saved to {file_path}")
+
+    def set_trajectory(self, trajectory, current_frame):
+        """Attach a trajectory whose frame `current_frame` is the geometry already on screen."""
+        self.playing = False
+        self.play_button.config(text="Play", state=tk.NORMAL if len(trajectory) > 1 else tk.DISABLED)
+        self.save_button.config(state=tk.NORMAL)
+        if self.trajectory is not None and self.trajectory is not trajectory:
+            self.trajectory.close()
+        self.trajectory = trajectory
+        self.current_frame = current_frame % len(trajectory)
+        self.slider.config(to=len(trajectory) - 1)
+        self.slider.set(self.current_frame)
+        self.update_frame_label()
+
+    def show_frame(self, index):
+        self.current_frame = index
+        geometry = self.visualizer_app.geometry
+        if geometry is None or not np.array_equal(geometry.atomic_numbers, self.trajectory.atomic_numbers):
+            self.visualizer_app.geometry = self.trajectory.geometry(index)
+            self.visualizer_app.visualize_with_bonds(self.visualizer_app.geometry)
+        else:
+            geometry.coordinates[:] = self.trajectory.frame(index)
+            self.visualizer_app.scene.update_coordinates(geometry.coordinates)
+        self.update_frame_label()
+        self.visualizer_app.canvas.draw_idle()
+
+    def update_frame_label(self):
+        self.frame_label.config(text=f"Frame {self.current_frame + 1}/{len(self.trajectory)}")
+
+    def on_slider(self, value):
+        index = int(round(float(value)))
+        if self.trajectory is not None and index != self.current_frame:
+            self.show_frame(index)
+
+    def toggle_playback(self):
+        self.playing = not self.playing
+        self.play_button.config(text="Pause" if self.playing else "Play")
+        if self.playing:
+            self.root.after(PLAYBACK_INTERVAL_MS, self.advance_playback)
+
+    def advance_playback(self):
+        if not self.playing or self.trajectory is None:
+            return
+        index = (self.current_frame + 1) % len(self.trajectory)
+        self.show_frame(index)
+        self.slider.set(index)
+        self.root.after(PLAYBACK_INTERVAL_MS, self.advance_playback)